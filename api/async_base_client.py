@@ -0,0 +1,80 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any, List, AsyncIterator
+from api.base_client import DEFAULT_CHUNK_SIZE
+from utils.logger import get_child_logger
+
+class AsyncBaseTTSClient(ABC):
+    """异步 TTS 客户端基类
+
+    所有网络请求都受 max_concurrency 信号量约束, 单个事件循环即可同时
+    承载大量请求而不需要为每个请求创建线程。
+    """
+    
+    def __init__(self, api_key: str, api_url: Optional[str] = None,
+                 max_concurrency: int = 16):
+        self.logger = get_child_logger('async_api_client')
+        self.api_key = api_key
+        self.base_url = api_url
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """并发限制信号量 (在事件循环内首次使用时创建)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+        
+    @abstractmethod
+    async def create_speech(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model: Optional[str] = None,
+        response_format: str = "mp3",
+        sample_rate: Optional[int] = None,
+        speed: float = 1.0,
+        gain: float = 0.0
+    ) -> bytes:
+        """文本转语音"""
+        pass
+        
+    async def create_speech_stream(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                   **kwargs) -> AsyncIterator[bytes]:
+        """流式文本转语音, 默认实现一次性返回完整音频"""
+        yield await self.create_speech(text, **kwargs)
+        
+    @abstractmethod
+    async def get_voice_list(self) -> Dict[str, List[Dict[str, Any]]]:
+        """获取可用音色列表"""
+        pass
+        
+    @abstractmethod
+    async def delete_voice(self, voice_id: str) -> Dict[str, Any]:
+        """删除指定音色"""
+        pass
+        
+    @abstractmethod
+    async def upload_voice(self, audio_data: bytes, model: str,
+                           custom_name: str, text: str) -> Dict[str, Any]:
+        """上传自定义音色"""
+        pass
+        
+    @abstractmethod
+    def get_available_models(self) -> Dict[str, str]:
+        """获取可用模型列表"""
+        pass
+        
+    @abstractmethod
+    def get_default_voices(self, model: str) -> List[str]:
+        """获取指定模型的默认音色"""
+        pass
+        
+    async def warmup(self) -> None:
+        """预热连接 (可选实现)"""
+        pass
+        
+    async def close(self) -> None:
+        """释放连接等资源 (可选实现)"""
+        pass
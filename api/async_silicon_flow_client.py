@@ -0,0 +1,173 @@
+import asyncio
+import base64
+from typing import Dict, Any, List, Optional, AsyncIterator
+import aiohttp
+from api.base_client import DEFAULT_CHUNK_SIZE
+from api.async_base_client import AsyncBaseTTSClient
+from api.silicon_flow_client import SiliconFlowClient
+from api.request_scheduler import RequestScheduler, RetryPolicy
+
+class AsyncSiliconFlowClient(AsyncBaseTTSClient):
+    """硅基流动 API 异步客户端"""
+    
+    DEFAULT_MODEL = SiliconFlowClient.DEFAULT_MODEL
+    AVAILABLE_MODELS = SiliconFlowClient.AVAILABLE_MODELS
+    DEFAULT_VOICES = SiliconFlowClient.DEFAULT_VOICES
+    
+    # 与同步客户端共用请求参数构造
+    _build_speech_payload = SiliconFlowClient._build_speech_payload
+    
+    def __init__(self, api_key: str, api_url: Optional[str] = None,
+                 max_concurrency: int = 16, pool_size: int = 100,
+                 keepalive_timeout: float = 60.0,
+                 rate_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_retries: int = 3, retry_rate_limited: bool = True):
+        super().__init__(api_key, api_url or "https://api.siliconflow.cn/v1",
+                         max_concurrency)
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.scheduler = RequestScheduler(rate_limits, RetryPolicy(
+            max_retries=max_retries, retry_rate_limited=retry_rate_limited
+        ))
+        
+    async def _send(self, method: str, endpoint: str, *, idempotent: bool,
+                    chars: int = 0, model: Optional[str] = None,
+                    **kwargs) -> aiohttp.ClientResponse:
+        """经调度器发送请求, 返回的响应需由调用方释放"""
+        url = f"{self.base_url}{endpoint}"
+        session = self._get_session()
+        return await self.scheduler.execute_async(
+            endpoint,
+            lambda: session.request(method, url, **kwargs),
+            idempotent=idempotent,
+            chars=chars,
+            model=model,
+            retry_on=(aiohttp.ClientConnectionError, asyncio.TimeoutError)
+        )
+        
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享会话 (需在事件循环内调用)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector
+            )
+        return self._session
+        
+    async def warmup(self) -> None:
+        """预热连接池"""
+        try:
+            async with self._get_session().head(self.base_url) as response:
+                await response.read()
+        except aiohttp.ClientError:
+            self.logger.warning(f"连接预热失败: {self.base_url}", exc_info=True)
+            
+    async def close(self) -> None:
+        """关闭会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        
+    async def create_speech(self, text: str, **kwargs) -> bytes:
+        """实现文本转语音"""
+        chunks = []
+        async for chunk in self.create_speech_stream(text, **kwargs):
+            chunks.append(chunk)
+        return b''.join(chunks)
+        
+    async def create_speech_stream(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                   **kwargs) -> AsyncIterator[bytes]:
+        """流式文本转语音, 按到达顺序逐块返回音频数据"""
+        data = self._build_speech_payload(text, **kwargs)
+        
+        async with self.semaphore:
+            self.logger.info(f"开始异步文本转语音请求: {text[:50]}...")
+            try:
+                response = await self._send(
+                    'POST', '/audio/speech',
+                    idempotent=True, chars=len(text), model=data['model'], json=data
+                )
+                async with response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        yield chunk
+            except Exception as e:
+                self.logger.error("API请求失败", exc_info=True)
+                raise
+                
+    async def get_voice_list(self) -> Dict[str, List[Dict[str, Any]]]:
+        """获取可用音色列表"""
+        async with self.semaphore:
+            try:
+                self.logger.info("获取音色列表...")
+                response = await self._send('GET', '/audio/voice/list', idempotent=True)
+                async with response:
+                    response.raise_for_status()
+                    result = await response.json()
+                self.logger.debug(f"获取到音色列表: {result}")
+                return result
+            except Exception as e:
+                self.logger.error("获取音色列表失败", exc_info=True)
+                raise
+                
+    async def delete_voice(self, voice_id: str) -> Dict[str, Any]:
+        """删除指定音色"""
+        async with self.semaphore:
+            try:
+                self.logger.info(f"删除音色: {voice_id}")
+                response = await self._send(
+                    'POST', '/audio/voice/deletions', idempotent=False, json={"uri": voice_id}
+                )
+                async with response:
+                    response.raise_for_status()
+                    result = await response.json()
+                self.logger.debug(f"删除音色结果: {result}")
+                return result
+            except Exception as e:
+                self.logger.error(f"删除音色失败: {voice_id}", exc_info=True)
+                raise
+                
+    async def upload_voice(self, audio_data: bytes, model: str,
+                           custom_name: str, text: str) -> Dict[str, Any]:
+        """上传自定义音色"""
+        if model not in self.AVAILABLE_MODELS:
+            raise ValueError(f"模型 {model} 不存在")
+            
+        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+        data = {
+            'audio': f"data:audio/mpeg;base64,{audio_base64}",
+            'model': model,
+            'customName': custom_name,
+            'text': text
+        }
+        
+        async with self.semaphore:
+            try:
+                self.logger.debug(f"上传音色请求参数: model={model}, customName={custom_name}, text={text}")
+                response = await self._send(
+                    'POST', '/uploads/audio/voice', idempotent=False, json=data
+                )
+                async with response:
+                    if response.status == 400:
+                        self.logger.error(f"服务器返回错误: {await response.text()}")
+                    response.raise_for_status()
+                    result = await response.json()
+                self.logger.debug(f"上传音色结果: {result}")
+                return result
+            except Exception as e:
+                self.logger.error("上传音色失败", exc_info=True)
+                raise
+                
+    def get_available_models(self) -> Dict[str, str]:
+        """获取可用模型列表"""
+        return self.AVAILABLE_MODELS
+        
+    def get_default_voices(self, model: str) -> List[str]:
+        """获取指定模型的默认音色"""
+        return self.DEFAULT_VOICES.get(model, [])
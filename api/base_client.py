@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Callable
 from utils.logger import get_child_logger
 
+# 流式响应默认分块大小 (字节)
+DEFAULT_CHUNK_SIZE = 8192
+
 class BaseTTSClient(ABC):
     """TTS 客户端基类"""
     
@@ -17,13 +20,21 @@ class BaseTTSClient(ABC):
         voice_id: Optional[str] = None,
         model: Optional[str] = None,
         response_format: str = "mp3",
-        sample_rate: int = 32000,
+        sample_rate: Optional[int] = None,
         speed: float = 1.0,
         gain: float = 0.0
     ) -> bytes:
         """文本转语音"""
         pass
         
+    def create_speech_stream(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             **kwargs) -> Iterator[bytes]:
+        """流式文本转语音, 逐块返回音频数据
+        
+        默认实现在完整音频下载后一次性返回, 支持流式响应的客户端应重写此方法
+        """
+        yield self.create_speech(text, **kwargs)
+        
     @abstractmethod
     def get_voice_list(self) -> Dict[str, List[Dict[str, Any]]]:
         """获取可用音色列表"""
@@ -40,6 +51,25 @@ class BaseTTSClient(ABC):
         """上传自定义音色"""
         pass
         
+    def upload_voice_file(self, file_path: str, model: str, custom_name: str, text: str,
+                          progress_callback: Optional[Callable[[int, int], None]] = None
+                          ) -> Dict[str, Any]:
+        """从文件上传自定义音色
+        
+        默认实现读取整个文件后调用 upload_voice, 支持流式请求体的客户端应重写此方法
+        """
+        with open(file_path, 'rb') as f:
+            audio_data = f.read()
+        result = self.upload_voice(
+            audio_data=audio_data,
+            model=model,
+            custom_name=custom_name,
+            text=text
+        )
+        if progress_callback:
+            progress_callback(len(audio_data), len(audio_data))
+        return result
+        
     @abstractmethod
     def get_available_models(self) -> Dict[str, str]:
         """获取可用模型列表"""
@@ -48,4 +78,16 @@ class BaseTTSClient(ABC):
     @abstractmethod
     def get_default_voices(self, model: str) -> List[str]:
         """获取指定模型的默认音色"""
+        pass
+        
+    def warmup(self) -> None:
+        """预热连接 (可选实现)"""
+        pass
+        
+    def connection_stats(self) -> Dict[str, int]:
+        """获取连接统计 (可选实现)"""
+        return {}
+        
+    def close(self) -> None:
+        """释放连接等资源 (可选实现)"""
         pass 
\ No newline at end of file
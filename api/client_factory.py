@@ -1,34 +1,91 @@
-from typing import Optional, Dict
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
 from api.base_client import BaseTTSClient
+from api.client_pool import ClientPool
 from api.silicon_flow_client import SiliconFlowClient
+from api.sync_facade import AsyncSiliconFlowFacade
 from utils.logger import get_child_logger
 
 class TTSClientFactory:
-    """TTS 客户端工厂"""
+    """TTS 客户端工厂
+
+    客户端按 (服务提供商, 密钥, 地址) 缓存, 更换密钥或地址时创建新的
+    客户端, 该提供商的旧客户端移出缓存但不关闭 (可能仍有任务在使用),
+    由持有者不再使用时调用 release 关闭。传入多个密钥时返回按负载路由的
+    客户端池。
+    """
     _logger = get_child_logger('client_factory')
-    _instances: Dict[str, BaseTTSClient] = {}
+    _instances: Dict[Tuple[str, Union[str, Tuple[str, ...]], Optional[str]], BaseTTSClient] = {}
+    _lock = threading.Lock()
+    PROVIDERS = {
+        'silicon_flow': SiliconFlowClient,
+        'silicon_flow_async': AsyncSiliconFlowFacade,
+        # 在这里添加其他服务提供商
+    }
     
     @classmethod
-    def create_client(cls, provider: str, api_key: str, 
-                     api_url: Optional[str] = None) -> BaseTTSClient:
-        """创建 TTS 客户端"""
-        if provider not in cls._instances:
-            cls._logger.info(f"创建 TTS 客户端: {provider}")
-            
-            providers = {
-                'silicon_flow': SiliconFlowClient,
-                # 在这里添加其他服务提供商
-            }
+    def create_client(cls, provider: str, api_key: Union[str, Sequence[str]],
+                     api_url: Optional[str] = None, prewarm: bool = False,
+                     pool_options: Optional[Dict[str, Any]] = None,
+                     **options) -> BaseTTSClient:
+        """创建 TTS 客户端
+        Args:
+            provider: 服务提供商
+            api_key: API密钥, 多个密钥时返回客户端池
+            api_url: API地址
+            prewarm: 创建后是否立即预热连接
+            pool_options: 客户端池参数 (throttle_cooldown / auth_cooldown / max_wait)
+            options: 传给客户端的连接池等参数
+        """
+        client_class = cls.PROVIDERS.get(provider)
+        if not client_class:
+            raise ValueError(f"未知的服务提供商: {provider}")
             
-            client_class = providers.get(provider)
-            if not client_class:
-                raise ValueError(f"未知的服务提供商: {provider}")
+        keys = [api_key] if isinstance(api_key, str) else list(dict.fromkeys(api_key))
+        if not keys:
+            raise ValueError("缺少API密钥")
+        cache_key = (provider, keys[0] if len(keys) == 1 else tuple(keys), api_url)
+        with cls._lock:
+            client = cls._instances.get(cache_key)
+            if client is None:
+                # 同一提供商只缓存当前密钥的客户端
+                for key in [key for key in cls._instances if key[0] == provider]:
+                    del cls._instances[key]
+                if len(keys) == 1:
+                    cls._logger.info(f"创建 TTS 客户端: {provider}")
+                    client = client_class(keys[0], api_url, **options)
+                else:
+                    cls._logger.info(f"创建 TTS 客户端池: {provider}, {len(keys)} 个密钥")
+                    # 池中的客户端遇到 429 不在原密钥上重试, 由池换用其他密钥
+                    members = {
+                        key: client_class(key, api_url, retry_rate_limited=False, **options)
+                        for key in keys
+                    }
+                    client = ClientPool(members, **(pool_options or {}))
+                cls._instances[cache_key] = client
                 
-            cls._instances[provider] = client_class(api_key, api_url)
-            
-        return cls._instances[provider]
+        if prewarm:
+            client.warmup()
+        return client
+        
+    @classmethod
+    def get_client(cls, provider: str, api_key: Optional[str] = None,
+                   api_url: Optional[str] = None) -> Optional[BaseTTSClient]:
+        """获取已创建的客户端实例, 不指定密钥时返回该提供商最近创建的客户端"""
+        with cls._lock:
+            if api_key is not None:
+                return cls._instances.get((provider, api_key, api_url))
+            matches = [client for key, client in cls._instances.items() if key[0] == provider]
+        return matches[-1] if matches else None
         
     @classmethod
-    def get_client(cls, provider: str) -> Optional[BaseTTSClient]:
-        """获取已创建的客户端实例"""
-        return cls._instances.get(provider) 
\ No newline at end of file
+    def release(cls, client: BaseTTSClient) -> None:
+        """持有者不再使用客户端时调用, 已被新密钥替换 (不在缓存中) 时关闭"""
+        with cls._lock:
+            if any(cached is client for cached in cls._instances.values()):
+                return
+        cls._logger.info("关闭已替换的 TTS 客户端")
+        try:
+            client.close()
+        except Exception:
+            cls._logger.warning("关闭 TTS 客户端失败", exc_info=True)
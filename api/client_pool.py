@@ -0,0 +1,287 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from api.base_client import BaseTTSClient, DEFAULT_CHUNK_SIZE
+from api.request_scheduler import RATE_LIMITED_STATUS, parse_retry_after
+from utils.logger import get_child_logger
+
+# 认证失败: 密钥无效或欠费, 较长时间内不再使用
+AUTH_FAILED_STATUS = (401, 403)
+# 自定义音色 URI 的前缀, 预置音色在所有密钥上都可用
+CUSTOM_VOICE_PREFIX = 'speech:'
+
+
+@dataclass
+class _Member:
+    """池中的一个密钥及其客户端"""
+    name: str
+    client: BaseTTSClient
+    in_flight: int = 0
+    requests: int = 0
+    throttled: int = 0
+    auth_failures: int = 0
+    ejected_until: float = 0.0
+    eject_reason: Optional[int] = None
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """取出 HTTP 错误的状态码 (requests 和 aiohttp 的异常均可)"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status if status is not None else getattr(error, 'status', None)
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """取出 HTTP 错误的 Retry-After"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(error, 'headers', None) or {}
+    return parse_retry_after(headers.get('Retry-After'))
+
+
+class ClientPool(BaseTTSClient):
+    """多密钥客户端池
+
+    每个请求路由到进行中请求最少 (其次被限流最少) 的密钥。密钥返回 429
+    时暂停使用一段时间 (优先按 Retry-After), 返回 401/403 时长时间停用,
+    请求立即换用其他密钥重试。所有密钥都被限流时等待最早恢复的密钥。
+
+    自定义音色属于创建它的账号, 使用自定义音色的请求固定路由到对应密钥。
+    所属密钥在首次使用未知的自定义音色时通过音色列表查找, 上传的音色
+    固定在主密钥上。
+    """
+    def __init__(self, clients: Dict[str, BaseTTSClient], throttle_cooldown: float = 30.0,
+                 auth_cooldown: float = 600.0, max_wait: float = 60.0):
+        """
+        Args:
+            clients: 密钥到客户端的映射, 第一个为主密钥 (上传音色使用)
+            throttle_cooldown: 429 且没有 Retry-After 时的停用时间(秒)
+            auth_cooldown: 401/403 的停用时间(秒)
+            max_wait: 所有密钥都被限流时最多等待的时间(秒)
+        """
+        if not clients:
+            raise ValueError("客户端池至少需要一个密钥")
+        primary = next(iter(clients.values()))
+        super().__init__('', primary.base_url)
+        self.logger = get_child_logger('client_pool')
+        self.members = [_Member(self._mask(key), client) for key, client in clients.items()]
+        self.throttle_cooldown = throttle_cooldown
+        self.auth_cooldown = auth_cooldown
+        self.max_wait = max_wait
+        # 自定义音色 URI -> 所属密钥
+        self._voice_owners: Dict[str, _Member] = {}
+        # 查找后仍不属于任何密钥的音色, 刷新音色列表前不再重复查找
+        self._unknown_voices: Set[str] = set()
+        self._lock = threading.Lock()
+        self._lookup_lock = threading.Lock()
+
+    @staticmethod
+    def _mask(api_key: str) -> str:
+        """日志中使用的密钥标识"""
+        return f"key-{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8]}"
+
+    def _resolve_owner(self, voice_id: Optional[str]) -> None:
+        """首次使用未知的自定义音色时拉取各密钥的音色列表, 记录所属密钥"""
+        if not voice_id or not voice_id.startswith(CUSTOM_VOICE_PREFIX):
+            return
+        with self._lookup_lock:
+            with self._lock:
+                if voice_id in self._voice_owners or voice_id in self._unknown_voices:
+                    return
+            self.logger.debug(f"查找音色所属的密钥: {voice_id}")
+            self.get_voice_list()
+            with self._lock:
+                if voice_id not in self._voice_owners:
+                    self._unknown_voices.add(voice_id)
+
+    def _pin_voice(self, voice_id: Optional[str], member: _Member) -> None:
+        """记录音色所属的密钥"""
+        if voice_id:
+            with self._lock:
+                self._voice_owners[voice_id] = member
+                self._unknown_voices.discard(voice_id)
+
+    def _acquire(self, voice_id: Optional[str] = None,
+                 exclude: Optional[List[_Member]] = None) -> _Member:
+        """选择密钥并计入进行中请求"""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                owner = self._voice_owners.get(voice_id) if voice_id else None
+                if owner is not None:
+                    candidates = [owner]
+                else:
+                    candidates = [m for m in self.members
+                                  if m.available(now) and m not in (exclude or ())]
+                if candidates:
+                    member = min(candidates, key=lambda m: (m.in_flight, m.throttled, m.requests))
+                    member.in_flight += 1
+                    member.requests += 1
+                    return member
+
+                throttled = [m for m in self.members if m.eject_reason == RATE_LIMITED_STATUS]
+                if not throttled:
+                    raise RuntimeError("没有可用的 API 密钥 (均认证失败)")
+                wait = min(m.ejected_until for m in throttled) - now
+            if now + wait > deadline:
+                raise RuntimeError("所有 API 密钥均被限流")
+            self.logger.warning(f"所有密钥均被限流, 等待 {wait:.1f}s")
+            time.sleep(max(0.0, wait))
+
+    def _release(self, member: _Member) -> None:
+        """请求结束"""
+        with self._lock:
+            member.in_flight -= 1
+
+    def _eject(self, member: _Member, error: BaseException) -> bool:
+        """按错误暂停使用密钥, 返回是否应换用其他密钥重试"""
+        status = status_of(error)
+        if status == RATE_LIMITED_STATUS:
+            cooldown = retry_after_of(error) or self.throttle_cooldown
+            with self._lock:
+                member.throttled += 1
+        elif status in AUTH_FAILED_STATUS:
+            cooldown = self.auth_cooldown
+            with self._lock:
+                member.auth_failures += 1
+        else:
+            return False
+        with self._lock:
+            member.ejected_until = time.monotonic() + cooldown
+            member.eject_reason = status
+        self.logger.warning(f"密钥 {member.name} 返回 {status}, 停用 {cooldown:.0f}s")
+        return True
+
+    def _call(self, method: str, *args, route_voice: Optional[str] = None, **kwargs) -> Any:
+        """在选中的密钥上调用, 被限流或认证失败时换用其他密钥
+        Args:
+            route_voice: 使用的音色, 自定义音色固定路由到所属密钥
+        """
+        self._resolve_owner(route_voice)
+        tried: List[_Member] = []
+        while True:
+            member = self._acquire(route_voice, tried)
+            try:
+                return getattr(member.client, method)(*args, **kwargs)
+            except Exception as e:
+                tried.append(member)
+                if not self._eject(member, e) or route_voice in self._voice_owners \
+                        or len(tried) >= len(self.members):
+                    raise
+            finally:
+                self._release(member)
+
+    def create_speech(self, text: str, **kwargs) -> bytes:
+        """文本转语音"""
+        return self._call('create_speech', text, route_voice=kwargs.get('voice_id'), **kwargs)
+
+    def create_speech_stream(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             **kwargs) -> Iterator[bytes]:
+        """流式文本转语音, 收到首块数据前失败时换用其他密钥"""
+        voice_id = kwargs.get('voice_id')
+        self._resolve_owner(voice_id)
+        tried: List[_Member] = []
+        while True:
+            member = self._acquire(voice_id, tried)
+            started = False
+            try:
+                for chunk in member.client.create_speech_stream(text, chunk_size=chunk_size, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                tried.append(member)
+                if started or not self._eject(member, e) or voice_id in self._voice_owners \
+                        or len(tried) >= len(self.members):
+                    raise
+            finally:
+                self._release(member)
+
+    def get_voice_list(self) -> Dict[str, List[Dict[str, Any]]]:
+        """合并各密钥的自定义音色, 并记录音色所属的密钥"""
+        voices: List[Dict[str, Any]] = []
+        owners: Dict[str, _Member] = {}
+        for member in self.members:
+            try:
+                result = member.client.get_voice_list().get('result', [])
+            except Exception as e:
+                self._eject(member, e)
+                self.logger.warning(f"获取密钥 {member.name} 的音色列表失败", exc_info=True)
+                continue
+            for voice in result:
+                if isinstance(voice, dict) and voice.get('uri'):
+                    owners[voice['uri']] = member
+                voices.append(voice)
+        with self._lock:
+            self._voice_owners = owners
+            self._unknown_voices = set()
+        return {'result': voices}
+
+    def delete_voice(self, voice_id: str) -> Dict[str, Any]:
+        """在音色所属的密钥上删除"""
+        self._resolve_owner(voice_id)
+        with self._lock:
+            member = self._voice_owners.get(voice_id, self.members[0])
+        result = member.client.delete_voice(voice_id)
+        with self._lock:
+            self._voice_owners.pop(voice_id, None)
+        return result
+
+    def _pin_uploaded(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """上传的音色固定路由到主密钥"""
+        if isinstance(result, dict):
+            self._pin_voice(result.get('uri'), self.members[0])
+        return result
+
+    def upload_voice(self, audio_data: bytes, model: str,
+                     custom_name: str, text: str) -> Dict[str, Any]:
+        """上传到主密钥"""
+        return self._pin_uploaded(self.members[0].client.upload_voice(
+            audio_data=audio_data, model=model, custom_name=custom_name, text=text
+        ))
+
+    def upload_voice_file(self, file_path: str, model: str, custom_name: str, text: str,
+                          progress_callback: Optional[Callable[[int, int], None]] = None
+                          ) -> Dict[str, Any]:
+        """从文件上传到主密钥"""
+        return self._pin_uploaded(self.members[0].client.upload_voice_file(
+            file_path, model, custom_name, text, progress_callback
+        ))
+
+    def get_available_models(self) -> Dict[str, str]:
+        """获取可用模型列表"""
+        return self.members[0].client.get_available_models()
+
+    def get_default_voices(self, model: str) -> List[str]:
+        """获取指定模型的默认音色"""
+        return self.members[0].client.get_default_voices(model)
+
+    def warmup(self) -> None:
+        """预热各密钥的连接池"""
+        for member in self.members:
+            if hasattr(member.client, 'warmup'):
+                member.client.warmup()
+
+    def close(self) -> None:
+        """关闭各密钥的连接池"""
+        for member in self.members:
+            if hasattr(member.client, 'close'):
+                member.client.close()
+
+    def pool_stats(self) -> List[Dict[str, Any]]:
+        """各密钥的负载和停用状态"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'key': member.name,
+                'in_flight': member.in_flight,
+                'requests': member.requests,
+                'throttled': member.throttled,
+                'auth_failures': member.auth_failures,
+                'ejected_for': max(0.0, member.ejected_until - now),
+            } for member in self.members]
@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Dict
+import requests
+from requests.adapters import HTTPAdapter
+from utils.logger import get_child_logger
+
+class PooledSession:
+    """带连接池和保活超时的 HTTP 会话
+
+    多个工作线程可以共享同一个实例: 底层 urllib3 连接池本身是线程安全的,
+    这里只对空闲回收和统计计数加锁。
+    """
+
+    def __init__(self, pool_size: int = 10, keepalive_timeout: float = 60.0,
+                 headers: Dict[str, str] = None):
+        self.logger = get_child_logger('http_pool')
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        # 被回收的连接池中累计的计数
+        self._retired_connections = 0
+        self._retired_requests = 0
+
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求, 复用池中的连接"""
+        self._expire_idle_connections()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._last_used = time.monotonic()
+
+    def warmup(self, url: str, timeout: float = 5.0) -> None:
+        """预热连接, 提前完成 TCP/TLS 握手"""
+        try:
+            self.request('HEAD', url, timeout=timeout)
+            self.logger.debug(f"连接预热完成: {url}")
+        except requests.RequestException:
+            self.logger.warning(f"连接预热失败: {url}", exc_info=True)
+
+    def stats(self) -> Dict[str, int]:
+        """获取连接统计 (新建连接数 / 复用次数)"""
+        with self._lock:
+            connections = self._retired_connections
+            total_requests = self._retired_requests
+            pools = self.adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    total_requests += pool.num_requests
+        return {
+            'requests': total_requests,
+            'new_connections': connections,
+            'reused_connections': max(0, total_requests - connections)
+        }
+
+    def close(self) -> None:
+        """关闭会话及所有连接"""
+        with self._lock:
+            self._retire_pools()
+        self.session.close()
+
+    def _expire_idle_connections(self) -> None:
+        """连接空闲超过保活时间时关闭, 避免复用已被服务器断开的连接"""
+        if not self.keepalive_timeout:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_used > self.keepalive_timeout:
+                self.logger.debug("连接空闲超时, 关闭连接池")
+                self._retire_pools()
+
+    def _retire_pools(self) -> None:
+        """记录计数后清空连接池 (调用方持有锁)"""
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                self._retired_connections += pool.num_connections
+                self._retired_requests += pool.num_requests
+        self.adapter.poolmanager.clear()
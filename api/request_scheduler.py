@@ -0,0 +1,235 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+import requests
+from utils.logger import get_child_logger
+
+# 可重试的状态码: 429 表示请求未被受理, 5xx 仅对幂等请求重试
+RATE_LIMITED_STATUS = 429
+RETRYABLE_SERVER_STATUS = (500, 502, 503, 504)
+
+
+class TokenBucket:
+    """令牌桶限流器 (线程安全)
+
+    采用预约方式: 令牌可被预支为负数, 调用方按返回的等待时间休眠,
+    因此同一个桶既可用于线程也可用于协程。
+    """
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌 (调用方持有锁)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """预约令牌, 返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def penalize(self, seconds: float) -> None:
+        """服务端限流时清空令牌并预支到 seconds 后, 让后续请求一起退避
+
+        同时收到多个 429 时取最长的退避时间, 不累加。
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+@dataclass
+class RetryPolicy:
+    """重试策略 (指数退避 + 全抖动)"""
+    max_retries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    # 为 False 时 429 直接返回给调用方 (多密钥池换用其他密钥, 不在原密钥上等待)
+    retry_rate_limited: bool = True
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头 (秒数或 HTTP 日期)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RequestScheduler:
+    """请求调度器: 按接口和模型限流, 对失败请求退避重试
+
+    limits 示例::
+
+        {
+            "/audio/speech": {
+                "requests_per_minute": 60,
+                "chars_per_minute": 20000,
+                "models": {"fishaudio/fish-speech-1.5": {"chars_per_minute": 10000}}
+            }
+        }
+
+    429 响应说明请求未被受理, 任何请求都可以重试; 5xx 和连接错误只对
+    幂等请求重试, 避免重复上传或删除。
+    """
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None,
+                 retry: Optional[RetryPolicy] = None):
+        self.logger = get_child_logger('request_scheduler')
+        self.limits = limits or {}
+        self.retry = retry or RetryPolicy()
+        self._buckets: Dict[Tuple[str, Optional[str], str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.throttled = 0
+
+    def _limit(self, endpoint: str, model: Optional[str], name: str) -> Optional[float]:
+        """查找限额, 模型配置优先于接口配置"""
+        config = self.limits.get(endpoint, {})
+        model_config = config.get('models', {}).get(model, {}) if model else {}
+        return model_config.get(name, config.get(name))
+
+    def _bucket(self, endpoint: str, model: Optional[str], name: str) -> Optional[TokenBucket]:
+        """获取 (接口, 模型, 限额类型) 对应的令牌桶"""
+        key = (endpoint, model, name)
+        with self._lock:
+            if key not in self._buckets:
+                limit = self._limit(endpoint, model, name)
+                self._buckets[key] = TokenBucket(limit) if limit else None
+            return self._buckets[key]
+
+    def _reserve(self, endpoint: str, model: Optional[str], chars: int) -> float:
+        """预约请求数和字符数令牌, 返回需要等待的秒数"""
+        wait = 0.0
+        bucket = self._bucket(endpoint, model, 'requests_per_minute')
+        if bucket:
+            wait = max(wait, bucket.reserve(1))
+        bucket = self._bucket(endpoint, model, 'chars_per_minute')
+        if bucket and chars:
+            wait = max(wait, bucket.reserve(chars))
+        return wait
+
+    def _penalize(self, endpoint: str, model: Optional[str], seconds: float) -> bool:
+        """收到 429 后让该接口的后续请求一起退避, 返回是否已由令牌桶承担等待"""
+        bucket = self._bucket(endpoint, model, 'requests_per_minute')
+        if bucket:
+            bucket.penalize(seconds)
+            return True
+        return False
+
+    def _retry_delay(self, attempt: int, status: Optional[int], headers: Any,
+                     idempotent: bool) -> Optional[float]:
+        """判断响应是否需要重试, 返回等待时间 (None 表示不重试)"""
+        if attempt >= self.retry.max_retries:
+            return None
+        if status == RATE_LIMITED_STATUS:
+            if not self.retry.retry_rate_limited:
+                return None
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            return retry_after if retry_after is not None else self.retry.backoff(attempt)
+        if status in RETRYABLE_SERVER_STATUS and idempotent:
+            return self.retry.backoff(attempt)
+        return None
+
+    def execute(self, endpoint: str, send: Callable[[], requests.Response], *,
+                idempotent: bool, chars: int = 0, model: Optional[str] = None,
+                retry_on: Tuple[Type[BaseException], ...] = (requests.ConnectionError, requests.Timeout)
+                ) -> requests.Response:
+        """限流后发送请求, 按策略重试
+        Args:
+            endpoint: 接口路径, 用于查找限额
+            send: 发送请求的函数, 每次重试都会重新调用
+            idempotent: 请求是否可安全重复执行
+            chars: 本次请求消耗的字符数
+            model: 模型ID
+            retry_on: 幂等请求遇到这些异常时重试
+        """
+        attempt = 0
+        while True:
+            wait = self._reserve(endpoint, model, chars)
+            if wait > 0:
+                self.logger.debug(f"限流等待 {wait:.2f}s: {endpoint}")
+                time.sleep(wait)
+            try:
+                response = send()
+            except retry_on:
+                if not idempotent or attempt >= self.retry.max_retries:
+                    raise
+                delay = self.retry.backoff(attempt)
+                self.logger.warning(f"请求异常, {delay:.2f}s 后重试: {endpoint}", exc_info=True)
+            else:
+                delay = self._retry_delay(attempt, response.status_code, response.headers, idempotent)
+                if delay is None:
+                    return response
+                delay = self._on_retry(endpoint, model, response.status_code, delay)
+                response.close()
+            attempt += 1
+            self.retries += 1
+            time.sleep(delay)
+
+    async def execute_async(self, endpoint: str, send: Callable[[], Awaitable[Any]], *,
+                            idempotent: bool, chars: int = 0, model: Optional[str] = None,
+                            retry_on: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError,)
+                            ) -> Any:
+        """execute 的协程版本, send 返回 aiohttp 响应"""
+        attempt = 0
+        while True:
+            wait = self._reserve(endpoint, model, chars)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await send()
+            except retry_on:
+                if not idempotent or attempt >= self.retry.max_retries:
+                    raise
+                delay = self.retry.backoff(attempt)
+                self.logger.warning(f"请求异常, {delay:.2f}s 后重试: {endpoint}", exc_info=True)
+            else:
+                delay = self._retry_delay(attempt, response.status, response.headers, idempotent)
+                if delay is None:
+                    return response
+                delay = self._on_retry(endpoint, model, response.status, delay)
+                response.release()
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def _on_retry(self, endpoint: str, model: Optional[str], status: int, delay: float) -> float:
+        """记录重试并在限流时通知令牌桶, 返回本线程还需直接等待的时间"""
+        self.logger.warning(f"请求返回 {status}, {delay:.2f}s 后重试: {endpoint}")
+        if status == RATE_LIMITED_STATUS:
+            self.throttled += 1
+            if self._penalize(endpoint, model, delay):
+                # 等待已计入令牌桶, 下次预约时统一等待
+                return 0.0
+        return delay
+
+    def stats(self) -> Dict[str, int]:
+        """获取重试统计"""
+        return {'retries': self.retries, 'throttled': self.throttled}
@@ -1,7 +1,10 @@
-import requests
 import base64
-from typing import Dict, Any, List, Optional
-from api.base_client import BaseTTSClient
+from typing import Dict, Any, List, Optional, Iterator, Callable
+from api.base_client import BaseTTSClient, DEFAULT_CHUNK_SIZE
+from api.http_pool import PooledSession
+from api.request_scheduler import RequestScheduler, RetryPolicy
+from api.upload_body import Base64JsonUploadBody
+from models.quality_profile import resolve_sample_rate
 
 class SiliconFlowClient(BaseTTSClient):
     """硅基流动 API 客户端"""
@@ -58,30 +61,82 @@ class SiliconFlowClient(BaseTTSClient):
         ]
     }
     
-    def __init__(self, api_key: str, api_url: Optional[str] = None):
+    def __init__(self, api_key: str, api_url: Optional[str] = None,
+                 pool_size: int = 10, keepalive_timeout: float = 60.0,
+                 rate_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_retries: int = 3, retry_rate_limited: bool = True):
         super().__init__(api_key, api_url or "https://api.siliconflow.cn/v1")
         self.headers = {"Authorization": f"Bearer {api_key}"}
+        # 所有请求共享一个连接池, 避免每次请求重新握手
+        self.http = PooledSession(
+            pool_size=pool_size,
+            keepalive_timeout=keepalive_timeout,
+            headers=self.headers
+        )
+        # 按接口/模型限流, 429 和 5xx 退避重试
+        self.scheduler = RequestScheduler(rate_limits, RetryPolicy(
+            max_retries=max_retries, retry_rate_limited=retry_rate_limited
+        ))
+        
+    def _send(self, method: str, endpoint: str, *, idempotent: bool,
+              chars: int = 0, model: Optional[str] = None, **kwargs):
+        """经调度器发送请求
+        Args:
+            method: HTTP方法
+            endpoint: 接口路径 (相对 base_url)
+            idempotent: 请求是否可安全重试
+            chars: 消耗的字符数 (用于字符限额)
+            model: 模型ID (用于按模型限额)
+        """
+        url = f"{self.base_url}{endpoint}"
+        return self.scheduler.execute(
+            endpoint,
+            lambda: self.http.request(method, url, **kwargs),
+            idempotent=idempotent,
+            chars=chars,
+            model=model
+        )
+        
+    def warmup(self) -> None:
+        """预热连接池"""
+        self.http.warmup(self.base_url)
+        
+    def connection_stats(self) -> Dict[str, int]:
+        """获取连接复用及重试统计"""
+        return {**self.http.stats(), **self.scheduler.stats()}
+        
+    def close(self) -> None:
+        """关闭连接池"""
+        self.http.close()
+        
+    def _build_speech_payload(self, text: str, **kwargs) -> Dict[str, Any]:
+        """构造文本转语音请求参数"""
+        model = kwargs.get('model') or self.DEFAULT_MODEL
+        response_format = kwargs.get('response_format') or "mp3"
+        return {
+            "model": model,
+            "input": text,
+            "voice": kwargs.get('voice_id') or self.DEFAULT_VOICES[model][0],
+            "response_format": response_format,
+            "sample_rate": resolve_sample_rate(response_format, kwargs.get('sample_rate')),
+            "stream": True,
+            "speed": float(kwargs.get('speed', 1.0)),
+            "gain": float(kwargs.get('gain', 0.0))
+        }
         
     def create_speech(self, text: str, **kwargs) -> bytes:
         """实现文本转语音"""
         try:
-            url = f"{self.base_url}/audio/speech"
             self.logger.info(f"开始文本转语音请求: {text[:50]}...")
             
-            headers = {**self.headers, "Content-Type": "application/json"}
+            headers = {"Content-Type": "application/json"}
+            data = self._build_speech_payload(text, **kwargs)
             
-            data = {
-                "model": kwargs.get('model', self.DEFAULT_MODEL),
-                "input": text,
-                "voice": kwargs.get('voice_id') or self.DEFAULT_VOICES[kwargs.get('model', self.DEFAULT_MODEL)][0],
-                "response_format": kwargs.get('response_format', "mp3"),
-                #"sample_rate": int(kwargs.get('sample_rate', 32000)),
-                "stream": True,
-                "speed": float(kwargs.get('speed', 1.0)),
-                "gain": float(kwargs.get('gain', 0.0))
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
+            response = self._send(
+                'POST', '/audio/speech',
+                idempotent=True, chars=len(text), model=data['model'],
+                headers=headers, json=data
+            )
             response.raise_for_status()
             
             return response.content
@@ -90,13 +145,36 @@ class SiliconFlowClient(BaseTTSClient):
             self.logger.error("API请求失败", exc_info=True)
             raise
             
+    def create_speech_stream(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             **kwargs) -> Iterator[bytes]:
+        """流式文本转语音, 按到达顺序逐块返回音频数据"""
+        self.logger.info(f"开始流式文本转语音请求: {text[:50]}...")
+        
+        headers = {"Content-Type": "application/json"}
+        data = self._build_speech_payload(text, **kwargs)
+        
+        try:
+            response = self._send(
+                'POST', '/audio/speech',
+                idempotent=True, chars=len(text), model=data['model'],
+                headers=headers, json=data, stream=True
+            )
+            response.raise_for_status()
+        except Exception as e:
+            self.logger.error("API请求失败", exc_info=True)
+            raise
+            
+        with response:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+            
     def get_voice_list(self) -> Dict[str, List[Dict[str, Any]]]:
         """获取可用音色列表"""
         try:
-            url = f"{self.base_url}/audio/voice/list"
             self.logger.info("获取音色列表...")
             
-            response = requests.get(url, headers=self.headers)
+            response = self._send('GET', '/audio/voice/list', idempotent=True)
             response.raise_for_status()
             
             result = response.json()
@@ -110,12 +188,12 @@ class SiliconFlowClient(BaseTTSClient):
     def delete_voice(self, voice_id: str) -> Dict[str, Any]:
         """删除指定音色"""
         try:
-            url = f"{self.base_url}/audio/voice/deletions"
             self.logger.info(f"删除音色: {voice_id}")
             
-            response = requests.post(
-                url,
-                headers=self.headers,
+            response = self._send(
+                'POST',
+                '/audio/voice/deletions',
+                idempotent=False,
                 json={"uri": voice_id}
             )
             response.raise_for_status()
@@ -142,9 +220,6 @@ class SiliconFlowClient(BaseTTSClient):
             if model not in self.AVAILABLE_MODELS:
                 raise ValueError(f"模型 {model} 不存在")
             
-            # 根据文档修正URL
-            url = f"{self.base_url}/uploads/audio/voice"
-            
             # 将音频数据转换为base64
             audio_base64 = base64.b64encode(audio_data).decode('utf-8')
             audio_data_uri = f"data:audio/mpeg;base64,{audio_base64}"
@@ -163,12 +238,14 @@ class SiliconFlowClient(BaseTTSClient):
             
             # 发送请求
             headers = {
-                **self.headers,
                 'Content-Type': 'application/json'
             }
             
-            response = requests.post(
-                url, 
+            # 上传不是幂等请求, 只在 429 时重试
+            response = self._send(
+                'POST',
+                '/uploads/audio/voice',
+                idempotent=False,
                 headers=headers,
                 json=data  # 使用 json 参数发送 JSON 数据
             )
@@ -187,6 +264,53 @@ class SiliconFlowClient(BaseTTSClient):
             self.logger.error("上传音色失败", exc_info=True)
             raise
             
+    def upload_voice_file(self, file_path: str, model: str, custom_name: str, text: str,
+                          progress_callback: Optional[Callable[[int, int], None]] = None
+                          ) -> Dict[str, Any]:
+        """从文件流式上传自定义音色, 内存占用与文件大小无关
+        Args:
+            file_path: 音频文件路径
+            model: 模型ID
+            custom_name: 音色名称
+            text: 音频对应的文本内容
+            progress_callback: 进度回调, 参数为 (已发送字节数, 文件大小)
+        """
+        try:
+            # 检查模型是否存在
+            if model not in self.AVAILABLE_MODELS:
+                raise ValueError(f"模型 {model} 不存在")
+                
+            body = Base64JsonUploadBody(
+                file_path,
+                {'model': model, 'customName': custom_name, 'text': text},
+                progress_callback=progress_callback
+            )
+            self.logger.debug(f"上传音色请求参数: model={model}, customName={custom_name}, text={text}")
+            self.logger.debug(f"音频文件大小: {body.file_size} bytes, 请求体大小: {len(body)} bytes")
+            
+            # 上传不是幂等请求, 只在 429 时重试 (请求体可重复迭代)
+            response = self._send(
+                'POST',
+                '/uploads/audio/voice',
+                idempotent=False,
+                headers={'Content-Type': 'application/json'},
+                data=body
+            )
+            
+            # 如果是 400 错误，记录响应内容
+            if response.status_code == 400:
+                self.logger.error(f"服务器返回错误: {response.text}")
+                
+            response.raise_for_status()
+            
+            result = response.json()
+            self.logger.debug(f"上传音色结果: {result}")
+            return result
+            
+        except Exception as e:
+            self.logger.error("上传音色失败", exc_info=True)
+            raise
+            
     def get_available_models(self) -> Dict[str, str]:
         """获取可用模型列表"""
         return self.AVAILABLE_MODELS
@@ -0,0 +1,152 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Optional, Dict, Any, List, Iterator, Awaitable
+from api.base_client import BaseTTSClient, DEFAULT_CHUNK_SIZE
+from api.async_base_client import AsyncBaseTTSClient
+from api.async_silicon_flow_client import AsyncSiliconFlowClient
+
+class AsyncClientFacade(BaseTTSClient):
+    """异步客户端的同步外观
+
+    在后台线程中运行一个事件循环, 同步调用通过 run_coroutine_threadsafe
+    提交到该循环执行, 因此 TTSService 等同步代码可以直接使用异步客户端。
+    关闭后新的调用立即报错, 进行中的调用被取消, 不会一直等待已停止的循环。
+    """
+    
+    def __init__(self, async_client: AsyncBaseTTSClient):
+        super().__init__(async_client.api_key, async_client.base_url)
+        self.async_client = async_client
+        self.loop = asyncio.new_event_loop()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever,
+            name='tts-async-loop',
+            daemon=True
+        )
+        self._thread.start()
+        
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """提交协程到事件循环, 返回 concurrent.futures.Future"""
+        with self._close_lock:
+            if self._closed:
+                coro.close()
+                raise RuntimeError("客户端已关闭")
+            return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        
+    def _run(self, coro: Awaitable) -> Any:
+        """同步执行协程并返回结果"""
+        try:
+            return self.submit(coro).result()
+        except concurrent.futures.CancelledError:
+            if self._closed:
+                raise RuntimeError("客户端已关闭") from None
+            raise
+        
+    def create_speech(self, text: str, **kwargs) -> bytes:
+        """文本转语音"""
+        return self._run(self.async_client.create_speech(text, **kwargs))
+        
+    def create_speech_many(self, requests: List[Dict[str, Any]]) -> List[bytes]:
+        """并发执行多个转换请求, 并发数受异步客户端信号量限制
+        Args:
+            requests: 每项为 create_speech 的关键字参数, 必须包含 text
+        """
+        async def gather():
+            return await asyncio.gather(
+                *(self.async_client.create_speech(**request) for request in requests)
+            )
+        return self._run(gather())
+        
+    def create_speech_stream(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             **kwargs) -> Iterator[bytes]:
+        """流式文本转语音, 数据块经队列从事件循环线程传回调用线程"""
+        chunks: queue.Queue = queue.Queue()
+        done = object()
+        
+        async def pump():
+            try:
+                async for chunk in self.async_client.create_speech_stream(
+                    text, chunk_size=chunk_size, **kwargs
+                ):
+                    chunks.put(chunk)
+            except BaseException as e:
+                chunks.put(e)
+                raise
+            finally:
+                chunks.put(done)
+                
+        future = self.submit(pump())
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, asyncio.CancelledError) and self._closed:
+                    raise RuntimeError("客户端已关闭") from None
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+                
+    def get_voice_list(self) -> Dict[str, List[Dict[str, Any]]]:
+        """获取可用音色列表"""
+        return self._run(self.async_client.get_voice_list())
+        
+    def delete_voice(self, voice_id: str) -> Dict[str, Any]:
+        """删除指定音色"""
+        return self._run(self.async_client.delete_voice(voice_id))
+        
+    def upload_voice(self, audio_data: bytes, model: str,
+                     custom_name: str, text: str) -> Dict[str, Any]:
+        """上传自定义音色"""
+        return self._run(self.async_client.upload_voice(
+            audio_data=audio_data,
+            model=model,
+            custom_name=custom_name,
+            text=text
+        ))
+        
+    def get_available_models(self) -> Dict[str, str]:
+        """获取可用模型列表"""
+        return self.async_client.get_available_models()
+        
+    def get_default_voices(self, model: str) -> List[str]:
+        """获取指定模型的默认音色"""
+        return self.async_client.get_default_voices(model)
+        
+    def warmup(self) -> None:
+        """预热连接池"""
+        self._run(self.async_client.warmup())
+        
+    def close(self) -> None:
+        """关闭异步客户端, 取消进行中的调用并停止事件循环"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            
+        async def shutdown():
+            try:
+                await self.async_client.close()
+            finally:
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+        
+class AsyncSiliconFlowFacade(AsyncClientFacade):
+    """硅基流动异步客户端的同步外观"""
+    
+    def __init__(self, api_key: str, api_url: Optional[str] = None, **options):
+        super().__init__(AsyncSiliconFlowClient(api_key, api_url, **options))
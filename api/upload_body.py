@@ -0,0 +1,49 @@
+import base64
+import json
+import os
+from typing import Callable, Dict, Iterator, Optional
+
+# 每次读取的原始字节数, 必须是 3 的倍数, 保证分块编码结果可以直接拼接
+UPLOAD_CHUNK_SIZE = 3 * 64 * 1024
+
+
+class Base64JsonUploadBody:
+    """流式生成上传音色的 JSON 请求体
+
+    音频文件按块读取并增量 base64 编码, 直接写入请求体, 内存占用与文件
+    大小无关。实现了 __len__, requests 会据此设置 Content-Length 而不是
+    使用分块传输; 每次迭代都会重新打开文件, 因此请求可以重试。
+    """
+    def __init__(self, file_path: str, fields: Dict[str, str], mime_type: str = 'audio/mpeg',
+                 chunk_size: int = UPLOAD_CHUNK_SIZE,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        if chunk_size % 3:
+            raise ValueError(f"分块大小必须是3的倍数: {chunk_size}")
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.file_size = os.path.getsize(file_path)
+
+        # audio 字段放在最后, 前后缀之间是 base64 数据
+        header = json.dumps(fields, ensure_ascii=False)[:-1]
+        separator = ', ' if fields else ''
+        self.prefix = f'{header}{separator}"audio": "data:{mime_type};base64,'.encode('utf-8')
+        self.suffix = b'"}'
+
+    def __len__(self) -> int:
+        encoded_size = 4 * ((self.file_size + 2) // 3)
+        return len(self.prefix) + encoded_size + len(self.suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        sent = 0
+        yield self.prefix
+        with open(self.file_path, 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+                sent += len(chunk)
+                if self.progress_callback:
+                    self.progress_callback(sent, self.file_size)
+        yield self.suffix
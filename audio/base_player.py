@@ -1,12 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Callable
+from typing import Optional, Callable, Tuple, Union, BinaryIO
 from utils.logger import get_child_logger
 
+# 可播放的音频来源: 文件路径、内存中的音频数据或文件对象
+AudioSource = Union[str, bytes, BinaryIO]
+
 class BaseAudioPlayer(ABC):
     """音频播放器抽象基类"""
     def __init__(self):
         self.logger = get_child_logger('audio_player')
-        self.current_audio: Optional[str] = None
+        self.current_audio: Optional[AudioSource] = None
         self.on_playback_complete: Optional[Callable] = None
         
     @abstractmethod
@@ -15,10 +18,24 @@ class BaseAudioPlayer(ABC):
         pass
         
     @abstractmethod
-    def play(self, audio_file: str, on_complete: Optional[Callable] = None) -> None:
-        """播放音频文件"""
+    def play(self, audio: AudioSource, on_complete: Optional[Callable] = None,
+             format_hint: Optional[str] = None) -> None:
+        """播放音频
+        Args:
+            audio: 文件路径、音频数据或文件对象
+            on_complete: 播放完成回调
+            format_hint: 音频格式 (如 mp3), 从内存播放时用于选择解码器
+        """
         pass
         
+    def queue(self, audio: AudioSource, on_complete: Optional[Callable] = None,
+              format_hint: Optional[str] = None, duration: Optional[float] = None) -> None:
+        """排队播放, 当前音频结束后播放; 默认实现直接播放
+
+        duration 为调用方已知的音频时长 (秒), 提供时播放器不必为此读取音频。
+        """
+        self.play(audio, on_complete, format_hint)
+        
     @abstractmethod
     def stop(self) -> None:
         """停止播放"""
@@ -34,6 +51,22 @@ class BaseAudioPlayer(ABC):
         """设置音量 (0.0 到 1.0)"""
         pass
         
+    def create_stream(self, response_format: str, sample_rate: Optional[int] = None,
+                      jitter_ms: int = 300, on_underrun: Optional[Callable[[int], None]] = None,
+                      on_complete: Optional[Callable] = None):
+        """创建边下载边播放的流, 返回带 feed/finish/stop 方法的对象
+        Returns:
+            播放器不支持该格式的流式播放时返回 None, 调用方应在下载完成后调用 play
+        """
+        return None
+        
+    def decode(self, audio: bytes, format_hint: Optional[str] = None) -> Optional[Tuple[bytes, int, int]]:
+        """把压缩音频解码为 16 位 PCM
+        Returns:
+            (PCM 数据, 采样率, 声道数), 播放器不支持解码时返回 None
+        """
+        return None
+        
     def cleanup(self) -> None:
         """清理资源"""
         pass 
\ No newline at end of file
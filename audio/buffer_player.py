@@ -0,0 +1,349 @@
+import io
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from audio.base_player import BaseAudioPlayer, AudioSource
+from utils.audio_formats import Mp3FrameSplitter, iter_mp3_frames, parse_wav_header
+
+# 无法从文件头得出时长时按此估算 (pcm 默认 32kHz 16位单声道)
+DEFAULT_PCM_BYTES_PER_SECOND = 32000 * 2
+
+
+@dataclass
+class PlaybackRecord:
+    """一次播放的计时记录, 时间均为 time.monotonic() 值"""
+    source: str
+    format: str
+    size: int
+    duration: float
+    decode_time: float
+    queued_at: float
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    callback_time: float = 0.0
+    stopped: bool = False
+    first_sound: Optional[float] = None
+    underruns: int = 0
+
+    def as_dict(self) -> Dict[str, object]:
+        """转换为字典, 便于输出报告"""
+        return dict(self.__dict__)
+
+
+class BufferAudioPlayer(BaseAudioPlayer):
+    """无需声卡的缓冲播放器
+
+    音频被解析到内存 (mp3 按帧, wav 取出 PCM 数据), 再按时长在后台线程
+    中模拟播放, 完成时调用回调并记录解码耗时、播放时长和回调耗时。用于
+    在没有音频设备的环境中测试和压测播放流程。
+
+    回调在播放器线程中执行, 不经过 Qt 事件循环。
+    """
+    def __init__(self, time_scale: float = 1.0, keep_data: bool = True):
+        """
+        Args:
+            time_scale: 模拟播放时长的倍率, 0 表示立即完成
+            keep_data: 是否保留最近一次解码的数据 (sink)
+        """
+        super().__init__()
+        self.time_scale = time_scale
+        self.keep_data = keep_data
+        self.sink = bytearray()
+        self.records: List[PlaybackRecord] = []
+        self.volume = 1.0
+
+        self._playlist: Deque[Tuple[PlaybackRecord, Optional[Callable]]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.initialize()
+
+    def initialize(self) -> None:
+        """启动模拟播放线程"""
+        self.logger.info(f"初始化缓冲音频播放器, 时长倍率: {self.time_scale}")
+        self._thread = threading.Thread(target=self._run, name='buffer-player', daemon=True)
+        self._thread.start()
+
+    def play(self, audio: AudioSource, on_complete: Optional[Callable] = None,
+             format_hint: Optional[str] = None) -> None:
+        """解码并模拟播放, 停止当前播放"""
+        self.stop()
+        self.queue(audio, on_complete, format_hint)
+
+    def queue(self, audio: AudioSource, on_complete: Optional[Callable] = None,
+              format_hint: Optional[str] = None, duration: Optional[float] = None) -> None:
+        """解码并排队模拟播放 (需要解码全部数据, 不使用 duration)"""
+        try:
+            record = self._decode(audio, format_hint)
+            with self._cond:
+                self.records.append(record)
+                self._playlist.append((record, on_complete))
+                self.current_audio = audio
+                self.on_playback_complete = on_complete
+                self._cond.notify_all()
+        except Exception as e:
+            self.logger.error("缓冲播放失败", exc_info=True)
+            raise
+
+    def _decode(self, audio: AudioSource, format_hint: Optional[str]) -> PlaybackRecord:
+        """读取音频并解析为 PCM 帧或 MP3 帧, 计算时长"""
+        queued_at = time.monotonic()
+        if isinstance(audio, str):
+            if not os.path.exists(audio):
+                raise FileNotFoundError(f"音频文件不存在: {audio}")
+            format_hint = format_hint or os.path.splitext(audio)[1].lstrip('.').lower()
+            with open(audio, 'rb') as f:
+                data = f.read()
+            source = audio
+        elif isinstance(audio, (bytes, bytearray, memoryview)):
+            data = bytes(audio)
+            source = '<内存音频>'
+        else:
+            position = audio.tell()
+            data = audio.read()
+            audio.seek(position)
+            source = '<内存音频>'
+
+        started = time.perf_counter()
+        decoded, duration = decode_audio(data, format_hint)
+        decode_time = time.perf_counter() - started
+        if self.keep_data:
+            self.sink = bytearray(decoded)
+        return PlaybackRecord(source, format_hint or '', len(data), duration, decode_time, queued_at)
+
+    def _run(self) -> None:
+        """模拟播放线程: 按时长依次完成播放列表中的音频"""
+        with self._cond:
+            while not self._closed:
+                if not self._playlist:
+                    self._cond.wait()
+                    continue
+                record, on_complete = self._playlist[0]
+                now = time.monotonic()
+                if record.started_at is None:
+                    record.started_at = now
+                end = record.started_at + record.duration * self.time_scale
+                if now < end:
+                    self._cond.wait(end - now)
+                    continue
+
+                self._playlist.popleft()
+                record.completed_at = end
+                self._cond.notify_all()
+                if self._playlist:
+                    # 下一段从上一段结束时刻开始, 模拟无缝衔接
+                    self._playlist[0][0].started_at = end
+                else:
+                    self.current_audio = None
+                    self.on_playback_complete = None
+                self._cond.release()
+                try:
+                    self._complete(record, on_complete)
+                finally:
+                    self._cond.acquire()
+
+    def _complete(self, record: PlaybackRecord, on_complete: Optional[Callable]) -> None:
+        """调用完成回调并记录耗时"""
+        if not on_complete:
+            return
+        started = time.perf_counter()
+        try:
+            on_complete()
+        except Exception:
+            self.logger.error("播放完成回调失败", exc_info=True)
+        record.callback_time = time.perf_counter() - started
+
+    def create_stream(self, response_format: str, sample_rate: Optional[int] = None,
+                      jitter_ms: int = 300, on_underrun: Optional[Callable[[int], None]] = None,
+                      on_complete: Optional[Callable] = None) -> 'BufferStream':
+        """创建模拟的边下载边播放流"""
+        self.stop()
+        record = PlaybackRecord('<流式音频>', response_format, 0, 0.0, 0.0, time.monotonic())
+        self.records.append(record)
+        return BufferStream(self, record, sample_rate, jitter_ms, on_underrun, on_complete)
+
+    def stop(self) -> None:
+        """停止播放, 未完成的音频不调用回调"""
+        with self._cond:
+            for record, _ in self._playlist:
+                record.stopped = True
+            self._playlist.clear()
+            self.current_audio = None
+            self.on_playback_complete = None
+            self._cond.notify_all()
+
+    def is_playing(self) -> bool:
+        """检查是否正在播放"""
+        with self._cond:
+            return bool(self._playlist)
+
+    def set_volume(self, volume: float) -> None:
+        """设置音量"""
+        self.volume = max(0.0, min(1.0, volume))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待播放列表全部完成, 返回是否在超时前完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._playlist:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """汇总计时统计"""
+        completed = [r for r in self.records if r.completed_at is not None]
+        decode_times = [r.decode_time for r in self.records]
+        return {
+            'played': len(self.records),
+            'completed': len(completed),
+            'stopped': sum(1 for r in self.records if r.stopped),
+            'audio_seconds': sum(r.duration for r in completed),
+            'decode_seconds': sum(decode_times),
+            'max_decode_seconds': max(decode_times, default=0.0),
+            'callback_seconds': sum(r.callback_time for r in self.records),
+            'underruns': sum(r.underruns for r in self.records),
+        }
+
+    def cleanup(self) -> None:
+        """停止模拟播放线程"""
+        self.stop()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class NullAudioPlayer(BufferAudioPlayer):
+    """空播放器: 只解析音频, 立即完成, 不保留数据"""
+    def __init__(self):
+        super().__init__(time_scale=0.0, keep_data=False)
+
+
+class BufferStream:
+    """模拟的边下载边播放流, 按收到数据的时刻推算出声时间和欠载"""
+    def __init__(self, player: BufferAudioPlayer, record: PlaybackRecord,
+                 sample_rate: Optional[int], jitter_ms: int,
+                 on_underrun: Optional[Callable[[int], None]],
+                 on_complete: Optional[Callable]):
+        self.player = player
+        self.record = record
+        self.jitter = jitter_ms / 1000.0
+        self.on_underrun = on_underrun
+        self.on_complete = on_complete
+        self._splitter = Mp3FrameSplitter() if record.format == 'mp3' else None
+        self._header = bytearray() if record.format == 'wav' else None
+        self._bytes_per_second = (sample_rate * 2) if sample_rate else DEFAULT_PCM_BYTES_PER_SECOND
+        self._buffered = 0.0
+        self._clock: Optional[float] = None
+        self._stopped = False
+
+    def feed(self, chunk: bytes) -> None:
+        """收到一块数据, 更新已缓冲时长并检测欠载"""
+        if self._stopped:
+            return
+        now = time.monotonic()
+        self.record.size += len(chunk)
+        self._check_underrun(now)
+        seconds = self._duration_of(chunk)
+        self.record.duration += seconds
+        self._buffered += seconds
+        if self._clock is None and self._buffered >= self.jitter:
+            self._start(now)
+
+    def finish(self) -> None:
+        """数据全部到达, 按剩余缓冲时长模拟播放完成"""
+        if self._stopped:
+            return
+        now = time.monotonic()
+        self._check_underrun(now)
+        if self._clock is None:
+            self._start(now)
+        remaining = self._buffered - (now - self._clock) / self._scale()
+        end = now + max(0.0, remaining) * self.player.time_scale
+        wait = end - time.monotonic()
+        timer = threading.Timer(max(0.0, wait), self._complete, args=(end,))
+        timer.daemon = True
+        timer.start()
+
+    def stop(self) -> None:
+        """停止模拟播放"""
+        self._stopped = True
+        self.record.stopped = True
+
+    def is_playing(self) -> bool:
+        """是否仍在模拟播放"""
+        return not self._stopped and self.record.completed_at is None
+
+    def _scale(self) -> float:
+        """实际时间与音频时间的换算 (倍率为 0 时播放瞬间完成, 不计欠载)"""
+        return self.player.time_scale or float('inf')
+
+    def _start(self, now: float) -> None:
+        """缓冲达到阈值, 开始 (或恢复) 播放"""
+        self._clock = now
+        if self.record.first_sound is None:
+            self.record.first_sound = now - self.record.queued_at
+            self.record.started_at = now
+
+    def _check_underrun(self, now: float) -> None:
+        """播放进度超过已缓冲时长时记为欠载, 之后重新缓冲"""
+        if self._clock is None:
+            return
+        played = (now - self._clock) / self._scale()
+        if played <= self._buffered:
+            self._buffered -= played
+            self._clock = now
+            return
+        self._buffered = 0.0
+        self._clock = None
+        self.record.underruns += 1
+        if self.on_underrun:
+            self.on_underrun(self.record.underruns)
+
+    def _duration_of(self, chunk: bytes) -> float:
+        """计算数据块对应的音频时长"""
+        if self._splitter is not None:
+            return self._splitter.feed(chunk)[1]
+        if self._header is not None:
+            self._header.extend(chunk)
+            info = parse_wav_header(bytes(self._header))
+            if info is None:
+                return 0.0
+            self._bytes_per_second = info.bytes_per_second
+            chunk = bytes(self._header[info.data_offset:])
+            self._header = None
+        return len(chunk) / self._bytes_per_second
+
+    def _complete(self, end: float) -> None:
+        """模拟播放结束"""
+        if self._stopped:
+            return
+        self.record.completed_at = end
+        self.player._complete(self.record, self.on_complete)
+
+
+def decode_audio(data: bytes, format_hint: Optional[str]) -> Tuple[bytes, float]:
+    """把音频解析为可播放的数据和时长
+    Returns:
+        (数据, 时长秒数): wav 返回 PCM 数据, mp3 返回去掉标签后的帧数据
+    """
+    info = parse_wav_header(data)
+    if info is not None:
+        pcm = data[info.data_offset:info.data_offset + info.data_size]
+        return pcm, len(pcm) / info.bytes_per_second if info.bytes_per_second else 0.0
+    if format_hint == 'pcm':
+        return data, len(data) / DEFAULT_PCM_BYTES_PER_SECOND
+    if format_hint in (None, '', 'mp3'):
+        frames = io.BytesIO()
+        duration = 0.0
+        for frame in iter_mp3_frames(data):
+            frames.write(data[frame.offset:frame.offset + frame.length])
+            duration += frame.samples / frame.sample_rate
+        if duration:
+            return frames.getvalue(), duration
+    # 其他格式 (如 opus) 无法在此解码, 按原样保留, 时长未知
+    return data, 0.0
@@ -1,6 +1,6 @@
+import importlib
 from typing import Optional, Type
 from audio.base_player import BaseAudioPlayer
-from audio.pygame_player import PygameAudioPlayer
 from utils.logger import get_child_logger
 
 class AudioPlayerFactory:
@@ -8,27 +8,38 @@ class AudioPlayerFactory:
     _logger = get_child_logger('player_factory')
     _instance: Optional[BaseAudioPlayer] = None
     
+    # 播放器类型 -> (模块, 类名); 按需导入, 无声卡环境不会加载 pygame
+    PLAYER_TYPES = {
+        'pygame': ('audio.pygame_player', 'PygameAudioPlayer'),
+        'buffer': ('audio.buffer_player', 'BufferAudioPlayer'),
+        'null': ('audio.buffer_player', 'NullAudioPlayer'),
+        # 在这里添加其他播放器类型
+    }
+    
+    @classmethod
+    def get_player_class(cls, player_type: str) -> Type[BaseAudioPlayer]:
+        """按类型导入播放器类"""
+        if player_type not in cls.PLAYER_TYPES:
+            cls._logger.error(f"未知的播放器类型: {player_type}")
+            raise ValueError(f"未知的播放器类型: {player_type}")
+        module_name, class_name = cls.PLAYER_TYPES[player_type]
+        return getattr(importlib.import_module(module_name), class_name)
+    
     @classmethod
-    def create_player(cls, player_type: str = 'pygame') -> BaseAudioPlayer:
-        """创建音频播放器实例"""
+    def create_player(cls, player_type: str = 'pygame', **options) -> BaseAudioPlayer:
+        """创建音频播放器实例
+        Args:
+            player_type: 播放器类型 (pygame, buffer, null)
+            options: 传给播放器构造函数的参数
+        """
         if cls._instance is None:
             cls._logger.info(f"创建音频播放器: {player_type}")
-            
-            player_types = {
-                'pygame': PygameAudioPlayer
-                # 在这里添加其他播放器类型
-            }
-            
-            player_class = player_types.get(player_type)
-            if not player_class:
-                cls._logger.error(f"未知的播放器类型: {player_type}")
-                raise ValueError(f"未知的播放器类型: {player_type}")
-                
-            cls._instance = player_class()
+            player_class = cls.get_player_class(player_type)
+            cls._instance = player_class(**options)
             
         return cls._instance
         
     @classmethod
     def get_player(cls) -> Optional[BaseAudioPlayer]:
         """获取当前播放器实例"""
-        return cls._instance 
\ No newline at end of file
+        return cls._instance 
@@ -0,0 +1,297 @@
+import io
+import threading
+import time
+import wave
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import pygame
+from utils.audio_stitcher import AudioStitcher
+from utils.audio_formats import Mp3FrameSplitter, iter_mp3_frames, mp3_duration, parse_wav_header
+from utils.logger import get_child_logger
+
+# 支持边下载边播放的格式; opus 等容器格式需完整下载后播放
+PROGRESSIVE_FORMATS = ('mp3', 'wav', 'pcm')
+# 每个解码片段的最短时长 (秒), 片段过短会增加解码开销和衔接次数
+MIN_SEGMENT_SECONDS = 0.25
+# 预计片段结束时声道仍在播放时的补充等待时间 (秒)
+END_GRACE = 0.005
+# MP3 位储备最多引用前面 511 字节的数据
+MP3_RESERVOIR_BYTES = 511
+# mp3 片段末尾暂不输出的时长 (秒), 留给下一片段解码, 覆盖解码和重采样的尾部延迟
+MP3_HOLDBACK_SECONDS = 0.05
+
+
+class ProgressivePlayer:
+    """边下载边播放的流式播放器
+
+    网络线程调用 feed 输入数据块, 数据按帧 (mp3) 或采样 (wav/pcm) 对齐
+    后解码为 pygame Sound 片段; 播放线程把片段依次排入专用声道。缓冲
+    时长达到 jitter_ms 后才开始播放, 播放中缓冲耗尽记为一次欠载, 之后
+    重新缓冲到 jitter_ms 再继续。
+
+    mp3 片段各自解码: 每次解码前面带上已播放的几帧 (覆盖位储备和 MDCT
+    重叠), 末尾的几帧暂不输出, 留到下一片段一起解码; 按帧时长裁剪输出,
+    片段衔接处没有咔嗒声或间隙。
+    播放线程只在新片段到达或当前片段预计播完时唤醒, 不轮询声道。
+    """
+    def __init__(self, channel: 'pygame.mixer.Channel', response_format: str,
+                 sample_rate: Optional[int] = None, jitter_ms: int = 300,
+                 on_underrun: Optional[Callable[[int], None]] = None,
+                 on_complete: Optional[Callable[[], None]] = None):
+        if response_format not in PROGRESSIVE_FORMATS:
+            raise ValueError(f"不支持边下载边播放的格式: {response_format}")
+        self.logger = get_child_logger('progressive_player')
+        self.channel = channel
+        self.response_format = response_format
+        self.jitter = jitter_ms / 1000.0
+        self.on_underrun = on_underrun
+        self.on_complete = on_complete
+
+        # pcm 为 16 位单声道; wav 的参数从文件头读取
+        self._channels = 1
+        self._sample_width = 2
+        self._sample_rate = sample_rate or 32000
+        self._header = bytearray() if response_format == 'wav' else None
+        self._splitter = Mp3FrameSplitter() if response_format == 'mp3' else None
+        # 上一次解码末尾的帧: 前 _carry_played 字节已播放 (作为前导), 其余尚未输出
+        self._carry = b''
+        self._carry_played = 0
+        self._pending = bytearray()
+        self._pending_seconds = 0.0
+
+        self._segments: Deque['pygame.mixer.Sound'] = deque()
+        self._buffered = 0.0
+        self._cond = threading.Condition()
+        self._finished = False
+        self._stopped = False
+
+        self.created_at = time.monotonic()
+        self.first_sound: Optional[float] = None
+        self.underruns = 0
+        self._thread = threading.Thread(target=self._play_loop, name='progressive-player',
+                                        daemon=True)
+        self._thread.start()
+
+    def feed(self, chunk: bytes) -> None:
+        """输入一块网络数据 (可在任意线程调用)"""
+        if self._stopped:
+            return
+        if self._splitter is not None:
+            frames, seconds = self._splitter.feed(chunk)
+            self._append(frames, seconds)
+        else:
+            self._feed_pcm(chunk)
+        if self._pending_seconds >= MIN_SEGMENT_SECONDS:
+            self._flush_pending()
+
+    def finish(self) -> None:
+        """数据已全部到达, 播放完剩余缓冲后结束"""
+        self._flush_pending(final=True)
+        with self._cond:
+            self._finished = True
+            self._cond.notify()
+
+    def stop(self) -> None:
+        """立即停止播放并丢弃缓冲"""
+        with self._cond:
+            self._stopped = True
+            self._segments.clear()
+            self._cond.notify()
+        self.channel.stop()
+
+    def is_playing(self) -> bool:
+        """是否仍在缓冲或播放"""
+        return self._thread.is_alive()
+
+    def set_volume(self, volume: float) -> None:
+        """设置音量"""
+        self.channel.set_volume(volume)
+
+    def stats(self) -> Dict[str, float]:
+        """获取首次出声耗时、欠载次数和当前缓冲时长"""
+        return {
+            'first_sound': self.first_sound,
+            'underruns': self.underruns,
+            'buffered': self._buffered,
+        }
+
+    def _feed_pcm(self, chunk: bytes) -> None:
+        """wav 先解析文件头, 之后与 pcm 一样按整帧采样切分"""
+        if self._header is not None:
+            self._header.extend(chunk)
+            info = parse_wav_header(bytes(self._header))
+            if info is None:
+                return
+            self._channels = info.channels
+            self._sample_width = info.sample_width
+            self._sample_rate = info.sample_rate
+            chunk = bytes(self._header[info.data_offset:])
+            self._header = None
+        frame_size = self._channels * self._sample_width
+        self._pending.extend(chunk)
+        self._pending_seconds = len(self._pending) // frame_size / self._sample_rate
+
+    def _append(self, data: bytes, seconds: float) -> None:
+        """累积已对齐的压缩数据"""
+        self._pending.extend(data)
+        self._pending_seconds += seconds
+
+    def _flush_pending(self, final: bool = False) -> None:
+        """把累积的数据解码为一个播放片段
+        Args:
+            final: 数据已全部到达, mp3 不再保留末尾的帧
+        """
+        mp3 = self._splitter is not None
+        if mp3:
+            data = bytes(self._pending)
+            self._pending.clear()
+        else:
+            frame_size = self._channels * self._sample_width
+            usable = len(self._pending) - len(self._pending) % frame_size
+            data = self._to_wav(bytes(self._pending[:usable]))
+            del self._pending[:usable]
+            if not usable:
+                data = b''
+        self._pending_seconds = 0.0
+        # mp3 结束时还需输出上次保留的帧
+        if not data and not (mp3 and final and self._carry):
+            return
+
+        try:
+            if mp3:
+                sound = self._decode_mp3(data, final)
+            else:
+                sound = pygame.mixer.Sound(file=io.BytesIO(data))
+        except Exception:
+            self.logger.warning("音频片段解码失败, 已跳过", exc_info=True)
+            return
+        if sound is None:
+            return
+        with self._cond:
+            self._segments.append(sound)
+            self._buffered += sound.get_length()
+            self._cond.notify()
+
+    def _decode_mp3(self, data: bytes, final: bool) -> Optional['pygame.mixer.Sound']:
+        """连同上次保留的帧一起解码, 返回尚未输出的部分 (数据不足时返回 None)
+
+        只解码音频帧: ID3 标签和 Xing/Info 信息帧会让解码器按编码延迟裁剪
+        首尾, 各次解码的采样位置因此对不上。输出按帧时长裁剪: 去掉前导帧,
+        非最后一段时去掉末尾保留的帧; 每次解码的起点都是帧边界, 裁剪后的
+        片段首尾相接。
+        """
+        stream = self._carry + b''.join(
+            data[frame.offset:frame.offset + frame.length] for frame in iter_mp3_frames(data)
+            if not AudioStitcher._is_vbr_header(data, frame.offset, frame.length))
+        frames = list(iter_mp3_frames(stream))
+        played = self._carry_played
+        end = len(stream)
+        if not final:
+            held = 0.0
+            for frame in reversed(frames):
+                if held >= MP3_HOLDBACK_SECONDS:
+                    break
+                held += frame.samples / frame.sample_rate
+                end = frame.offset
+        if end <= played:
+            self._carry = stream
+            return None
+
+        frequency, size, channels = pygame.mixer.get_init()
+        frame_bytes = abs(size) // 8 * channels
+        raw = self._decode(stream)
+        skip = round(mp3_duration(stream[:played]) * frequency) * frame_bytes
+        if final:
+            output = raw[skip:]
+        else:
+            output = raw[skip:skip + round(mp3_duration(stream[played:end]) * frequency) * frame_bytes]
+
+        # 下一次解码的前导: end 之前的一帧, 及其位储备可能引用的前几帧
+        before = [frame.offset for frame in frames if frame.offset < end]
+        start = before[-1] if before else end
+        for offset in reversed(before[:-1]):
+            if before[-1] - start >= MP3_RESERVOIR_BYTES:
+                break
+            start = offset
+        self._carry = stream[start:]
+        self._carry_played = end - start
+        return pygame.mixer.Sound(buffer=output) if output else None
+
+    @staticmethod
+    def _decode(data: bytes) -> bytes:
+        """解码为混音器格式的原始采样"""
+        return pygame.mixer.Sound(file=io.BytesIO(data)).get_raw()
+
+    def _to_wav(self, pcm: bytes) -> bytes:
+        """为 PCM 片段加上 WAV 头, 交由混音器转换采样率和声道"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(self._channels)
+            wav.setsampwidth(self._sample_width)
+            wav.setframerate(self._sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def _next_segment(self) -> Optional['pygame.mixer.Sound']:
+        """取出下一个片段 (调用方持有锁)"""
+        if not self._segments:
+            return None
+        sound = self._segments.popleft()
+        self._buffered = max(0.0, self._buffered - sound.get_length())
+        return sound
+
+    def _play_loop(self) -> None:
+        """播放线程: 缓冲达到阈值后开始播放, 保持声道队列非空
+
+        只在 feed/finish/stop 通知或当前片段预计播完时唤醒。
+        """
+        playing = False
+        # 当前片段的预计结束时刻, 以及排在声道队列中的片段时长
+        current_end = 0.0
+        queued: Optional[float] = None
+        try:
+            while True:
+                with self._cond:
+                    if self._stopped:
+                        return
+                    timeout = None
+                    if not playing:
+                        ready = self._buffered >= self.jitter or (self._finished and self._segments)
+                        if ready:
+                            sound = self._next_segment()
+                            self.channel.play(sound)
+                            current_end = time.monotonic() + sound.get_length()
+                            queued = None
+                            playing = True
+                            if self.first_sound is None:
+                                self.first_sound = time.monotonic() - self.created_at
+                                self.logger.debug(f"首次出声耗时: {self.first_sound:.3f}s")
+                        elif self._finished:
+                            break
+                    if playing:
+                        if queued is not None and self.channel.get_queue() is None:
+                            # 排队的片段已开始播放
+                            current_end += queued
+                            queued = None
+                        if queued is None and self._segments:
+                            sound = self._next_segment()
+                            self.channel.queue(sound)
+                            queued = sound.get_length()
+                        if queued is None and not self._segments and not self.channel.get_busy():
+                            if self._finished:
+                                break
+                            playing = False
+                            self.underruns += 1
+                            self.logger.warning(f"播放缓冲欠载, 累计 {self.underruns} 次")
+                            if self.on_underrun:
+                                self.on_underrun(self.underruns)
+                        else:
+                            timeout = max(END_GRACE, current_end - time.monotonic())
+                    self._cond.wait(timeout)
+        except Exception:
+            self.logger.error("流式播放失败", exc_info=True)
+            return
+
+        self.logger.debug(f"流式播放结束, 欠载 {self.underruns} 次")
+        if self.on_complete:
+            self.on_complete()
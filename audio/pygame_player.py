@@ -1,84 +1,280 @@
 import pygame
+import io
 import os
-from typing import Optional, Callable
-from PyQt6.QtCore import QTimer
-from audio.base_player import BaseAudioPlayer
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Callable, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal
+from audio.base_player import BaseAudioPlayer, AudioSource
+from audio.progressive_player import PROGRESSIVE_FORMATS, ProgressivePlayer
+from utils.audio_formats import audio_duration
+
+# 预计结束时仍在播放时的补充等待时间 (秒)
+END_GRACE = 0.02
+# 无法预知时长的格式 (如 opus) 检查播放状态的间隔 (秒)
+UNKNOWN_DURATION_CHECK = 0.2
+# 等待流式播放结束后再开始排队音频时的检查间隔 (秒)
+STREAM_END_CHECK = 0.05
+
+
+class _PlaybackSignals(QObject):
+    """播放完成信号 (从监视线程投递回GUI线程)"""
+    completed = pyqtSignal(object)
+
+
+@dataclass
+class _PlaylistItem:
+    """播放列表项"""
+    audio: AudioSource
+    format_hint: str
+    on_complete: Optional[Callable]
+    duration: Optional[float]
+    started: Optional[float] = None
+    loaded: bool = False
+
 
 class PygameAudioPlayer(BaseAudioPlayer):
-    """基于 Pygame 的音频播放器实现"""
+    """基于 Pygame 的音频播放器实现
+    
+    播放结束时间根据音频时长 (mp3 帧头或 wav 文件头) 预先计算, 由监视线程
+    在结束时刻唤醒一次并通过信号通知GUI线程, 不再定时轮询。排队的音频会
+    提前交给混音器 (pygame.mixer.music.queue), 前后两段之间没有间隙。
+    """
     def __init__(self):
         super().__init__()
         self.logger.info("初始化 Pygame 音频播放器...")
-        self.check_timer = None
+        self.stream: Optional[ProgressivePlayer] = None
+        self._playlist: Deque[_PlaylistItem] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._signals = _PlaybackSignals()
+        self._signals.completed.connect(self._on_completed)
         self.initialize()
+        self._watcher = threading.Thread(target=self._watch, name='playback-watcher', daemon=True)
+        self._watcher.start()
         
     def initialize(self) -> None:
         """初始化 Pygame 混音器"""
         try:
             pygame.mixer.init()
+            # 保留 0 号声道给流式播放, 避免被其他音效占用
+            pygame.mixer.set_reserved(1)
             self.logger.debug("Pygame 混音器初始化成功")
         except Exception as e:
             self.logger.error("Pygame 混音器初始化失败", exc_info=True)
             raise
-            
-    def play(self, audio_file: str, on_complete: Optional[Callable] = None) -> None:
-        """播放音频文件"""
+        
+    def play(self, audio: AudioSource, on_complete: Optional[Callable] = None,
+             format_hint: Optional[str] = None) -> None:
+        """播放音频 (文件路径或内存数据), 停止当前播放和排队的音频"""
+        try:
+            item = self._make_item(audio, on_complete, format_hint)
+            self.stop()
+            with self._cond:
+                self._start(item)
+                self._playlist.append(item)
+                self._cond.notify()
+        except Exception as e:
+            self.logger.error(f"播放失败: {self._describe(audio)}", exc_info=True)
+            raise
+        
+    def queue(self, audio: AudioSource, on_complete: Optional[Callable] = None,
+              format_hint: Optional[str] = None, duration: Optional[float] = None) -> None:
+        """排队播放, 当前音频结束后无缝衔接 (已知 duration 时不读取文件)
+
+        正在边下载边播放时不打断, 流式播放结束后再开始。
+        """
         try:
-            if not os.path.exists(audio_file):
-                raise FileNotFoundError(f"音频文件不存在: {audio_file}")
-                
-            if self.is_playing():
-                self.stop()
-                
-            self.current_audio = audio_file
-            self.on_playback_complete = on_complete
-            
-            pygame.mixer.music.load(audio_file)
-            pygame.mixer.music.play()
-            self.logger.debug(f"开始播放: {audio_file}")
-            
-            # 创建定时器检查播放状态
-            if self.check_timer is None:
-                self.check_timer = QTimer()
-                self.check_timer.timeout.connect(self._check_playback_status)
-            self.check_timer.start(100)  # 每100毫秒检查一次
-            
+            item = self._make_item(audio, on_complete, format_hint, duration)
+            with self._cond:
+                if not self._playlist and not self._stream_playing():
+                    self._start(item)
+                self._playlist.append(item)
+                self._cond.notify()
+            self.logger.debug(f"加入播放队列: {self._describe(audio)}")
         except Exception as e:
-            self.logger.error(f"播放失败: {audio_file}", exc_info=True)
+            self.logger.error(f"加入播放队列失败: {self._describe(audio)}", exc_info=True)
             raise
-            
+        
+    def _make_item(self, audio: AudioSource, on_complete: Optional[Callable],
+                   format_hint: Optional[str], duration: Optional[float] = None) -> _PlaylistItem:
+        """读取音频时长并生成播放列表项"""
+        if isinstance(audio, str):
+            if not os.path.exists(audio):
+                raise FileNotFoundError(f"音频文件不存在: {audio}")
+            format_hint = format_hint or os.path.splitext(audio)[1].lstrip('.').lower()
+            # 时长已知, 或格式无法从文件头计算时长 (opus/pcm) 时不读取文件
+            if duration is not None or format_hint not in ('', 'mp3', 'wav'):
+                return _PlaylistItem(audio, format_hint, on_complete, duration)
+            with open(audio, 'rb') as f:
+                data = f.read()
+        elif isinstance(audio, (bytes, bytearray, memoryview)):
+            # 内存数据包装为文件对象, 播放期间需保持引用
+            data = bytes(audio)
+            audio = io.BytesIO(data)
+        else:
+            position = audio.tell()
+            data = audio.read()
+            audio.seek(position)
+        return _PlaylistItem(audio, format_hint or '', on_complete,
+                             audio_duration(data, format_hint))
+        
+    def _load(self, item: _PlaylistItem, queued: bool = False) -> None:
+        """把音频交给混音器 (调用方持有锁)"""
+        load = pygame.mixer.music.queue if queued else pygame.mixer.music.load
+        if isinstance(item.audio, str):
+            load(item.audio)
+        else:
+            load(item.audio, item.format_hint)
+        item.loaded = True
+        
+    def _start(self, item: _PlaylistItem) -> None:
+        """立即开始播放 (调用方持有锁)"""
+        self._load(item)
+        pygame.mixer.music.play()
+        item.started = time.monotonic()
+        self.current_audio = item.audio
+        self.on_playback_complete = item.on_complete
+        self.logger.debug(f"开始播放: {self._describe(item.audio)}")
+        
+    def _watch(self) -> None:
+        """监视线程: 在预计结束时刻唤醒, 通知完成并衔接下一段"""
+        with self._cond:
+            while not self._closed:
+                if not self._playlist:
+                    self._cond.wait()
+                    continue
+                try:
+                    timeout = self._advance()
+                except Exception:
+                    self.logger.error("播放队列处理失败", exc_info=True)
+                    self._playlist.clear()
+                    continue
+                if timeout:
+                    self._cond.wait(timeout)
+        
+    def _advance(self) -> Optional[float]:
+        """处理当前播放项, 返回下次需要唤醒的等待时间 (调用方持有锁)"""
+        current = self._playlist[0]
+        if current.started is None:
+            # 排队时流式播放尚未结束
+            if self._stream_playing():
+                return STREAM_END_CHECK
+            self._start(current)
+            return None
+        following = self._playlist[1] if len(self._playlist) > 1 else None
+        
+        # 时长已知时提前排队下一段, 由混音器无缝衔接
+        if following and not following.loaded and current.duration is not None:
+            self._load(following, queued=True)
+        
+        now = time.monotonic()
+        if current.duration is not None:
+            end = current.started + current.duration
+            if now < end:
+                return end - now
+            if not (following and following.loaded) and pygame.mixer.music.get_busy():
+                return END_GRACE
+        elif pygame.mixer.music.get_busy():
+            return UNKNOWN_DURATION_CHECK
+        else:
+            end = now
+        
+        self._playlist.popleft()
+        self._signals.completed.emit(current.on_complete)
+        if following is None:
+            self.current_audio = None
+            self.on_playback_complete = None
+        elif following.loaded:
+            following.started = end
+            self.current_audio = following.audio
+            self.on_playback_complete = following.on_complete
+        else:
+            self._start(following)
+        return None
+        
+    def _on_completed(self, callback: Optional[Callable]):
+        """播放完成 (GUI线程)"""
+        if callback:
+            callback()
+        
+    def create_stream(self, response_format: str, sample_rate: Optional[int] = None,
+                      jitter_ms: int = 300, on_underrun: Optional[Callable[[int], None]] = None,
+                      on_complete: Optional[Callable] = None) -> Optional[ProgressivePlayer]:
+        """创建边下载边播放的流 (可在工作线程中调用)"""
+        if response_format not in PROGRESSIVE_FORMATS:
+            return None
+        self._stop_music()
+        self._stop_stream()
+        self.stream = ProgressivePlayer(pygame.mixer.Channel(0), response_format, sample_rate,
+                                        jitter_ms, on_underrun, on_complete)
+        self.logger.debug(f"开始流式播放: {response_format}")
+        return self.stream
+        
+    def decode(self, audio: bytes, format_hint: Optional[str] = None) -> Optional[Tuple[bytes, int, int]]:
+        """用混音器解码为 PCM, 输出为混音器的采样率和声道数"""
+        frequency, size, channels = pygame.mixer.get_init()
+        if abs(size) != 16:
+            return None
+        sound = pygame.mixer.Sound(file=io.BytesIO(audio))
+        return sound.get_raw(), frequency, channels
+        
+    def _stream_playing(self) -> bool:
+        """流式播放是否仍在缓冲或播放"""
+        stream = self.stream
+        return stream is not None and stream.is_playing()
+        
+    def _stop_stream(self) -> None:
+        """停止当前的流式播放"""
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            stream.stop()
+        
+    def _stop_music(self) -> None:
+        """停止音乐播放并清空播放队列, 不触发完成回调"""
+        with self._cond:
+            if self._playlist:
+                self._playlist.clear()
+                pygame.mixer.music.stop()
+                pygame.mixer.music.unload()
+                self.logger.debug("停止播放")
+            self.current_audio = None
+            self.on_playback_complete = None
+            self._cond.notify()
+    
+    @staticmethod
+    def _describe(audio: AudioSource) -> str:
+        """音频来源的日志描述"""
+        return audio if isinstance(audio, str) else '<内存音频>'
+        
     def stop(self) -> None:
         """停止播放"""
-        if self.is_playing():
-            pygame.mixer.music.stop()
-            self.logger.debug("停止播放")
-        self.current_audio = None
-        if self.check_timer:
-            self.check_timer.stop()
-            
+        self._stop_music()
+        self._stop_stream()
+        
     def is_playing(self) -> bool:
         """检查是否正在播放"""
-        return pygame.mixer.music.get_busy()
+        if self.stream is not None and self.stream.is_playing():
+            return True
+        return bool(self._playlist) or pygame.mixer.music.get_busy()
         
     def set_volume(self, volume: float) -> None:
         """设置音量"""
-        pygame.mixer.music.set_volume(max(0.0, min(1.0, volume)))
+        volume = max(0.0, min(1.0, volume))
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.Channel(0).set_volume(volume)
         self.logger.debug(f"设置音量: {volume}")
         
     def cleanup(self) -> None:
         """清理资源"""
         try:
             self.stop()
+            with self._cond:
+                self._closed = True
+                self._cond.notify()
             pygame.mixer.quit()
             self.logger.debug("清理 Pygame 资源")
         except Exception as e:
             self.logger.error("清理资源失败", exc_info=True)
-            
-    def _check_playback_status(self):
-        """检查播放状态"""
-        if not self.is_playing() and self.current_audio:
-            self.current_audio = None
-            if self.check_timer:
-                self.check_timer.stop()
-            if self.on_playback_complete:
-                self.on_playback_complete() 
\ No newline at end of file
@@ -0,0 +1,385 @@
+"""本地 SiliconFlow 模拟服务 (基准测试用, 不产生费用)
+
+实现 /audio/speech、/audio/voice/list、/audio/voice/deletions 和
+/uploads/audio/voice (另有 /mock/stats 返回计数)。可配置首字节延迟分布,
+按实时倍率分块发送, 按概率注入 429/5xx 和中途断开, 按密钥限流, 返回
+合成音频。
+
+用法:
+    python -m benchmarks.mock_server --port 8765 --latency lognormal:0.3,0.4 --error-429 0.02
+    # 客户端使用 api_url=http://127.0.0.1:8765/v1
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+from aiohttp import web
+from api.request_scheduler import TokenBucket
+from benchmarks.synthetic_audio import synthesize
+from models.quality_profile import FORMAT_SAMPLE_RATES
+from utils.logger import get_child_logger
+
+CONTENT_TYPES = {
+    'mp3': 'audio/mpeg',
+    'opus': 'audio/ogg',
+    'wav': 'audio/wav',
+    'pcm': 'audio/pcm',
+}
+SERVER_ERROR_STATUS = (500, 502, 503)
+
+
+@dataclass
+class LatencyModel:
+    """延迟分布 (秒)
+
+    kind 与参数:
+        fixed: (值,)
+        uniform: (下限, 上限)
+        normal: (均值, 标准差)
+        lognormal: (中位数, 对数标准差)
+        exponential: (均值,)
+    """
+    kind: str = 'fixed'
+    params: tuple = (0.0,)
+
+    KINDS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+    def __post_init__(self):
+        if self.kind not in self.KINDS:
+            raise ValueError(f"未知的延迟分布: {self.kind}, 可选: {', '.join(self.KINDS)}")
+        self.params = tuple(float(value) for value in self.params)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        """解析 '分布:参数1,参数2' 形式的描述, 如 'lognormal:0.3,0.4'; 纯数字视为 fixed"""
+        kind, _, args = spec.partition(':')
+        try:
+            return cls('fixed', (float(kind),))
+        except ValueError:
+            pass
+        return cls(kind, tuple(float(value) for value in args.split(',') if value))
+
+    def sample(self, rng: random.Random) -> float:
+        """抽取一个延迟值"""
+        if self.kind == 'fixed':
+            value = self.params[0]
+        elif self.kind == 'uniform':
+            value = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == 'normal':
+            value = rng.gauss(self.params[0], self.params[1])
+        elif self.kind == 'lognormal':
+            value = self.params[0] * rng.lognormvariate(0.0, self.params[1])
+        else:
+            value = rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        return max(0.0, value)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(f'{value:g}' for value in self.params)}"
+
+
+@dataclass
+class MockOptions:
+    """模拟服务行为"""
+    # 首字节延迟 (语音接口) 和其他接口的响应延迟
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    api_latency: LatencyModel = field(default_factory=LatencyModel)
+    # 音频生成速度: 每秒生成多少秒音频, 0 表示不限速
+    realtime_factor: float = 20.0
+    # 每个字符对应的音频时长(秒), 按 speed 缩放
+    seconds_per_char: float = 0.2
+    chunk_bytes: int = 4096
+    # 错误注入概率: 429 (附 Retry-After)、5xx、发送途中断开
+    error_429: float = 0.0
+    error_5xx: float = 0.0
+    drop_rate: float = 0.0
+    retry_after: float = 1.0
+    # 每个密钥每分钟的请求数, 超出时返回 429, 0 表示不限
+    rpm_per_key: float = 0.0
+    # 有效密钥, 为空时接受任何密钥
+    api_keys: List[str] = field(default_factory=list)
+    seed: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为可写入结果文件的字典"""
+        options = asdict(self)
+        options['latency'] = str(self.latency)
+        options['api_latency'] = str(self.api_latency)
+        options['api_keys'] = len(self.api_keys)
+        return options
+
+
+class MockSiliconFlowServer:
+    """SiliconFlow 接口的本地模拟"""
+    def __init__(self, options: Optional[MockOptions] = None):
+        self.logger = get_child_logger('mock_server')
+        self.options = options or MockOptions()
+        self.rng = random.Random(self.options.seed)
+        self.voices: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {'requests': 0, 'speech': 0, 'bytes': 0, 'dropped': 0,
+                                      'rate_limited': 0, 'server_errors': 0, 'unauthorized': 0}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.base_url: Optional[str] = None
+
+    def create_app(self) -> web.Application:
+        """创建 aiohttp 应用 (路径与 api.siliconflow.cn/v1 一致)"""
+        app = web.Application(middlewares=[self._middleware], client_max_size=64 * 1024 * 1024)
+        app.router.add_post('/v1/audio/speech', self.handle_speech)
+        app.router.add_get('/v1/audio/voice/list', self.handle_voice_list)
+        app.router.add_post('/v1/audio/voice/deletions', self.handle_voice_delete)
+        app.router.add_post('/v1/uploads/audio/voice', self.handle_upload)
+        app.router.add_route('HEAD', '/v1', self.handle_head)
+        app.router.add_route('HEAD', '/v1/', self.handle_head)
+        app.router.add_get('/mock/stats', self.handle_stats)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        """鉴权、按密钥限流和错误注入"""
+        if request.method == 'HEAD' or request.path.startswith('/mock/'):
+            return await handler(request)
+        self.stats['requests'] += 1
+
+        auth = request.headers.get('Authorization', '')
+        api_key = auth[7:] if auth.startswith('Bearer ') else ''
+        if not api_key or (self.options.api_keys and api_key not in self.options.api_keys):
+            self.stats['unauthorized'] += 1
+            return self._error(401, "Invalid token")
+
+        if self.options.rpm_per_key > 0:
+            bucket = self._buckets.get(api_key)
+            if bucket is None:
+                bucket = self._buckets[api_key] = TokenBucket(self.options.rpm_per_key)
+            wait = bucket.reserve()
+            if wait > 0:
+                # 未受理的请求不占用额度
+                bucket.reserve(-1)
+                self.stats['rate_limited'] += 1
+                return self._error(429, "Request was rejected due to rate limiting",
+                                   headers={'Retry-After': f"{wait:.3f}"})
+
+        roll = self.rng.random()
+        if roll < self.options.error_429:
+            self.stats['rate_limited'] += 1
+            return self._error(429, "Request was rejected due to rate limiting",
+                               headers={'Retry-After': f"{self.options.retry_after:g}"})
+        if roll < self.options.error_429 + self.options.error_5xx:
+            self.stats['server_errors'] += 1
+            return self._error(self.rng.choice(SERVER_ERROR_STATUS), "Injected server error")
+        return await handler(request)
+
+    async def handle_head(self, request: web.Request) -> web.Response:
+        """连接预热使用的 HEAD 请求"""
+        return web.Response()
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """GET /mock/stats: 模拟服务计数 (不鉴权, 不注入错误)"""
+        return web.json_response({**self.stats, 'voices': len(self.voices)})
+
+    async def handle_speech(self, request: web.Request) -> web.StreamResponse:
+        """POST /v1/audio/speech: 延迟后按实时倍率分块发送合成音频"""
+        try:
+            body = await request.json()
+            text = body['input']
+            response_format = body.get('response_format') or 'mp3'
+            sample_rate = body.get('sample_rate')
+            if response_format not in FORMAT_SAMPLE_RATES:
+                raise ValueError(f"unsupported response_format: {response_format}")
+            speed = float(body.get('speed', 1.0))
+            seconds = max(0.5, len(text) * self.options.seconds_per_char / max(speed, 0.25))
+            audio = synthesize(response_format, sample_rate, seconds)
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error(400, str(e))
+
+        self.stats['speech'] += 1
+        await asyncio.sleep(self.options.latency.sample(self.rng))
+        content_type = CONTENT_TYPES[response_format]
+        if not body.get('stream', True):
+            if self.options.realtime_factor > 0:
+                await asyncio.sleep(seconds / self.options.realtime_factor)
+            self.stats['bytes'] += len(audio)
+            return web.Response(body=audio, content_type=content_type)
+
+        drop_at = None
+        if self.rng.random() < self.options.drop_rate:
+            drop_at = self.rng.randrange(len(audio))
+        chunk_bytes = max(1, self.options.chunk_bytes)
+        # 每块音频的生成时间
+        interval = 0.0
+        if self.options.realtime_factor > 0:
+            interval = seconds / self.options.realtime_factor * chunk_bytes / len(audio)
+
+        response = web.StreamResponse(headers={'Content-Type': content_type})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        started = time.monotonic()
+        for index, offset in enumerate(range(0, len(audio), chunk_bytes)):
+            if drop_at is not None and offset + chunk_bytes > drop_at:
+                self.stats['dropped'] += 1
+                if request.transport is not None:
+                    request.transport.close()
+                return response
+            # 按开始时间计算发送时刻, 避免逐块休眠的误差累积
+            delay = started + index * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            chunk = audio[offset:offset + chunk_bytes]
+            try:
+                await response.write(chunk)
+            except ConnectionResetError:
+                # 客户端提前关闭流 (如只读取首块)
+                return response
+            self.stats['bytes'] += len(chunk)
+        await response.write_eof()
+        return response
+
+    async def handle_voice_list(self, request: web.Request) -> web.Response:
+        """GET /v1/audio/voice/list"""
+        await asyncio.sleep(self.options.api_latency.sample(self.rng))
+        return web.json_response({'result': list(self.voices.values())})
+
+    async def handle_voice_delete(self, request: web.Request) -> web.Response:
+        """POST /v1/audio/voice/deletions"""
+        await asyncio.sleep(self.options.api_latency.sample(self.rng))
+        try:
+            uri = (await request.json())['uri']
+        except (KeyError, TypeError, ValueError):
+            return self._error(400, "missing uri")
+        if self.voices.pop(uri, None) is None:
+            return self._error(404, f"voice not found: {uri}")
+        return web.json_response({})
+
+    async def handle_upload(self, request: web.Request) -> web.Response:
+        """POST /v1/uploads/audio/voice (JSON 的 data URI 或 multipart 文件)"""
+        if request.content_type.startswith('multipart/'):
+            form = await request.post()
+            upload = form.get('file')
+            audio = upload.file.read() if upload is not None else b''
+            fields = dict(form)
+        else:
+            try:
+                fields = await request.json()
+                audio = base64.b64decode(str(fields.get('audio', '')).partition('base64,')[2])
+            except (TypeError, ValueError):
+                return self._error(400, "invalid body")
+        model, name = fields.get('model'), fields.get('customName')
+        if not model or not name or not audio:
+            return self._error(400, "model, customName and audio are required")
+
+        await asyncio.sleep(self.options.api_latency.sample(self.rng))
+        digest = hashlib.sha256(audio).hexdigest()[:16]
+        uri = f"speech:{name}:{uuid.uuid4().hex[:12]}:{digest}"
+        self.voices[uri] = {'model': model, 'customName': name, 'text': fields.get('text', ''),
+                            'uri': uri}
+        return web.json_response({'uri': uri})
+
+    @staticmethod
+    def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> web.Response:
+        """与上游一致的错误响应"""
+        return web.Response(status=status, headers=headers, content_type='application/json',
+                            text=json.dumps({'code': status, 'message': message}))
+
+    def start_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """在后台线程中启动服务, 返回 API 地址 (port 为 0 时自动选择端口)"""
+        ready = threading.Event()
+        errors: List[BaseException] = []
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._runner = web.AppRunner(self.create_app(), access_log=None)
+                self._loop.run_until_complete(self._runner.setup())
+                site = web.TCPSite(self._runner, host, port, backlog=1024)
+                self._loop.run_until_complete(site.start())
+                bound_port = self._runner.addresses[0][1]
+                self.base_url = f"http://{host}:{bound_port}/v1"
+            except BaseException as e:
+                errors.append(e)
+                return
+            finally:
+                ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name='mock-siliconflow', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        self.logger.info(f"模拟服务已启动: {self.base_url}")
+        return self.base_url
+
+    def stop(self) -> None:
+        """停止后台线程中的服务"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """模拟服务行为参数 (基准测试命令共用)"""
+    parser.add_argument('--latency', default='lognormal:0.25,0.35',
+                        help="首字节延迟分布, 如 0.2、uniform:0.1,0.5、lognormal:0.25,0.35")
+    parser.add_argument('--api-latency', default='0.02', help="音色等接口的延迟分布")
+    parser.add_argument('--realtime-factor', type=float, default=20.0,
+                        help="每秒生成的音频秒数, 0 表示不限速")
+    parser.add_argument('--seconds-per-char', type=float, default=0.2, help="每字符的音频时长")
+    parser.add_argument('--mock-chunk-bytes', type=int, default=4096, help="分块大小")
+    parser.add_argument('--error-429', type=float, default=0.0, help="429 概率")
+    parser.add_argument('--error-5xx', type=float, default=0.0, help="5xx 概率")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="发送途中断开的概率")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="注入 429 的 Retry-After")
+    parser.add_argument('--rpm-per-key', type=float, default=0.0, help="每个密钥每分钟请求数上限")
+    parser.add_argument('--seed', type=int, help="随机种子")
+
+
+def options_from_args(args: argparse.Namespace) -> MockOptions:
+    """由命令行参数构造模拟服务行为"""
+    return MockOptions(
+        latency=LatencyModel.parse(args.latency),
+        api_latency=LatencyModel.parse(args.api_latency),
+        realtime_factor=args.realtime_factor,
+        seconds_per_char=args.seconds_per_char,
+        chunk_bytes=args.mock_chunk_bytes,
+        error_429=args.error_429,
+        error_5xx=args.error_5xx,
+        drop_rate=args.drop_rate,
+        retry_after=args.retry_after,
+        rpm_per_key=args.rpm_per_key,
+        seed=args.seed,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.mock_server',
+                                     description="本地 SiliconFlow 模拟服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口")
+    parser.add_argument('--api-key', action='append', default=[],
+                        help="有效密钥, 可重复指定; 不指定时接受任何密钥")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    options = options_from_args(args)
+    options.api_keys = args.api_key
+    server = MockSiliconFlowServer(options)
+    print(f"模拟服务: http://{args.host}:{args.port}/v1")
+    web.run_app(server.create_app(), host=args.host, port=args.port, access_log=None,
+                backlog=1024, print=None)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
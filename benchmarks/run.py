@@ -0,0 +1,283 @@
+"""端到端基准测试 (使用本地模拟服务, 不访问真实接口)
+
+用法:
+    python -m benchmarks.run --label baseline
+    python -m benchmarks.run -n 80 -j 16 --latency uniform:0.1,0.6 --error-429 0.05
+    python -m benchmarks.run --baseline benchmarks/results/baseline.json   # 运行并与基线比较
+    python -m benchmarks.run --compare old.json new.json                   # 只比较两次结果
+
+结果写入 benchmarks/results/<时间>-<标签>.json; 比较时任一指标变差超过
+阈值 (默认 10%) 即视为回归, 退出码为 1。测量前先检查长文本的流式输出与
+整体合成逐字节一致, 不一致时退出码同样为 1。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import requests
+from benchmarks import mock_server
+from benchmarks.suite import SCENARIOS, SuiteConfig, check_stream_join, run_suite
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# 参与比较的指标: 1 表示越大越好, -1 表示越小越好
+METRIC_DIRECTIONS = {
+    'throughput': 1,
+    'mb_per_s': 1,
+    'errors': -1,
+    'latency_p50': -1,
+    'latency_p95': -1,
+    'latency_p99': -1,
+    'ttfb_p50': -1,
+    'ttfb_p95': -1,
+    'ttfb_p99': -1,
+    'mem_peak_mb': -1,
+}
+
+
+class MockProcess:
+    """在子进程中运行模拟服务, 与被测代码互不占用 GIL 和内存统计"""
+    def __init__(self, mock_args: List[str], startup_timeout: float = 15.0):
+        self.mock_args = mock_args
+        self.startup_timeout = startup_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.base_url: Optional[str] = None
+
+    def __enter__(self) -> 'MockProcess':
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.mock_server', '--port', str(port), *self.mock_args],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+        )
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                requests.get(stats_url(self.base_url), timeout=1).raise_for_status()
+                return self
+            except requests.RequestException:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.__exit__(None, None, None)
+                    raise RuntimeError("模拟服务启动失败")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc_info) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def stats_url(base_url: str) -> str:
+    """模拟服务计数接口地址"""
+    return base_url.rstrip('/').rsplit('/v1', 1)[0] + '/mock/stats'
+
+
+def mock_stats(base_url: str) -> Optional[Dict[str, Any]]:
+    """读取模拟服务计数, 使用外部服务时可能不可用"""
+    try:
+        response = requests.get(stats_url(base_url), timeout=2)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException:
+        return None
+
+
+def git_commit() -> Optional[str]:
+    """当前提交, 不在 git 仓库中时为 None"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_result(result: Dict[str, Any], path: Optional[str] = None) -> str:
+    """写入结果文件, 返回路径"""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        name = f"{stamp}-{result['label']}" if result.get('label') else stamp
+        path = os.path.join(RESULTS_DIR, f"{name}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_result(path: str) -> Dict[str, Any]:
+    """读取结果文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any],
+            threshold: float = 0.1) -> Tuple[List[str], List[str]]:
+    """比较两次结果
+    Returns:
+        (报告行, 回归项)
+    """
+    lines = []
+    regressions = []
+    if old.get('config') != new.get('config') or old.get('mock') != new.get('mock'):
+        lines.append("注意: 两次运行的场景参数或模拟服务配置不同, 结果不可直接比较")
+    lines.append(f"{'scenario':<16}{'metric':<14}{'baseline':>12}{'current':>12}{'change':>10}")
+    for scenario, new_metrics in new.get('scenarios', {}).items():
+        old_metrics = old.get('scenarios', {}).get(scenario)
+        if old_metrics is None:
+            continue
+        for metric, direction in METRIC_DIRECTIONS.items():
+            if metric not in old_metrics or metric not in new_metrics:
+                continue
+            before, after = old_metrics[metric], new_metrics[metric]
+            if before:
+                change = (after - before) / abs(before)
+            else:
+                change = 0.0 if not after else float('inf')
+            regressed = change * direction < -threshold
+            flag = '  回归' if regressed else ''
+            lines.append(f"{scenario:<16}{metric:<14}{before:>12.4g}{after:>12.4g}{change:>+10.1%}{flag}")
+            if regressed:
+                regressions.append(f"{scenario}.{metric}")
+    return lines, regressions
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """生成结果摘要"""
+    lines = [f"{'scenario':<16}{'req/s':>9}{'MB/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}"
+             f"{'ttfb_p50':>10}{'ttfb_p95':>10}{'mem_MB':>8}{'errors':>8}"]
+    for name, metrics in result['scenarios'].items():
+        def value(key):
+            return f"{metrics[key]:.3f}" if key in metrics else '-'
+        lines.append(
+            f"{name:<16}{metrics['throughput']:>9.2f}{metrics['mb_per_s']:>8.2f}"
+            f"{value('latency_p50'):>8}{value('latency_p95'):>8}{value('latency_p99'):>8}"
+            f"{value('ttfb_p50'):>10}{value('ttfb_p95'):>10}"
+            f"{metrics['mem_peak_mb']:>8.1f}{metrics['errors']:>8}"
+        )
+    return '\n'.join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description="端到端基准测试")
+    parser.add_argument('--scenarios', help=f"要执行的场景, 逗号分隔 (默认全部: {', '.join(SCENARIOS)})")
+    parser.add_argument('-n', '--requests', type=int, default=40, help="每个场景的请求数")
+    parser.add_argument('-j', '--concurrency', type=int, default=8, help="并发数")
+    parser.add_argument('--short-chars', type=int, default=60, help="客户端场景的文本长度")
+    parser.add_argument('--long-chars', type=int, default=600, help="服务层和批量场景的文本长度")
+    parser.add_argument('--format', default='mp3', help="音频格式")
+    parser.add_argument('--max-retries', type=int, default=3, help="客户端重试次数")
+    parser.add_argument('--label', help="结果标签, 写入文件名")
+    parser.add_argument('--output', help="结果文件, 默认写入 benchmarks/results/")
+    parser.add_argument('--baseline', help="与该结果比较")
+    parser.add_argument('--threshold', type=float, default=0.1, help="视为回归的变差比例")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="只比较两个结果文件")
+    parser.add_argument('--mock-url', help="使用已启动的模拟服务 (默认在子进程中启动)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出客户端日志")
+    mock_server.add_arguments(parser)
+    return parser
+
+
+def mock_arguments(args: argparse.Namespace) -> List[str]:
+    """转发给模拟服务子进程的参数"""
+    forwarded = ['--latency', args.latency, '--api-latency', args.api_latency,
+                 '--realtime-factor', str(args.realtime_factor),
+                 '--seconds-per-char', str(args.seconds_per_char),
+                 '--mock-chunk-bytes', str(args.mock_chunk_bytes),
+                 '--error-429', str(args.error_429), '--error-5xx', str(args.error_5xx),
+                 '--drop-rate', str(args.drop_rate), '--retry-after', str(args.retry_after),
+                 '--rpm-per-key', str(args.rpm_per_key)]
+    if args.seed is not None:
+        forwarded += ['--seed', str(args.seed)]
+    return forwarded
+
+
+def run_checks(base_url: str, config: SuiteConfig) -> Optional[Dict[str, bool]]:
+    """执行一致性检查, 模拟服务注入的错误导致检查无法完成时返回 None"""
+    try:
+        return check_stream_join(base_url, config)
+    except Exception as e:
+        print(f"一致性检查未完成: {type(e).__name__}: {e}")
+        return None
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.compare:
+        lines, regressions = compare(load_result(args.compare[0]), load_result(args.compare[1]),
+                                     args.threshold)
+        print('\n'.join(lines))
+        return 1 if regressions else 0
+
+    if not args.verbose:
+        # 逐请求的日志会影响测量结果, 失败的请求已计入结果的 errors/error_samples
+        logging.disable(logging.ERROR)
+    config = SuiteConfig(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        short_chars=args.short_chars,
+        long_chars=args.long_chars,
+        response_format=args.format,
+        max_retries=args.max_retries,
+    )
+    names = [name.strip() for name in args.scenarios.split(',')] if args.scenarios else None
+    options = mock_server.options_from_args(args)
+
+    if args.mock_url:
+        base_url = args.mock_url
+        checks = run_checks(base_url, config)
+        before = mock_stats(base_url)
+        scenarios = run_suite(base_url, config, names)
+        after = mock_stats(base_url)
+    else:
+        with MockProcess(mock_arguments(args)) as mock:
+            checks = run_checks(mock.base_url, config)
+            before = mock_stats(mock.base_url)
+            scenarios = run_suite(mock.base_url, config, names)
+            after = mock_stats(mock.base_url)
+
+    result = {
+        'label': args.label,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': asdict(config),
+        # 使用外部模拟服务时无法得知其配置
+        'mock': None if args.mock_url else options.as_dict(),
+        'mock_stats': {key: after[key] - before.get(key, 0) for key in after}
+                      if before and after else None,
+        'checks': checks,
+        'scenarios': scenarios,
+    }
+    path = save_result(result, args.output)
+    print(format_result(result))
+    print(f"结果已保存: {path}")
+    mismatched = [name for name, ok in (checks or {}).items() if not ok]
+    if mismatched:
+        print(f"流式输出与整体合成不一致: {', '.join(mismatched)}")
+
+    if args.baseline:
+        lines, regressions = compare(load_result(args.baseline), result, args.threshold)
+        print('\n'.join(lines))
+        if regressions:
+            print(f"回归: {', '.join(regressions)}")
+            return 1
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+"""基准测试场景
+
+每个场景对同一个 API 地址 (通常为本地模拟服务) 执行一组请求, 统计吞吐量、
+首字节时间、延迟分位数和内存峰值 (tracemalloc 统计的 Python 分配)。
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from cli.batch import BatchJob, BatchRunner, percentile
+
+# 生成测试文本用的句子, 带标点以便按句切分
+_SENTENCE = "第{index}号测试文本，用于测量合成延迟和吞吐量。"
+# 流式输出时在容器层边返回边拼接的格式 (wav/opus 合并后一次性返回)
+STREAM_CHECK_FORMATS = ('mp3', 'pcm')
+
+
+@dataclass
+class Sample:
+    """单个请求的测量结果"""
+    latency: float
+    ttfb: Optional[float] = None
+    bytes: int = 0
+    ok: bool = True
+    error: Optional[str] = None
+
+
+@dataclass
+class SuiteConfig:
+    """场景参数"""
+    requests: int = 40
+    concurrency: int = 8
+    # 短文本用于客户端场景, 长文本 (多段) 用于服务层和批量场景
+    short_chars: int = 60
+    long_chars: int = 600
+    response_format: str = 'mp3'
+    segment_workers: int = 4
+    api_key: str = 'benchmark-key'
+    max_retries: int = 3
+
+
+def make_text(chars: int, index: int) -> str:
+    """生成指定长度的测试文本, 每个请求的文本不同 (不命中缓存和请求合并)"""
+    sentence = _SENTENCE.format(index=index)
+    repeats = chars // len(sentence) + 1
+    return (sentence * repeats)[:chars]
+
+
+def summarize(samples: List[Sample], elapsed: float, mem_peak: int) -> Dict[str, Any]:
+    """汇总测量结果"""
+    succeeded = [sample for sample in samples if sample.ok]
+    latencies = [sample.latency for sample in succeeded]
+    ttfbs = [sample.ttfb for sample in succeeded if sample.ttfb is not None]
+    elapsed = elapsed or 1e-9
+    metrics: Dict[str, Any] = {
+        'requests': len(samples),
+        'errors': len(samples) - len(succeeded),
+        'elapsed': elapsed,
+        'throughput': len(succeeded) / elapsed,
+        'mb_per_s': sum(sample.bytes for sample in succeeded) / elapsed / 1024 / 1024,
+        'mem_peak_mb': mem_peak / 1024 / 1024,
+    }
+    if latencies:
+        metrics.update({
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'latency_p99': percentile(latencies, 99),
+            'latency_max': max(latencies),
+        })
+    if ttfbs:
+        metrics.update({
+            'ttfb_p50': percentile(ttfbs, 50),
+            'ttfb_p95': percentile(ttfbs, 95),
+            'ttfb_p99': percentile(ttfbs, 99),
+        })
+    errors = sorted({sample.error for sample in samples if sample.error})
+    if errors:
+        metrics['error_samples'] = errors[:5]
+    return metrics
+
+
+def timed(fn: Callable[[], Any]) -> Sample:
+    """执行一次非流式调用"""
+    started = time.monotonic()
+    try:
+        result = fn()
+    except Exception as e:
+        return Sample(time.monotonic() - started, ok=False, error=f"{type(e).__name__}: {e}")
+    return Sample(time.monotonic() - started, bytes=len(result))
+
+
+def timed_stream(fn: Callable[[], Iterable[bytes]]) -> Sample:
+    """执行一次流式调用并读完全部数据"""
+    started = time.monotonic()
+    ttfb = None
+    size = 0
+    try:
+        for chunk in fn():
+            if ttfb is None:
+                ttfb = time.monotonic() - started
+            size += len(chunk)
+    except Exception as e:
+        return Sample(time.monotonic() - started, ttfb, size, False, f"{type(e).__name__}: {e}")
+    return Sample(time.monotonic() - started, ttfb, size)
+
+
+def run_concurrently(tasks: List[Callable[[], Sample]], concurrency: int) -> Dict[str, Any]:
+    """并发执行任务并统计 (内存峰值只统计本场景期间)"""
+    tracemalloc.reset_peak()
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='bench') as executor:
+        samples = list(executor.map(lambda task: task(), tasks))
+    elapsed = time.monotonic() - started
+    return summarize(samples, elapsed, tracemalloc.get_traced_memory()[1])
+
+
+def _client(base_url: str, config: SuiteConfig):
+    """直接创建客户端 (不经工厂缓存, 每个场景使用新的连接池)"""
+    from api.silicon_flow_client import SiliconFlowClient
+    client = SiliconFlowClient(config.api_key, base_url, pool_size=config.concurrency,
+                               max_retries=config.max_retries)
+    client.warmup()
+    return client
+
+
+def _service(base_url: str, config: SuiteConfig):
+    """创建不带音频缓存的服务 (连接池容纳各请求的分段并发)"""
+    from services.tts_service import TTSService
+    return TTSService(config.api_key, base_url, cache=None,
+                      pool_size=config.concurrency * config.segment_workers,
+                      segment_workers=config.segment_workers, max_retries=config.max_retries)
+
+
+def bench_client_speech(base_url: str, config: SuiteConfig) -> Dict[str, Any]:
+    """SiliconFlowClient.create_speech: 短文本, 整体下载"""
+    client = _client(base_url, config)
+    params = {'response_format': config.response_format}
+    tasks = [lambda i=i: timed(lambda: client.create_speech(make_text(config.short_chars, i), **params))
+             for i in range(config.requests)]
+    try:
+        metrics = run_concurrently(tasks, config.concurrency)
+        metrics['connections'] = client.connection_stats()
+        return metrics
+    finally:
+        client.close()
+
+
+def bench_client_stream(base_url: str, config: SuiteConfig) -> Dict[str, Any]:
+    """SiliconFlowClient.create_speech_stream: 短文本, 流式读取"""
+    client = _client(base_url, config)
+    params = {'response_format': config.response_format}
+    tasks = [lambda i=i: timed_stream(
+                 lambda: client.create_speech_stream(make_text(config.short_chars, i), **params))
+             for i in range(config.requests)]
+    try:
+        metrics = run_concurrently(tasks, config.concurrency)
+        metrics['connections'] = client.connection_stats()
+        return metrics
+    finally:
+        client.close()
+
+
+def bench_service_convert(base_url: str, config: SuiteConfig) -> Dict[str, Any]:
+    """TTSService.convert_text: 长文本分段并发合成后拼接"""
+    service = _service(base_url, config)
+    params = {'response_format': config.response_format}
+    tasks = [lambda i=i: timed(lambda: service.convert_text(make_text(config.long_chars, i), params))
+             for i in range(config.requests)]
+    return run_concurrently(tasks, config.concurrency)
+
+
+def bench_service_stream(base_url: str, config: SuiteConfig) -> Dict[str, Any]:
+    """TTSService.convert_text_stream: 长文本边合成边返回 (预合成后续片段)"""
+    service = _service(base_url, config)
+    params = {'response_format': config.response_format}
+    tasks = [lambda i=i: timed_stream(
+                 lambda: service.convert_text_stream(make_text(config.long_chars, i), params))
+             for i in range(config.requests)]
+    return run_concurrently(tasks, config.concurrency)
+
+
+def bench_batch(base_url: str, config: SuiteConfig) -> Dict[str, Any]:
+    """BatchRunner: 长文本任务流式写入文件"""
+    service = _service(base_url, config)
+    params = {'response_format': config.response_format}
+    jobs = [BatchJob(str(i), make_text(config.long_chars, i), dict(params),
+                     f"{i}.{config.response_format}")
+            for i in range(config.requests)]
+    with tempfile.TemporaryDirectory(prefix='text2voice-bench-') as output_dir:
+        tracemalloc.reset_peak()
+        report = BatchRunner(service, output_dir, config.concurrency, progress=False).run(jobs)
+        mem_peak = tracemalloc.get_traced_memory()[1]
+        written = sum(os.path.getsize(os.path.join(output_dir, job.output))
+                      for job in jobs if os.path.exists(os.path.join(output_dir, job.output)))
+    samples = [Sample(result.latency, result.ttfb, result.bytes, result.ok, result.error)
+               for result in report.results]
+    metrics = summarize(samples, report.elapsed, mem_peak)
+    metrics['written_mb'] = written / 1024 / 1024
+    return metrics
+
+
+def check_stream_join(base_url: str, config: SuiteConfig) -> Dict[str, bool]:
+    """检查长文本的流式输出与 convert_text 逐字节一致 (mp3/pcm 边返回边拼接)
+    Returns:
+        格式 -> 是否一致
+    """
+    service = _service(base_url, config)
+    text = make_text(config.long_chars, 0)
+    results = {}
+    for response_format in STREAM_CHECK_FORMATS:
+        params = {'response_format': response_format}
+        whole = bytes(service.convert_text(text, params))
+        streamed = b''.join(service.convert_text_stream(text, params))
+        results[response_format] = whole == streamed
+    return results
+
+
+# 场景名 -> 测量函数, 按此顺序执行
+SCENARIOS: Dict[str, Callable[[str, SuiteConfig], Dict[str, Any]]] = {
+    'client.speech': bench_client_speech,
+    'client.stream': bench_client_stream,
+    'service.convert': bench_service_convert,
+    'service.stream': bench_service_stream,
+    'batch': bench_batch,
+}
+
+
+def run_suite(base_url: str, config: SuiteConfig, names: Optional[List[str]] = None,
+              progress: bool = True) -> Dict[str, Dict[str, Any]]:
+    """依次执行场景, 返回各场景的指标
+    Args:
+        base_url: API地址
+        config: 场景参数
+        names: 要执行的场景, 为 None 时执行全部
+        progress: 是否输出进度
+    """
+    names = names or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"未知的场景: {', '.join(unknown)}, 可选: {', '.join(SCENARIOS)}")
+
+    results = {}
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        for name in names:
+            if progress:
+                print(f"场景 {name} ...", end=' ', flush=True)
+            results[name] = SCENARIOS[name](base_url, config)
+            if progress:
+                print(f"{results[name]['elapsed']:.2f}s", flush=True)
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return results
@@ -0,0 +1,127 @@
+import math
+import struct
+from functools import lru_cache
+from typing import List
+from models.quality_profile import COMPRESSED_BITRATES, resolve_sample_rate
+from utils.audio_stitcher import ogg_crc
+
+# 测试音: 440Hz 正弦波, 1 秒正好是整数个周期, 可直接平铺
+TONE_HZ = 440
+TONE_AMPLITUDE = 0.2
+
+# MPEG-1 Layer III 的比特率和采样率索引
+_MP3_BITRATE_INDEX = {32000: 1, 40000: 2, 48000: 3, 56000: 4, 64000: 5, 80000: 6, 96000: 7,
+                      112000: 8, 128000: 9, 160000: 10, 192000: 11, 224000: 12, 256000: 13,
+                      320000: 14}
+_MP3_RATE_INDEX = {44100: 0, 48000: 1, 32000: 2}
+_MP3_FRAME_SAMPLES = 1152
+# 编码器写在开头的 ID3v2.4 标签 (一个 TSSE 帧) 和 Info 帧中标记的偏移 (MPEG-1 单声道)
+_MP3_ID3_ENCODER = b'\x03Lavf60.16.100'
+_MP3_ID3_FRAME = b'TSSE' + struct.pack('>I', len(_MP3_ID3_ENCODER)) + b'\x00\x00' + _MP3_ID3_ENCODER
+_MP3_ID3_TAG = b'ID3\x04\x00\x00' + struct.pack('>I', len(_MP3_ID3_FRAME)) + _MP3_ID3_FRAME
+_MP3_INFO_OFFSET = 21
+
+# Opus: 每包 20ms (CELT 全频带, 单声道, 单帧), 每页 1 秒
+_OPUS_TOC = 31 << 3
+_OPUS_PACKET_SAMPLES = 960
+_OPUS_PACKETS_PER_PAGE = 50
+_OPUS_PRE_SKIP = 312
+_OGG_SERIAL = 0x54455354
+
+
+def synthesize(response_format: str, sample_rate: int, seconds: float) -> bytes:
+    """生成指定格式和时长的合成音频
+
+    wav/pcm 为可播放的正弦测试音; mp3 为静音帧, opus 为结构合法的 Ogg 流
+    (包内容为填充数据)。帧长、码率、容器结构与真实响应一致, 可用于测试
+    分帧、拼接和带宽, 不用于试听。
+    Args:
+        response_format: 音频格式
+        sample_rate: 采样率
+        seconds: 时长(秒)
+    """
+    sample_rate = resolve_sample_rate(response_format, sample_rate)
+    seconds = max(0.0, seconds)
+    if response_format == 'pcm':
+        return _tone(sample_rate, seconds)
+    if response_format == 'wav':
+        return _wav(sample_rate, seconds)
+    if response_format == 'mp3':
+        return _mp3(sample_rate, seconds)
+    return _opus(seconds)
+
+
+@lru_cache(maxsize=8)
+def _tone_second(sample_rate: int) -> bytes:
+    """一秒 16 位单声道测试音"""
+    scale = 32767 * TONE_AMPLITUDE
+    samples = [int(scale * math.sin(2 * math.pi * TONE_HZ * i / sample_rate))
+               for i in range(sample_rate)]
+    return struct.pack(f'<{sample_rate}h', *samples)
+
+
+def _tone(sample_rate: int, seconds: float) -> bytes:
+    """指定时长的 16 位 PCM 测试音"""
+    second = _tone_second(sample_rate)
+    size = int(sample_rate * seconds) * 2
+    whole, rest = divmod(size, len(second))
+    return second * whole + second[:rest]
+
+
+def _wav(sample_rate: int, seconds: float) -> bytes:
+    """带 44 字节 RIFF 头的测试音"""
+    data = _tone(sample_rate, seconds)
+    header = struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + len(data), b'WAVE',
+                         b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+                         b'data', len(data))
+    return header + data
+
+
+def _mp3(sample_rate: int, seconds: float) -> bytes:
+    """MPEG-1 Layer III 单声道静音帧, 与常见编码器输出一样以 ID3 标签和 Info 帧开头"""
+    bitrate = COMPRESSED_BITRATES['mp3'][sample_rate]
+    header = bytes([0xFF, 0xFB,
+                    _MP3_BITRATE_INDEX[bitrate] << 4 | _MP3_RATE_INDEX[sample_rate] << 2,
+                    0xC4])
+    length = 144 * bitrate // sample_rate
+    frame = header + bytes(length - len(header))
+    frames = max(1, math.ceil(seconds * sample_rate / _MP3_FRAME_SAMPLES))
+    info = bytearray(frame)
+    info[_MP3_INFO_OFFSET:_MP3_INFO_OFFSET + 12] = b'Info' + struct.pack('>II', 0x03, frames)
+    return _MP3_ID3_TAG + bytes(info) + frame * frames
+
+
+def _ogg_page(flags: int, granule: int, sequence: int, packets: List[bytes]) -> bytes:
+    """组装一个 Ogg 页 (每个包小于 255 字节时只占一个分段)"""
+    segment_table = bytearray()
+    for packet in packets:
+        segment_table.extend([255] * (len(packet) // 255))
+        segment_table.append(len(packet) % 255)
+    header = bytearray(struct.pack('<4sBBqIII', b'OggS', 0, flags, granule, _OGG_SERIAL,
+                                   sequence, 0))
+    header.append(len(segment_table))
+    header.extend(segment_table)
+    body = b''.join(packets)
+    struct.pack_into('<I', header, 22, ogg_crc(body, ogg_crc(header)))
+    return bytes(header) + body
+
+
+def _opus(seconds: float) -> bytes:
+    """Ogg Opus 流: OpusHead/OpusTags 头页加音频页"""
+    head = struct.pack('<8sBBHIhB', b'OpusHead', 1, 1, _OPUS_PRE_SKIP, 48000, 0, 0)
+    vendor = b'text2voice-benchmark'
+    tags = struct.pack('<8sI', b'OpusTags', len(vendor)) + vendor + struct.pack('<I', 0)
+    pages = [_ogg_page(0x02, 0, 0, [head]), _ogg_page(0, 0, 1, [tags])]
+
+    packet_bytes = COMPRESSED_BITRATES['opus'][48000] * _OPUS_PACKET_SAMPLES // 48000 // 8
+    packet = bytes([_OPUS_TOC]) + bytes(packet_bytes - 1)
+    total = max(1, math.ceil(seconds * 48000 / _OPUS_PACKET_SAMPLES))
+    granule = _OPUS_PRE_SKIP
+    sent = 0
+    while sent < total:
+        count = min(_OPUS_PACKETS_PER_PAGE, total - sent)
+        sent += count
+        granule += count * _OPUS_PACKET_SAMPLES
+        flags = 0x04 if sent == total else 0
+        pages.append(_ogg_page(flags, granule, len(pages), [packet] * count))
+    return b''.join(pages)
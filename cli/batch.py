@@ -0,0 +1,359 @@
+"""批量转换命令行 (不依赖 PyQt/pygame)
+
+清单文件为 JSONL 或 CSV, 每行一个任务, 字段:
+    text (必填), id, voice, model, format, sample_rate, quality, speed, gain, output
+
+用法:
+    python main.py batch jobs.jsonl -o output -j 4
+    python main.py batch jobs.csv --state jobs.state.jsonl   # 中断后重新执行即可续跑
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+from models.quality_profile import FORMAT_SAMPLE_RATES, get_profile, resolve_sample_rate
+from utils.audio_writer import AtomicAudioWriter
+from utils.config_manager import ConfigManager
+from utils.logger import get_child_logger
+
+# 清单字段到转换参数的映射 (兼容界面使用的参数名)
+FIELD_ALIASES = {
+    'voice': 'voice_id',
+    'voice_id': 'voice_id',
+    'model': 'model',
+    'format': 'response_format',
+    'response_format': 'response_format',
+    'sample_rate': 'sample_rate',
+    'speed': 'speed',
+    'gain': 'gain',
+}
+NUMERIC_FIELDS = {'sample_rate': int, 'speed': float, 'gain': float}
+
+
+@dataclass
+class BatchJob:
+    """批量任务"""
+    id: str
+    text: str
+    params: Dict[str, Any]
+    output: str
+
+
+@dataclass
+class BatchResult:
+    """单个任务的执行结果"""
+    id: str
+    ok: bool
+    chars: int = 0
+    bytes: int = 0
+    latency: float = 0.0
+    ttfb: Optional[float] = None
+    output: Optional[str] = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """转换为字典, 写入状态文件"""
+        return dict(self.__dict__)
+
+
+@dataclass
+class BatchReport:
+    """吞吐量统计"""
+    total: int = 0
+    skipped: int = 0
+    results: List[BatchResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    interrupted: bool = False
+
+    @property
+    def succeeded(self) -> List[BatchResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[BatchResult]:
+        return [result for result in self.results if not result.ok]
+
+    def format(self) -> str:
+        """生成报告文本"""
+        succeeded = self.succeeded
+        elapsed = self.elapsed or 1e-9
+        latencies = [result.latency for result in succeeded]
+        ttfbs = [result.ttfb for result in succeeded if result.ttfb is not None]
+        lines = [
+            f"任务: {self.total}  完成: {len(succeeded)}  失败: {len(self.failed)}  "
+            f"跳过(已完成): {self.skipped}" + ("  (已中断)" if self.interrupted else ""),
+            f"耗时: {self.elapsed:.2f}s  吞吐: {len(succeeded) / elapsed:.2f} 任务/s  "
+            f"{sum(r.chars for r in succeeded) / elapsed:.1f} 字符/s  "
+            f"{sum(r.bytes for r in succeeded) / elapsed / 1024:.1f} KB/s",
+        ]
+        if latencies:
+            lines.append(f"延迟: p50 {percentile(latencies, 50):.3f}s  "
+                         f"p95 {percentile(latencies, 95):.3f}s  最大 {max(latencies):.3f}s")
+        if ttfbs:
+            lines.append(f"首字节: p50 {percentile(ttfbs, 50):.3f}s  p95 {percentile(ttfbs, 95):.3f}s")
+        for result in self.failed[:10]:
+            lines.append(f"失败 #{result.id}: {result.error}")
+        return '\n'.join(lines)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩法百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def load_manifest(path: str, defaults: Optional[Dict[str, Any]] = None) -> List[BatchJob]:
+    """读取 JSONL/CSV 清单
+    Args:
+        path: 清单文件, 扩展名为 .csv 时按 CSV 解析, 否则按 JSONL
+        defaults: 清单未指定时使用的转换参数
+    """
+    jobs = []
+    seen: Set[str] = set()
+    for line_no, row in enumerate(_read_rows(path), 1):
+        text = str(row.get('text') or '').strip()
+        if not text:
+            raise ValueError(f"清单第 {line_no} 行缺少 text")
+        job_id = str(row.get('id') or line_no)
+        if job_id in seen:
+            raise ValueError(f"清单第 {line_no} 行任务ID重复: {job_id}")
+        seen.add(job_id)
+
+        try:
+            params = _row_params(row, defaults)
+        except ValueError as e:
+            raise ValueError(f"清单第 {line_no} 行: {e}") from None
+
+        output = row.get('output') or job_id
+        if not os.path.splitext(output)[1]:
+            output = f"{output}.{params['response_format']}"
+        jobs.append(BatchJob(job_id, text, params, output))
+    return jobs
+
+
+def _row_params(row: Dict[str, Any], defaults: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """由清单行和默认参数得到转换参数"""
+    params = dict(defaults or {})
+    if row.get('quality'):
+        params = get_profile(row['quality']).apply(params)
+    explicit_rate = False
+    for key, value in row.items():
+        name = FIELD_ALIASES.get(key)
+        if name is None or value in (None, ''):
+            continue
+        params[name] = NUMERIC_FIELDS.get(name, str)(value)
+        explicit_rate = explicit_rate or name == 'sample_rate'
+    return with_format(params, params.get('response_format') or 'mp3', explicit_rate)
+
+
+def with_format(params: Dict[str, Any], response_format: str,
+                explicit_rate: bool = False) -> Dict[str, Any]:
+    """设置音频格式并校验采样率
+
+    采样率来自质量档位或默认参数而格式被单独改写时, 该采样率可能不适用于
+    新格式 (如 master 档位的 44100 用于 opus), 此时改用新格式的默认采样率;
+    明确指定的采样率不适用时报错。
+    """
+    params = {**params, 'response_format': response_format}
+    sample_rate = params.get('sample_rate')
+    if sample_rate is not None and not explicit_rate \
+            and int(sample_rate) not in FORMAT_SAMPLE_RATES.get(response_format, []):
+        del params['sample_rate']
+    resolve_sample_rate(response_format, params.get('sample_rate'))
+    return params
+
+
+def _read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取清单"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(f)
+            return
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"清单第 {line_no} 行不是合法的 JSON: {e}") from None
+            if not isinstance(row, dict):
+                raise ValueError(f"清单第 {line_no} 行不是 JSON 对象")
+            yield row
+
+
+class BatchState:
+    """续跑状态文件 (JSONL, 每完成一个任务追加一行)"""
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 中断时最后一行可能不完整
+                        continue
+                    if record.get('ok'):
+                        self.completed[record['id']] = record
+
+    def is_done(self, job: BatchJob, output_dir: str) -> bool:
+        """任务已完成且输出文件仍存在"""
+        record = self.completed.get(job.id)
+        return bool(record) and os.path.exists(os.path.join(output_dir, job.output))
+
+    def record(self, result: BatchResult) -> None:
+        """追加一条结果"""
+        if not self.path:
+            return
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result.as_dict(), ensure_ascii=False) + '\n')
+
+
+class BatchRunner:
+    """并发执行批量任务, 音频流式写入输出目录"""
+    def __init__(self, tts_service: 'TTSService', output_dir: str, concurrency: int = 4,
+                 state: Optional[BatchState] = None, progress: bool = True):
+        self.logger = get_child_logger('batch')
+        self.tts_service = tts_service
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        self.state = state or BatchState(None)
+        self.progress = progress
+
+    def run(self, jobs: List[BatchJob]) -> BatchReport:
+        """执行任务, 中断 (Ctrl+C) 时等待进行中的任务结束后返回"""
+        report = BatchReport(total=len(jobs))
+        pending = []
+        for job in jobs:
+            if self.state.is_done(job, self.output_dir):
+                report.skipped += 1
+            else:
+                pending.append(job)
+
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='batch')
+        running = set()
+        queue = iter(pending)
+        try:
+            # 只保持有限个任务在途, 清单很大时不一次性提交
+            for job in queue:
+                running.add(executor.submit(self._run_job, job))
+                if len(running) >= self.concurrency * 2:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    self._collect(done, report, len(pending))
+            done, running = wait(running)
+            self._collect(done, report, len(pending))
+        except KeyboardInterrupt:
+            report.interrupted = True
+            for future in running:
+                future.cancel()
+            done, _ = wait(running)
+            self._collect([future for future in done if not future.cancelled()], report, len(pending))
+        finally:
+            executor.shutdown(wait=True)
+            report.elapsed = time.monotonic() - started
+        return report
+
+    def _collect(self, futures, report: BatchReport, total: int) -> None:
+        """记录完成的任务"""
+        for future in futures:
+            result = future.result()
+            report.results.append(result)
+            self.state.record(result)
+            if self.progress:
+                status = f"{result.bytes} 字节, {result.latency:.2f}s" if result.ok else f"失败: {result.error}"
+                print(f"[{len(report.results)}/{total}] #{result.id} {status}", flush=True)
+
+    def _run_job(self, job: BatchJob) -> BatchResult:
+        """执行单个任务"""
+        started = time.monotonic()
+        ttfb = None
+        writer = None
+        try:
+            writer = AtomicAudioWriter(os.path.join(self.output_dir, job.output))
+            for chunk in self.tts_service.convert_text_stream(job.text, job.params):
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                writer.feed(chunk)
+            path = writer.finish()
+            size = writer.size
+            writer = None
+            return BatchResult(job.id, True, len(job.text), size, time.monotonic() - started,
+                               ttfb, path)
+        except Exception as e:
+            self.logger.error(f"批量任务失败: {job.id}", exc_info=True)
+            return BatchResult(job.id, False, len(job.text), latency=time.monotonic() - started,
+                               error=str(e))
+        finally:
+            if writer is not None:
+                writer.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """注册 batch 子命令参数"""
+    parser.add_argument('manifest', help="任务清单 (.jsonl 或 .csv)")
+    parser.add_argument('-o', '--output-dir', default='output', help="输出目录")
+    parser.add_argument('-j', '--concurrency', type=int, default=4, help="并发任务数")
+    parser.add_argument('--state', help="续跑状态文件, 默认为 <清单>.state.jsonl")
+    parser.add_argument('--no-resume', action='store_true', help="忽略已有状态, 全部重新执行")
+    parser.add_argument('--api-key', help="API密钥, 默认读取配置文件或 TEXT2VOICE_API_KEY")
+    parser.add_argument('--api-url', help="API地址")
+    parser.add_argument('--config', default='data/config.json', help="配置文件")
+    parser.add_argument('--voice', help="默认音色")
+    parser.add_argument('--model', help="默认模型")
+    parser.add_argument('--format', help="默认格式")
+    parser.add_argument('--quality', help="默认质量档位")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出逐个任务的进度")
+
+
+def run(args: argparse.Namespace) -> int:
+    """执行 batch 子命令, 返回退出码"""
+    config = ConfigManager(args.config)
+    api_key = args.api_key or os.environ.get('TEXT2VOICE_API_KEY') or config.get('api_key', '')
+    if not api_key:
+        print("缺少API密钥: 使用 --api-key、TEXT2VOICE_API_KEY 或配置文件")
+        return 2
+
+    try:
+        defaults: Dict[str, Any] = {}
+        if args.quality:
+            defaults = get_profile(args.quality).apply(defaults)
+        for name, value in (('voice_id', args.voice), ('model', args.model)):
+            if value:
+                defaults[name] = value
+        if args.format:
+            defaults = with_format(defaults, args.format)
+        jobs = load_manifest(args.manifest, defaults)
+    except (ValueError, OSError) as e:
+        print(f"清单无效: {e}")
+        return 2
+
+    state_path = args.state or f"{args.manifest}.state.jsonl"
+    if args.no_resume and os.path.exists(state_path):
+        os.remove(state_path)
+
+    # 服务层 (requests/numpy 等) 在解析参数之后才导入, 查看帮助时不加载
+    from services.tts_service import TTSService
+    tts_service = TTSService.from_config(
+        config.get, api_key, args.api_url or config.get('api_url') or None
+    )
+    runner = BatchRunner(tts_service, args.output_dir, args.concurrency,
+                         BatchState(state_path), progress=not args.quiet)
+    report = runner.run(jobs)
+    print(report.format())
+    if report.interrupted:
+        return 130
+    return 1 if report.failed else 0
@@ -0,0 +1,59 @@
+"""本地语音合成服务 (兼容 OpenAI /v1/audio/speech, 不依赖 PyQt/pygame)
+
+用法:
+    python main.py serve --port 8000 --max-upstream 16
+    curl -X POST localhost:8000/v1/audio/speech -H 'Content-Type: application/json' \
+         -d '{"input": "你好", "voice": "FunAudioLLM/CosyVoice2-0.5B:alex"}' -o out.mp3
+"""
+import argparse
+import os
+from utils.config_manager import ConfigManager
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """注册 serve 子命令参数"""
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口")
+    parser.add_argument('--max-upstream', type=int, default=16, help="同时进行的上游调用数")
+    parser.add_argument('--max-waiting', type=int, default=512, help="排队请求上限, 超出返回 429")
+    parser.add_argument('--queue-timeout', type=float, default=30.0, help="排队超时(秒), 超时返回 503")
+    parser.add_argument('--token', help="客户端需携带的 Bearer 令牌, 默认读取 TEXT2VOICE_SERVER_TOKEN")
+    parser.add_argument('--api-key', help="上游API密钥, 默认读取配置文件或 TEXT2VOICE_API_KEY")
+    parser.add_argument('--api-url', help="上游API地址")
+    parser.add_argument('--config', default='data/config.json', help="配置文件")
+
+
+def run(args: argparse.Namespace) -> int:
+    """执行 serve 子命令, 返回退出码"""
+    config = ConfigManager(args.config)
+    api_key = args.api_key or os.environ.get('TEXT2VOICE_API_KEY') or config.get('api_key', '')
+    if not api_key:
+        print("缺少API密钥: 使用 --api-key、TEXT2VOICE_API_KEY 或配置文件")
+        return 2
+
+    from aiohttp import web
+    from services.tts_service import TTSService
+    from server.speech_server import SpeechServer
+
+    def get_config(key, default=None):
+        value = config.get(key, default)
+        if key == 'http_pool':
+            # 上游连接池至少容纳全部并发调用, 所有请求共用
+            value = dict(value or {})
+            value['pool_size'] = max(int(value.get('pool_size', 10)), args.max_upstream)
+        return value
+
+    tts_service = TTSService.from_config(
+        get_config, api_key, args.api_url or config.get('api_url') or None
+    )
+    server = SpeechServer(
+        tts_service,
+        max_upstream=args.max_upstream,
+        max_waiting=args.max_waiting,
+        queue_timeout=args.queue_timeout,
+        api_token=args.token or os.environ.get('TEXT2VOICE_SERVER_TOKEN'),
+        chunk_size=config.get('stream_chunk_size')
+    )
+    web.run_app(server.create_app(), host=args.host, port=args.port,
+                backlog=max(128, args.max_waiting))
+    return 0
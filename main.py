@@ -1,21 +1,47 @@
+import argparse
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
-from ui.styles.style_manager import StyleManager
 
-def main():
+def run_gui():
+    """启动图形界面"""
+    # 界面相关模块只在启动界面时导入, 命令行模式不依赖 PyQt/pygame
+    from PyQt6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+    from ui.styles.style_manager import StyleManager
+
     # 创建应用程序实例
-    app = QApplication(sys.argv)
-    
+    app = QApplication(sys.argv[:1])
+
     # 应用样式
     StyleManager.apply_style(app)
-    
+
     # 创建并显示主窗口
     window = MainWindow()
     window.show()
-    
+
     # 启动事件循环
-    sys.exit(app.exec())
+    return app.exec()
+
+def build_parser() -> argparse.ArgumentParser:
+    """命令行参数, 不带子命令时启动图形界面"""
+    parser = argparse.ArgumentParser(prog='text2voice', description="文本转语音工具")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('gui', help="启动图形界面 (默认)")
+    batch_parser = subparsers.add_parser('batch', help="按清单批量转换 (无界面)")
+    serve_parser = subparsers.add_parser('serve', help="启动本地语音合成服务 (兼容 OpenAI 接口)")
+    from cli import batch, serve
+    batch.add_arguments(batch_parser)
+    serve.add_arguments(serve_parser)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'batch':
+        from cli import batch
+        sys.exit(batch.run(args))
+    if args.command == 'serve':
+        from cli import serve
+        sys.exit(serve.run(args))
+    sys.exit(run_gui())
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
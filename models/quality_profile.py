@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# 各格式支持的采样率 (与接口文档一致)
+FORMAT_SAMPLE_RATES = {
+    'opus': [48000],
+    'wav': [8000, 16000, 24000, 32000, 44100],
+    'pcm': [8000, 16000, 24000, 32000, 44100],
+    'mp3': [32000, 44100]
+}
+
+# 格式默认采样率 (不传 sample_rate 时服务端使用的值)
+FORMAT_DEFAULT_RATES = {
+    'opus': 48000,
+    'wav': 44100,
+    'pcm': 44100,
+    'mp3': 44100
+}
+
+# 压缩格式用于估算带宽的典型码率 (bit/s), 按采样率区分, 实际码率以服务端为准
+COMPRESSED_BITRATES = {
+    'mp3': {32000: 64000, 44100: 128000},
+    'opus': {48000: 32000}
+}
+
+# 未压缩格式为 16 位单声道
+PCM_BYTES_PER_SAMPLE = 2
+WAV_HEADER_BYTES = 44
+
+
+def resolve_sample_rate(response_format: str, sample_rate: Optional[int] = None) -> int:
+    """校验并返回要请求的采样率
+    Args:
+        response_format: 音频格式
+        sample_rate: 采样率, 为 None 时使用格式默认值
+    Raises:
+        ValueError: 格式未知或不支持该采样率
+    """
+    if response_format not in FORMAT_SAMPLE_RATES:
+        raise ValueError(f"未知的音频格式: {response_format}")
+    if sample_rate is None:
+        return FORMAT_DEFAULT_RATES[response_format]
+    sample_rate = int(sample_rate)
+    if sample_rate not in FORMAT_SAMPLE_RATES[response_format]:
+        supported = ', '.join(str(rate) for rate in FORMAT_SAMPLE_RATES[response_format])
+        raise ValueError(f"{response_format} 不支持采样率 {sample_rate}, 可选: {supported}")
+    return sample_rate
+
+
+def estimate_bytes_per_second(response_format: str, sample_rate: Optional[int] = None) -> int:
+    """估算每秒音频的下载字节数"""
+    sample_rate = resolve_sample_rate(response_format, sample_rate)
+    if response_format in COMPRESSED_BITRATES:
+        return COMPRESSED_BITRATES[response_format][sample_rate] // 8
+    return sample_rate * PCM_BYTES_PER_SAMPLE
+
+
+@dataclass(frozen=True)
+class QualityProfile:
+    """质量档位: 决定请求的音频格式和采样率"""
+    name: str
+    label: str
+    response_format: str
+    sample_rate: int
+
+    def __post_init__(self):
+        resolve_sample_rate(self.response_format, self.sample_rate)
+
+    @property
+    def bytes_per_second(self) -> int:
+        """预计每秒音频的下载字节数"""
+        return estimate_bytes_per_second(self.response_format, self.sample_rate)
+
+    def estimate_size(self, seconds: float) -> int:
+        """估算指定时长音频的大小 (字节)"""
+        header = WAV_HEADER_BYTES if self.response_format == 'wav' else 0
+        return header + int(self.bytes_per_second * seconds)
+
+    def apply(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """返回按本档位设置格式和采样率后的参数副本"""
+        return {**params, 'response_format': self.response_format, 'sample_rate': self.sample_rate}
+
+
+QUALITY_PROFILES: Dict[str, QualityProfile] = {
+    profile.name: profile for profile in (
+        QualityProfile('telephony', '电话 (8kHz PCM)', 'pcm', 8000),
+        QualityProfile('voice', '语音 (48kHz Opus)', 'opus', 48000),
+        QualityProfile('preview', '预览 (32kHz MP3)', 'mp3', 32000),
+        QualityProfile('standard', '标准 (44.1kHz MP3)', 'mp3', 44100),
+        QualityProfile('master', '母带 (44.1kHz WAV)', 'wav', 44100),
+    )
+}
+
+
+def get_profile(name: str) -> QualityProfile:
+    """按名称获取质量档位"""
+    try:
+        return QUALITY_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的质量档位: {name}, 可选: {', '.join(QUALITY_PROFILES)}") from None
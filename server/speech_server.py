@@ -0,0 +1,233 @@
+import asyncio
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional
+from aiohttp import web
+from api.silicon_flow_client import SiliconFlowClient
+from utils.logger import get_child_logger
+
+CONTENT_TYPES = {
+    'mp3': 'audio/mpeg',
+    'opus': 'audio/ogg',
+    'wav': 'audio/wav',
+    'pcm': 'audio/pcm',
+}
+# 迭代结束标记 (在线程池中调用 next 时使用)
+_DONE = object()
+
+
+class AdmissionError(Exception):
+    """等待上游名额的请求过多"""
+
+
+class SpeechServer:
+    """本地语音合成服务 (兼容 OpenAI /v1/audio/speech)
+
+    单个 asyncio 进程处理所有客户端连接; 上游调用在有界线程池中执行,
+    同时进行的上游调用数由信号量限制, 排队的请求只占用协程。排队数超过
+    上限时直接返回 429, 不无限堆积。所有请求共用 TTSService 的连接池
+    和音频缓存。
+    """
+    def __init__(self, tts_service, max_upstream: int = 16, max_waiting: int = 512,
+                 queue_timeout: float = 30.0, api_token: Optional[str] = None,
+                 chunk_size: Optional[int] = None):
+        """
+        Args:
+            tts_service: TTS服务
+            max_upstream: 同时进行的上游调用数
+            max_waiting: 等待上游名额的最大请求数, 超出时返回 429
+            queue_timeout: 等待上游名额的超时时间(秒), 超时返回 503
+            api_token: 客户端需携带的 Bearer 令牌, 为 None 时不校验
+            chunk_size: 流式响应分块大小
+        """
+        self.logger = get_child_logger('speech_server')
+        self.tts_service = tts_service
+        self.max_upstream = max(1, max_upstream)
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.api_token = api_token
+        self.chunk_size = chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=self.max_upstream,
+                                           thread_name_prefix='speech-upstream')
+        self.stats = {'requests': 0, 'active': 0, 'waiting': 0, 'rejected': 0,
+                      'failed': 0, 'bytes': 0}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def create_app(self) -> web.Application:
+        """创建 aiohttp 应用"""
+        app = web.Application(middlewares=[self._auth_middleware])
+        app.router.add_post('/v1/audio/speech', self.handle_speech)
+        app.router.add_get('/v1/audio/voice/list', self.handle_voices)
+        app.router.add_get('/health', self.handle_health)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app: web.Application) -> None:
+        """信号量需在事件循环中创建"""
+        self._semaphore = asyncio.Semaphore(self.max_upstream)
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        """关闭上游线程池"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @web.middleware
+    async def _auth_middleware(self, request: web.Request, handler):
+        """校验 Bearer 令牌 (健康检查除外)"""
+        if self.api_token and request.path != '/health':
+            if request.headers.get('Authorization') != f"Bearer {self.api_token}":
+                return self._error(401, "无效的令牌")
+        return await handler(request)
+
+    async def handle_speech(self, request: web.Request) -> web.StreamResponse:
+        """POST /v1/audio/speech"""
+        self.stats['requests'] += 1
+        try:
+            body = await request.json()
+            text, params, stream = self._parse_speech_request(body)
+        except (ValueError, TypeError) as e:
+            return self._error(400, str(e))
+
+        try:
+            await self._acquire()
+        except AdmissionError as e:
+            self.stats['rejected'] += 1
+            return self._error(429, str(e), headers={'Retry-After': '1'})
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            return self._error(503, "等待上游超时")
+
+        self.stats['active'] += 1
+        try:
+            if stream:
+                return await self._stream_speech(request, text, params)
+            loop = asyncio.get_running_loop()
+            audio = await loop.run_in_executor(self.executor, self.tts_service.convert_text, text, params)
+            self.stats['bytes'] += len(audio)
+            return web.Response(body=audio, content_type=CONTENT_TYPES[params['response_format']])
+        except ValueError as e:
+            return self._error(400, str(e))
+        except Exception as e:
+            self.stats['failed'] += 1
+            self.logger.error("合成失败", exc_info=True)
+            return self._error(502, f"上游请求失败: {e}")
+        finally:
+            self.stats['active'] -= 1
+            self._semaphore.release()
+
+    async def _acquire(self) -> None:
+        """获取上游名额, 排队过多时拒绝"""
+        if self._semaphore.locked() and self.stats['waiting'] >= self.max_waiting:
+            raise AdmissionError("请求过多, 请稍后重试")
+        self.stats['waiting'] += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        finally:
+            self.stats['waiting'] -= 1
+
+    async def _stream_speech(self, request: web.Request, text: str,
+                             params: Dict[str, Any]) -> web.StreamResponse:
+        """分块返回音频, 首块到达前的错误仍可返回错误状态码"""
+        kwargs = {'chunk_size': self.chunk_size} if self.chunk_size else {}
+        chunks: Iterator[bytes] = self.tts_service.convert_text_stream(text, params, **kwargs)
+        pending: Optional[Future] = None
+        response = None
+        try:
+            while True:
+                pending = self.executor.submit(next, chunks, _DONE)
+                chunk = await asyncio.wrap_future(pending)
+                if chunk is _DONE:
+                    break
+                try:
+                    if response is None:
+                        response = web.StreamResponse(headers={
+                            'Content-Type': CONTENT_TYPES[params['response_format']]
+                        })
+                        response.enable_chunked_encoding()
+                        await response.prepare(request)
+                    await response.write(chunk)
+                except ConnectionResetError:
+                    # 客户端提前断开属于正常情况, 不计为失败
+                    self.logger.debug("客户端已断开, 停止发送")
+                    return response
+                self.stats['bytes'] += len(chunk)
+            if response is None:
+                return web.Response(body=b'', content_type=CONTENT_TYPES[params['response_format']])
+            try:
+                await response.write_eof()
+            except ConnectionResetError:
+                self.logger.debug("客户端已断开, 停止发送")
+            return response
+        except Exception:
+            if response is None:
+                raise
+            # 已开始发送, 无法再返回错误状态, 断开连接让客户端感知
+            self.stats['failed'] += 1
+            self.logger.error("流式合成中断", exc_info=True)
+            if request.transport is not None:
+                request.transport.close()
+            return response
+        finally:
+            # 客户端断开或出错时关闭上游流, 释放连接和预合成
+            self.executor.submit(self._close_stream, chunks, pending)
+
+    @staticmethod
+    def _close_stream(chunks: Iterator[bytes], pending: Optional[Future]) -> None:
+        """等待进行中的读取结束后关闭生成器 (不能与 next 并发执行)"""
+        if pending is not None:
+            wait([pending])
+        chunks.close()
+
+    def _parse_speech_request(self, body: Any):
+        """解析 OpenAI 风格的请求体, 返回 (文本, 转换参数, 是否流式)"""
+        if not isinstance(body, dict):
+            raise ValueError("请求体必须是 JSON 对象")
+        text = body.get('input')
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("缺少 input")
+        response_format = body.get('response_format') or 'mp3'
+        if response_format not in CONTENT_TYPES:
+            raise ValueError(f"不支持的音频格式: {response_format}")
+        params = {
+            'model': body.get('model') or SiliconFlowClient.DEFAULT_MODEL,
+            'voice_id': body.get('voice'),
+            'response_format': response_format,
+            'speed': float(body.get('speed', 1.0)),
+            'gain': float(body.get('gain', 0.0)),
+        }
+        if body.get('sample_rate') is not None:
+            params['sample_rate'] = int(body['sample_rate'])
+        stream = body.get('stream', True)
+        if not isinstance(stream, bool):
+            raise ValueError("stream 必须是布尔值")
+        return text, params, stream
+
+    async def handle_voices(self, request: web.Request) -> web.Response:
+        """GET /v1/audio/voice/list?model=: 默认音色和自定义音色"""
+        model = request.query.get('model') or None
+        loop = asyncio.get_running_loop()
+        voices = await loop.run_in_executor(self.executor, self.tts_service.get_voices, model)
+        if model:
+            defaults = SiliconFlowClient.DEFAULT_VOICES.get(model, [])
+        else:
+            defaults = [voice for voices_ in SiliconFlowClient.DEFAULT_VOICES.values() for voice in voices_]
+        return web.json_response({'default': defaults, 'result': voices.get('result', [])})
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """GET /health: 运行状态和计数"""
+        flights = self.tts_service.flights.stats()
+        health = {'status': 'ok', 'time': time.time(), **self.stats, 'flights': flights}
+        if hasattr(self.tts_service.client, 'pool_stats'):
+            health['keys'] = self.tts_service.client.pool_stats()
+        return web.json_response(health)
+
+    @staticmethod
+    def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> web.Response:
+        """OpenAI 风格的错误响应"""
+        return web.Response(
+            status=status,
+            headers=headers,
+            content_type='application/json',
+            text=json.dumps({'error': {'message': message, 'code': status}}, ensure_ascii=False)
+        )
@@ -0,0 +1,136 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Sequence
+from utils.logger import get_child_logger
+
+
+class ReadAheadScheduler:
+    """分段预合成调度器
+
+    按顺序返回各片段的音频, 当前片段播放 (被消费) 时在后台合成后面的
+    depth 个片段。已完成但尚未消费的音频总量不超过 budget_bytes, 超出时
+    暂停预合成, 直到前面的片段被消费。关闭时取消尚未开始的预合成。
+    """
+    def __init__(self, synthesize: Callable[[str], bytes], segments: Sequence[str],
+                 depth: int = 2, budget_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            synthesize: 合成单个片段的函数, 在工作线程中调用
+            segments: 文本片段
+            depth: 最多提前合成的片段数
+            budget_bytes: 已合成未消费音频的内存上限
+        """
+        self.logger = get_child_logger('read_ahead')
+        self.synthesize = synthesize
+        self.segments = list(segments)
+        self.depth = max(1, depth)
+        self.budget_bytes = budget_bytes
+        self.position = 0
+        self.stats = {'ready': 0, 'waited': 0, 'wait_seconds': 0.0, 'cancelled': 0}
+
+        self._futures: Dict[int, Future] = {}
+        self._buffered = 0
+        # 已计入 _buffered 的片段 (完成回调可能晚于消费执行)
+        self._counted = set()
+        # 已完成片段的总字节数和个数, 用于估算进行中片段的大小
+        self._completed_bytes = 0
+        self._completed_count = 0
+        self._next = 0
+        # 已完成的 future 在 add_done_callback 时立即回调, 需要可重入
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=self.depth, thread_name_prefix='read-ahead'
+        )
+
+    def start(self) -> 'ReadAheadScheduler':
+        """开始预合成 (可在消费前调用, 与首段的流式合成并行)"""
+        self._fill()
+        return self
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            while self.position < len(self.segments):
+                yield self._take(self.position)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """取消所有未完成的预合成"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            for future in self._futures.values():
+                self._discard(future)
+            self._futures.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _take(self, index: int) -> bytes:
+        """取出片段音频, 尚未合成完成时等待"""
+        self._fill()
+        with self._lock:
+            future = self._futures.get(index)
+        if future is None:
+            raise RuntimeError("预合成已关闭")
+
+        if future.done():
+            self.stats['ready'] += 1
+        else:
+            self.stats['waited'] += 1
+            started = time.monotonic()
+            future.result()
+            self.stats['wait_seconds'] += time.monotonic() - started
+            self.logger.debug(f"等待片段 {index} 合成: {time.monotonic() - started:.3f}s")
+        audio = future.result()
+
+        with self._lock:
+            self._futures.pop(index, None)
+            self._release(future)
+            self.position = index + 1
+        # 当前片段开始播放, 补充其后的预合成
+        self._fill()
+        return audio
+
+    def _fill(self) -> None:
+        """在深度和内存预算内提交后续片段"""
+        with self._lock:
+            while (self._executor is not None and self._next < len(self.segments)
+                   and self._next < self.position + self.depth
+                   and (self._next == self.position or self._projected_bytes() < self.budget_bytes)):
+                index = self._next
+                future = self._executor.submit(self.synthesize, self.segments[index])
+                # 先登记再挂回调: 已完成的 future 会立即回调, 需能在 _futures 中找到
+                self._futures[index] = future
+                future.add_done_callback(self._on_done)
+                self._next += 1
+
+    def _projected_bytes(self) -> int:
+        """已缓冲的音频量加上进行中片段的估算大小 (调用方持有锁)"""
+        if not self._completed_count:
+            return self._buffered
+        pending = sum(1 for future in self._futures.values() if future not in self._counted)
+        return self._buffered + pending * self._completed_bytes // self._completed_count
+
+    def _on_done(self, future: Future) -> None:
+        """片段合成完成, 计入已缓冲的音频量"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        size = len(future.result())
+        with self._lock:
+            self._completed_bytes += size
+            self._completed_count += 1
+            if future in self._futures.values():
+                self._counted.add(future)
+                self._buffered += size
+
+    def _discard(self, future: Future) -> None:
+        """取消预合成; 已完成的结果直接释放 (调用方持有锁)"""
+        if future.cancel():
+            self.stats['cancelled'] += 1
+        self._release(future)
+
+    def _release(self, future: Future) -> None:
+        """从已缓冲的音频量中扣除 (调用方持有锁)"""
+        if future in self._counted:
+            self._counted.discard(future)
+            self._buffered -= len(future.result())
@@ -1,45 +1,281 @@
-from typing import Optional, Dict, Any
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterator, List, Callable, Sequence, Union
 from utils.logger import get_child_logger
+from utils.text_segmenter import split_text
+from utils.synthesis_cache import SynthesisCache
+from utils.audio_stitcher import AudioStitcher, StreamingStitcher
+from utils.audio_postprocess import AudioPostProcessor, PostProcessOptions, POSTPROCESS_FORMATS
+from utils.voice_cache import VoiceCatalogCache
+from utils.single_flight import SingleFlight
+from services.read_ahead import ReadAheadScheduler
+from api.base_client import DEFAULT_CHUNK_SIZE
 from api.client_factory import TTSClientFactory
+from models.quality_profile import resolve_sample_rate
 
 class TTSService:
     """文本转语音服务"""
-    def __init__(self, api_key: str, api_url: Optional[str] = None):
+    # 各模型单次请求的最大字符数, 超出时分段转换
+    SEGMENT_CHAR_LIMITS = {
+        "fishaudio/fish-speech-1.5": 500,
+        "fishaudio/fish-speech-1.4": 500,
+        "FunAudioLLM/CosyVoice2-0.5B": 300,
+        "RVC-Boss/GPT-SoVITS": 200
+    }
+    DEFAULT_SEGMENT_CHAR_LIMIT = 300
+    
+    def __init__(self, api_key: Union[str, Sequence[str]], api_url: Optional[str] = None,
+                 provider: str = 'silicon_flow', segment_workers: int = 4,
+                 cache: Optional[SynthesisCache] = None, voice_cache_ttl: float = 300.0,
+                 postprocess: Optional[PostProcessOptions] = None, read_ahead: int = 2,
+                 read_ahead_budget: int = 32 * 1024 * 1024, **client_options):
         self.logger = get_child_logger('tts_service')
-        self.client = TTSClientFactory.create_client('silicon_flow', api_key, api_url)
+        self.client = TTSClientFactory.create_client(
+            provider, api_key, api_url, **client_options
+        )
+        self.segment_workers = max(1, segment_workers)
+        self.cache = cache
+        # 相同请求 (文本和全部参数一致) 同时进行时只请求一次上游
+        self.flights = SingleFlight('tts_flights')
+        # 流式转换时提前合成的片段数和已合成未返回音频的内存上限
+        self.read_ahead = max(1, read_ahead)
+        self.read_ahead_budget = read_ahead_budget
+        # wav/pcm 输出的后处理 (归一化、去静音、交叉淡化), 未启用时为 None
+        self.postprocessor = AudioPostProcessor(postprocess) if postprocess and postprocess.enabled else None
+        
+        # 音色列表快照按账号区分, 避免切换密钥后显示其他账号的音色
+        keys = api_key if isinstance(api_key, str) else ','.join(api_key)
+        account = hashlib.sha256(f"{provider}:{api_url}:{keys}".encode('utf-8')).hexdigest()[:16]
+        self.voice_cache = VoiceCatalogCache(
+            self.client.get_voice_list,
+            cache_file=f'data/cache/voices_{account}.json',
+            ttl=voice_cache_ttl
+        )
+        
+    @classmethod
+    def from_config(cls, get_config: Callable[[str, Any], Any], api_key: str,
+                    api_url: Optional[str] = None) -> 'TTSService':
+        """按配置项创建服务 (界面和命令行共用)
+        Args:
+            get_config: 读取配置项的函数, 参数为 (键, 默认值)
+            api_key: API密钥, 与配置项 api_keys 合并, 多个密钥时使用客户端池
+            api_url: API地址
+        """
+        # 多密钥: 请求按负载分配到各密钥, 被限流的密钥暂停使用
+        keys = [key for key in [api_key, *get_config('api_keys', [])] if key]
+        keys = list(dict.fromkeys(keys))
+        
+        # 连接池配置: pool_size / keepalive_timeout / prewarm
+        # (异步客户端另有 max_concurrency)
+        http_options = dict(get_config('http_pool', {}))
+        # 按接口/模型的限流配置及重试次数, 见 RequestScheduler
+        http_options['rate_limits'] = get_config('rate_limits', None)
+        http_options['max_retries'] = get_config('max_retries', 3)
+        provider = get_config('provider', 'silicon_flow')
+        if len(keys) > 1:
+            # 客户端池配置: throttle_cooldown / auth_cooldown / max_wait
+            http_options['pool_options'] = get_config('key_pool', None)
+        
+        # 音频缓存配置: enabled / dir / max_mb
+        cache_config = get_config('audio_cache', {})
+        cache = None
+        if cache_config.get('enabled', True):
+            cache = SynthesisCache(
+                cache_config.get('dir', 'data/cache/audio'),
+                int(cache_config.get('max_mb', 256)) * 1024 * 1024
+            )
+            
+        # wav/pcm 后处理配置, 字段见 PostProcessOptions
+        postprocess_config = get_config('postprocess', None)
+        postprocess = PostProcessOptions(**postprocess_config) if postprocess_config else None
+            
+        return cls(
+            keys if len(keys) > 1 else api_key,
+            api_url,
+            provider,
+            segment_workers=get_config('segment_workers', 4),
+            cache=cache,
+            voice_cache_ttl=get_config('voice_cache_ttl', 300.0),
+            postprocess=postprocess,
+            read_ahead=get_config('read_ahead_segments', 2),
+            read_ahead_budget=int(get_config('read_ahead_budget_mb', 32) * 1024 * 1024),
+            **http_options
+        )
+        
+    def split_text(self, text: str, model: Optional[str] = None) -> List[str]:
+        """按模型的字符限制将文本切分为若干段"""
+        limit = self.SEGMENT_CHAR_LIMITS.get(model, self.DEFAULT_SEGMENT_CHAR_LIMIT)
+        return split_text(text, limit)
+        
+    @staticmethod
+    def _sample_rate(params: Dict[str, Any]) -> int:
+        """请求的采样率, 未指定时为格式默认值"""
+        return resolve_sample_rate(params.get('response_format', 'mp3'), params.get('sample_rate'))
+        
+    def _cache_key(self, text: str, params: Dict[str, Any]) -> str:
+        """计算片段的缓存键"""
+        return SynthesisCache.make_key(
+            text,
+            params.get('model'),
+            params.get('voice_id'),
+            params.get('response_format', 'mp3'),
+            self._sample_rate(params),
+            params.get('speed', 1.0),
+            params.get('gain', 0.0)
+        )
+        
+    def _synthesize(self, text: str, params: Dict[str, Any]) -> bytes:
+        """转换单个文本片段, 命中缓存时不发起网络请求, 相同请求同时进行时合并"""
+        key = self._cache_key(text, params)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.logger.debug(f"命中音频缓存: {text[:20]}...")
+                return cached
+                
+        return self.flights.do(key, lambda: self._request_speech(key, text, params))
+        
+    def _request_speech(self, key: str, text: str, params: Dict[str, Any]) -> bytes:
+        """请求上游并写入缓存"""
+        audio = self.client.create_speech(
+            text=text,
+            voice_id=params.get('voice_id'),
+            model=params.get('model'),
+            response_format=params.get('response_format', 'mp3'),
+            sample_rate=self._sample_rate(params),
+            speed=params.get('speed', 1.0),
+            gain=params.get('gain', 0.0)
+        )
+        if self.cache:
+            self.cache.put(key, audio)
+        return audio
+        
+    def _join_segments(self, segments: List[bytes], response_format: str) -> bytes:
+        """按顺序拼接各片段的音频数据 (容器层拼接, 不重新编码)"""
+        if len(segments) == 1:
+            return segments[0]
+        return AudioStitcher(response_format).join(segments)
         
     def convert_text(self, text: str, params: Dict[str, Any]) -> bytes:
-        """转换文本到语音"""
+        """转换文本到语音, 长文本分段并发转换后按顺序合并"""
         self.logger.info(f"开始转换文本: {text[:50]}...")
-        return self.client.create_speech(
+        response_format = params.get('response_format', 'mp3')
+        segments = self.split_text(text, params.get('model'))
+        if len(segments) <= 1:
+            results = [self._synthesize(text, params)]
+        else:
+            self.logger.info(f"长文本分为 {len(segments)} 段并发转换")
+            workers = min(self.segment_workers, len(segments))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(lambda segment: self._synthesize(segment, params), segments))
+                
+        if self._needs_postprocess(response_format):
+            return self.postprocessor.process_segments(
+                results, response_format, self._sample_rate(params)
+            )
+        return self._join_segments(results, response_format)
+        
+    def _needs_postprocess(self, response_format: str) -> bool:
+        """该格式的输出是否需要后处理"""
+        return self.postprocessor is not None and response_format in POSTPROCESS_FORMATS
+        
+    def convert_text_stream(self, text: str, params: Dict[str, Any],
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """流式转换文本到语音, 音频数据到达即返回
+        
+        长文本时首段直接流式返回, 其余片段在前一段返回期间预合成, 按顺序依次返回;
+        mp3/pcm 边返回边在容器层拼接, 结果与 convert_text 一致
+        """
+        self.logger.info(f"开始流式转换文本: {text[:50]}...")
+        response_format = params.get('response_format', 'mp3')
+        # 后处理需要完整的采样数据, 处理后一次性返回
+        if self._needs_postprocess(response_format):
+            yield self.convert_text(text, params)
+            return
+            
+        segments = self.split_text(text, params.get('model'))
+        if len(segments) <= 1:
+            yield from self._synthesize_stream(text, params, chunk_size)
+            return
+        
+        # wav/opus 每段自带文件头, 不能直接首尾相接, 合并后一次性返回
+        if response_format in ('wav', 'opus'):
+            yield self.convert_text(text, params)
+            return
+        
+        # 首段流式返回, 同时预合成之后的片段; 消费方提前关闭时取消预合成
+        self.logger.info(f"长文本分为 {len(segments)} 段, 预合成 {self.read_ahead} 段")
+        scheduler = ReadAheadScheduler(
+            lambda segment: self._synthesize(segment, params),
+            segments[1:],
+            depth=self.read_ahead,
+            budget_bytes=self.read_ahead_budget
+        ).start()
+        stitcher = StreamingStitcher(response_format)
+        try:
+            yield from stitcher.segment(self._synthesize_stream(segments[0], params, chunk_size))
+            for audio in scheduler:
+                yield from stitcher.segment([audio])
+        finally:
+            scheduler.close()
+            self.logger.debug(f"预合成统计: {scheduler.stats}")
+        
+    def _synthesize_stream(self, text: str, params: Dict[str, Any],
+                           chunk_size: int) -> Iterator[bytes]:
+        """流式转换单个文本片段, 完整接收后写入缓存; 相同请求同时进行时共用一个数据流"""
+        key = self._cache_key(text, params)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.logger.debug(f"命中音频缓存: {text[:20]}...")
+                yield cached
+                return
+                
+        yield from self.flights.stream(key, lambda: self._request_speech_stream(key, text, params, chunk_size))
+        
+    def _request_speech_stream(self, key: str, text: str, params: Dict[str, Any],
+                               chunk_size: int) -> Iterator[bytes]:
+        """流式请求上游, 完整接收后写入缓存"""
+        buffer = bytearray()
+        for chunk in self.client.create_speech_stream(
             text=text,
+            chunk_size=chunk_size,
             voice_id=params.get('voice_id'),
             model=params.get('model'),
             response_format=params.get('response_format', 'mp3'),
-            sample_rate=params.get('sample_rate', 32000),
+            sample_rate=self._sample_rate(params),
             speed=params.get('speed', 1.0),
             gain=params.get('gain', 0.0)
-        )
+        ):
+            if self.cache:
+                buffer.extend(chunk)
+            yield chunk
+        if self.cache:
+            self.cache.put(key, bytes(buffer))
+            
+    def close(self) -> None:
+        """不再使用本服务时调用, 客户端已被新密钥替换时关闭其连接"""
+        TTSClientFactory.release(self.client)
+        
+    def flight_stats(self) -> Dict[str, Any]:
+        """相同请求合并统计 (含各请求的等待者数)"""
+        return {**self.flights.stats(), 'waiters': self.flights.waiters()}
         
-    def get_voices(self, model: str = None) -> Dict[str, Any]:
-        """获取指定模型的音色列表"""
+    def cache_stats(self) -> Dict[str, Any]:
+        """获取音频缓存统计"""
+        return self.cache.stats() if self.cache else {}
+        
+    def get_voices(self, model: str = None, refresh: bool = False) -> Dict[str, Any]:
+        """获取指定模型的音色列表 (优先使用缓存快照)
+        Args:
+            model: 指定模型, 为None时返回全部音色
+            refresh: 是否忽略快照强制重新拉取
+        """
         try:
             self.logger.info(f"获取音色列表, 模型: {model}")
-            response = self.client.get_voice_list()
-            
-            if not isinstance(response, dict):
-                self.logger.error(f"获取音色列表返回格式错误: {response}")
-                return {'result': []}
-            
-            if model:
-                # 如果指定了模型，只返回该模型的音色
-                filtered_voices = [
-                    v for v in response.get('result', [])
-                    if v.get('model') == model
-                ]
-                return {'result': filtered_voices}
-            
-            return response
+            if refresh:
+                self.voice_cache.refresh()
+            return {'result': self.voice_cache.get(model)}
         except Exception as e:
             self.logger.error("获取音色列表失败", exc_info=True)
             return {'result': []}
@@ -47,7 +283,9 @@ class TTSService:
     def delete_voice(self, voice_id: str) -> Dict[str, Any]:
         """删除音色"""
         self.logger.info(f"删除音色: {voice_id}")
-        return self.client.delete_voice(voice_id)
+        result = self.client.delete_voice(voice_id)
+        self.voice_cache.remove_voice(voice_id)
+        return result
         
     def upload_voice(self, voice_name: str, model: str, audio_data: bytes, text: str):
         """上传自定义音色
@@ -58,9 +296,46 @@ class TTSService:
             text: 音频对应的文本内容
         """
         self.logger.info(f"上传音色: {voice_name}")
-        return self.client.upload_voice(
+        result = self.client.upload_voice(
             audio_data=audio_data,
             model=model,
             custom_name=voice_name,
             text=text
-        ) 
\ No newline at end of file
+        )
+        self._add_uploaded_voice(result, voice_name, model, text)
+        return result
+        
+    def upload_voice_file(self, voice_name: str, model: str, file_path: str, text: str,
+                          progress_callback: Optional[Callable[[int, int], None]] = None):
+        """从文件流式上传自定义音色
+        Args:
+            voice_name: 音色名称
+            model: 模型ID
+            file_path: 音频文件路径
+            text: 音频对应的文本内容
+            progress_callback: 进度回调, 参数为 (已发送字节数, 文件大小)
+        """
+        self.logger.info(f"上传音色: {voice_name}")
+        result = self.client.upload_voice_file(
+            file_path=file_path,
+            model=model,
+            custom_name=voice_name,
+            text=text,
+            progress_callback=progress_callback
+        )
+        self._add_uploaded_voice(result, voice_name, model, text)
+        return result
+        
+    def _add_uploaded_voice(self, result: Dict[str, Any], voice_name: str,
+                            model: str, text: str) -> None:
+        """将上传成功的音色写入快照, 返回结果缺少 uri 时改为使快照过期"""
+        uri = result.get('uri') if isinstance(result, dict) else None
+        if uri:
+            self.voice_cache.add_voice({
+                'model': model,
+                'customName': voice_name,
+                'text': text,
+                'uri': uri
+            })
+        else:
+            self.voice_cache.invalidate()
\ No newline at end of file
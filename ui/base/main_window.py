@@ -55,6 +55,9 @@ class BaseMainWindow(QMainWindow):
     def closeEvent(self, event):
         """窗口关闭事件"""
         try:
+            # 取消转换任务并等待后台任务结束
+            self.core.job_queue.shutdown()
+            self.core.task_mgr.shutdown()
             # 清理临时文件
             self.core.audio_mgr.cleanup()
             event.accept()
@@ -1,30 +1,18 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox,
                            QComboBox, QDoubleSpinBox, QTextEdit, QPushButton)
 from utils.logger import get_child_logger
 from api.silicon_flow_client import SiliconFlowClient
+from models.quality_profile import (FORMAT_SAMPLE_RATES, FORMAT_DEFAULT_RATES, QUALITY_PROFILES,
+                                    estimate_bytes_per_second)
 
 class ConversionPanel(QWidget):
     """转换控制面板"""
-    # 定义格式与采样率的对应关系
-    FORMAT_SAMPLE_RATES = {
-        'opus': [48000],
-        'wav': [8000, 16000, 24000, 32000, 44100],
-        'pcm': [8000, 16000, 24000, 32000, 44100],
-        'mp3': [32000, 44100]
-    }
-    
-    # 格式默认采样率
-    FORMAT_DEFAULT_RATES = {
-        'opus': 48000,
-        'wav': 44100,
-        'pcm': 44100,
-        'mp3': 44100
-    }
-    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.logger = get_child_logger('conversion_panel')
         self.parent = parent
+        # 按档位设置格式/采样率时不触发"切换为自定义"
+        self._applying_profile = False
         
         self._init_ui()
         
@@ -60,6 +48,18 @@ class ConversionPanel(QWidget):
         voice_layout.addWidget(self.voice_combo)
         layout.addLayout(voice_layout)
         
+        # 质量档位: 决定请求的格式和采样率
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("质量:"))
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItem("自定义", None)
+        for name, profile in QUALITY_PROFILES.items():
+            self.profile_combo.addItem(
+                f"{profile.label} ≈{profile.bytes_per_second / 1024:.1f} KB/s", name
+            )
+        profile_layout.addWidget(self.profile_combo)
+        layout.addLayout(profile_layout)
+        
         # 格式选择
         format_layout = QHBoxLayout()
         format_layout.addWidget(QLabel("格式:"))
@@ -75,8 +75,13 @@ class ConversionPanel(QWidget):
         sample_rate_layout.addWidget(QLabel("采样率:"))
         self.sample_rate_combo = QComboBox()
         sample_rate_layout.addWidget(self.sample_rate_combo)
+        self.sample_rate_combo.currentTextChanged.connect(self._on_sample_rate_changed)
         layout.addLayout(sample_rate_layout)
         
+        # 预计下载带宽
+        self.bandwidth_label = QLabel()
+        layout.addWidget(self.bandwidth_label)
+        
         # 语速调节
         speed_layout = QHBoxLayout()
         speed_layout.addWidget(QLabel("语速:"))
@@ -97,51 +102,107 @@ class ConversionPanel(QWidget):
         gain_layout.addWidget(self.gain_input)
         layout.addLayout(gain_layout)
         
+        # 本地预览: 只调整语速/增益时在本地重新渲染, 不调用接口
+        self.preview_check = QCheckBox("本地预览 (调整语速/增益时不重新请求)")
+        self.preview_check.setChecked(bool(self.parent.core.get_config('local_preview', False)))
+        self.preview_check.toggled.connect(
+            lambda checked: self.parent.core.save_config({'local_preview': checked})
+        )
+        layout.addWidget(self.preview_check)
+        
         # 文本输入
         self.text_input = QTextEdit()
         self.text_input.setPlaceholderText("请输入要转换的文本...")
         layout.addWidget(self.text_input)
         
         # 转换按钮
+        button_layout = QHBoxLayout()
         self.convert_button = QPushButton("开始转换")
-        layout.addWidget(self.convert_button)
+        button_layout.addWidget(self.convert_button)
+        # 导出按钮: 始终按当前参数请求接口
+        self.export_button = QPushButton("导出")
+        button_layout.addWidget(self.export_button)
+        layout.addLayout(button_layout)
         
         self.setLayout(layout)
         
         # 连接信号
         self.model_combo.currentIndexChanged.connect(self.parent.on_model_changed)
-        self.convert_button.clicked.connect(self.parent.convert_text) 
+        self.convert_button.clicked.connect(self.parent.convert_text)
+        self.export_button.clicked.connect(self.parent.export_text)
 
         # 初始化采样率选项
         self._update_sample_rates('mp3')
+        
+        # 恢复上次的质量档位
+        self.profile_combo.currentIndexChanged.connect(self._on_profile_changed)
+        index = self.profile_combo.findData(self.parent.core.get_config('quality_profile'))
+        if index > 0:
+            self.profile_combo.setCurrentIndex(index)
+
+    def _on_profile_changed(self, index: int):
+        """质量档位变更: 设置对应的格式和采样率"""
+        name = self.profile_combo.itemData(index)
+        self.parent.core.save_config({'quality_profile': name})
+        if name is None:
+            return
+        profile = QUALITY_PROFILES[name]
+        self._applying_profile = True
+        try:
+            self.format_combo.setCurrentText(profile.response_format)
+            self.sample_rate_combo.setCurrentText(str(profile.sample_rate))
+        finally:
+            self._applying_profile = False
+        self._update_bandwidth()
 
     def _on_format_changed(self, format_name: str):
         """输出格式变更处理"""
         self._update_sample_rates(format_name)
         
+    def _on_sample_rate_changed(self, text: str):
+        """采样率变更: 与当前档位不一致时切换为自定义"""
+        if not text:
+            return
+        self._update_bandwidth()
+        name = self.profile_combo.currentData()
+        if self._applying_profile or name is None:
+            return
+        profile = QUALITY_PROFILES[name]
+        if (self.format_combo.currentText(), int(text)) != (profile.response_format, profile.sample_rate):
+            self.profile_combo.setCurrentIndex(0)
+            
+    def _update_bandwidth(self):
+        """显示当前格式和采样率的预计下载带宽"""
+        rate = self.sample_rate_combo.currentText()
+        if not rate:
+            return
+        bytes_per_second = estimate_bytes_per_second(self.format_combo.currentText(), int(rate))
+        self.bandwidth_label.setText(f"预计下载: {bytes_per_second / 1024:.1f} KB/s 音频")
+        
     def _update_sample_rates(self, format_name: str):
         """更新采样率选项"""
         self.sample_rate_combo.clear()
         
         # 获取当前格式支持的采样率
-        sample_rates = self.FORMAT_SAMPLE_RATES.get(format_name, [])
+        sample_rates = FORMAT_SAMPLE_RATES.get(format_name, [])
         
         # 添加采样率选项
         for rate in sample_rates:
             self.sample_rate_combo.addItem(str(rate))
             
         # 设置默认采样率
-        default_rate = self.FORMAT_DEFAULT_RATES.get(format_name)
+        default_rate = FORMAT_DEFAULT_RATES.get(format_name)
         if default_rate:
             self.sample_rate_combo.setCurrentText(str(default_rate))
 
     def refresh_voices(self, model: str = None):
-        """刷新音色列表
+        """刷新音色列表 (自定义音色在后台获取)
         Args:
             model: 指定模型，如果为None则获取当前选中的模型
         """
         try:
-            if not self.parent.core.tts_service:
+            tts_service = self.parent.core.tts_service
+            if not tts_service:
                 return
                 
             # 如果没有传入模型，则使用当前选中的模型
@@ -150,39 +211,55 @@ class ConversionPanel(QWidget):
             
             self.logger.debug(f"刷新音色列表，当前模型: {model}")
             
-            # 清空当前列表
-            self.voice_combo.clear()
-            
-            # 先添加默认音色
-            default_voices = SiliconFlowClient.DEFAULT_VOICES.get(model, [])
-            for voice in default_voices:
-                name = voice.split(':')[-1]  # 获取音色名称
-                self.voice_combo.addItem(f"默认音色: {name}", voice)
-                self.logger.debug(f"添加默认音色: {name} -> {voice}")
+            # 后台获取自定义音色列表, 同一模型的重复刷新会被合并
+            self.parent.core.task_mgr.run(
+                f"voices:{model}",
+                tts_service.get_voices,
+                model,
+                on_success=lambda voices: self._populate_voices(model, voices),
+                on_error=lambda error: self._populate_voices(model, {'result': []})
+            )
+                    
+        except Exception as e:
+            self.logger.error("刷新音色列表失败", exc_info=True)
             
-            # 获取自定义音色列表
-            voices = self.parent.core.tts_service.get_voices(model)
+    def _populate_voices(self, model: str, voices: dict):
+        """填充音色下拉框"""
+        # 模型已切换时丢弃过期结果
+        if model != self.model_combo.currentData():
+            return
             
-            # 添加自定义音色
-            for voice in voices.get('result', []):
-                if isinstance(voice, dict):
-                    name = voice.get('customName', '')
-                    uri = voice.get('uri', '')
-                    voice_model = voice.get('model', '')
-                    # 只添加当前模型的音色
-                    if name and uri and (not model or voice_model == model):
-                        self.voice_combo.addItem(f"自定义音色: {name}", uri)
-                        self.logger.debug(f"添加自定义音色: {name} -> {uri}")
-                    
-            # 如果有保存的上次选择，则设置为当前选择
-            last_voice = self.parent.core.get_config('last_voice')
-            if last_voice:
-                index = self.voice_combo.findData(last_voice)
+        # 保留当前选择, 刷新后尽量恢复
+        current_voice = self.voice_combo.currentData()
+        
+        # 清空当前列表
+        self.voice_combo.clear()
+        
+        # 先添加默认音色
+        default_voices = SiliconFlowClient.DEFAULT_VOICES.get(model, [])
+        for voice in default_voices:
+            name = voice.split(':')[-1]  # 获取音色名称
+            self.voice_combo.addItem(f"默认音色: {name}", voice)
+            self.logger.debug(f"添加默认音色: {name} -> {voice}")
+        
+        # 添加自定义音色
+        for voice in voices.get('result', []):
+            if isinstance(voice, dict):
+                name = voice.get('customName', '')
+                uri = voice.get('uri', '')
+                voice_model = voice.get('model', '')
+                # 只添加当前模型的音色
+                if name and uri and (not model or voice_model == model):
+                    self.voice_combo.addItem(f"自定义音色: {name}", uri)
+                    self.logger.debug(f"添加自定义音色: {name} -> {uri}")
+                
+        # 如果有保存的上次选择，则设置为当前选择
+        for voice_id in (current_voice, self.parent.core.get_config('last_voice')):
+            if voice_id:
+                index = self.voice_combo.findData(voice_id)
                 if index >= 0:
                     self.voice_combo.setCurrentIndex(index)
-                    
-        except Exception as e:
-            self.logger.error("刷新音色列表失败", exc_info=True)
+                    break
             
     def update_model_settings(self, model):
         """更新模型相关设置"""
@@ -1,29 +1,141 @@
-from PyQt6.QtCore import QThread, pyqtSignal
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+from api.base_client import DEFAULT_CHUNK_SIZE
+from utils.audio_formats import DurationCounter
+from utils.audio_writer import AtomicAudioWriter
 from utils.logger import get_child_logger
 
-class ConversionWorker(QThread):
-    """文本转语音转换线程"""
-    finished = pyqtSignal(object)
-    error = pyqtSignal(str)
-    
-    def __init__(self, tts_service, text, params):
+
+@dataclass
+class ConversionResult:
+    """转换结果: 音频已写入文件, 只传递路径和元数据"""
+    path: str
+    size: int
+    response_format: str
+    ttfb: Optional[float]
+    elapsed: float
+    # 音频时长 (秒), 在工作线程中边接收边统计, 无法确定时为 None
+    duration: Optional[float] = None
+
+
+def output_filename(text: str, job_id: str, response_format: str) -> str:
+    """生成输出文件名: 文本前20个字符 (仅保留汉字、字母、数字和下划线) + 时间戳 + 任务ID"""
+    name = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9_]', '', text[:20])
+    return f"{name}_{int(time.time())}_{job_id}.{response_format}"
+
+
+class ConversionSignals(QObject):
+    """转换任务信号, 第一个参数均为任务ID"""
+    started = pyqtSignal(str)
+    # 参数为 ConversionResult
+    finished = pyqtSignal(str, object)
+    error = pyqtSignal(str, str)
+    cancelled = pyqtSignal(str)
+    # 收到首个数据块时发出, 参数为首字节耗时(秒)
+    first_chunk = pyqtSignal(str, float)
+
+
+class ConversionWorker(QRunnable):
+    """文本转语音转换任务 (在线程池中执行)"""
+    def __init__(self, job_id, tts_service, text, params, signals: ConversionSignals,
+                 chunk_size=DEFAULT_CHUNK_SIZE, sink_factory=None, output_dir='output'):
         super().__init__()
+        # 由任务队列持有引用, 不交给线程池释放
+        self.setAutoDelete(False)
         self.logger = get_child_logger('worker')
-        self.logger.info("初始化转换线程...")
+        self.logger.info(f"初始化转换任务: {job_id}")
+        self.job_id = job_id
         self.tts_service = tts_service
         self.text = text
         self.params = params
+        self.signals = signals
+        self.chunk_size = chunk_size
+        # 收到首块数据时调用, 返回带 feed/finish/stop 方法的流 (如边下载边播放)
+        self.sink_factory = sink_factory
+        # 音频边接收边写入此目录, 不在内存中保留完整数据
+        self.output_dir = output_dir
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """请求取消任务, 在收到下一块数据时生效"""
+        self._cancel_event.set()
+        
+    def is_cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._cancel_event.is_set()
         
     def run(self):
+        if self.is_cancelled():
+            self.signals.cancelled.emit(self.job_id)
+            return
+            
+        stream = None
+        sink = None
+        writer = None
         try:
-            self.logger.info("开始文本转语音任务...")
+            self.logger.info(f"开始文本转语音任务: {self.job_id}")
             self.logger.debug(f"转换参数: {self.params}")
-            result = self.tts_service.convert_text(
+            self.signals.started.emit(self.job_id)
+            started = time.monotonic()
+            ttfb = None
+            response_format = self.params.get('response_format', 'mp3')
+            writer = AtomicAudioWriter(os.path.join(
+                self.output_dir, output_filename(self.text, self.job_id, response_format)
+            ))
+            # 播放排队时需要时长, 在此统计, 避免在界面线程中重新读取整个文件
+            counter = DurationCounter(response_format)
+            stream = self.tts_service.convert_text_stream(
                 text=self.text,
-                params=self.params
+                params=self.params,
+                chunk_size=self.chunk_size
             )
-            self.logger.info("转换任务完成")
-            self.finished.emit(result)
+            for chunk in stream:
+                if self.is_cancelled():
+                    self.logger.info(f"转换任务已取消: {self.job_id}")
+                    self.signals.cancelled.emit(self.job_id)
+                    return
+                if ttfb is None:
+                    ttfb = time.monotonic() - started
+                    self.logger.debug(f"首字节耗时: {ttfb:.3f}s")
+                    self.signals.first_chunk.emit(self.job_id, ttfb)
+                    sink = self._open_sink()
+                writer.feed(chunk)
+                counter.feed(chunk)
+                if sink is not None:
+                    sink.feed(chunk)
+            if sink is not None:
+                sink.finish()
+                sink = None
+            path = writer.finish()
+            result = ConversionResult(path, writer.size, response_format, ttfb,
+                                      time.monotonic() - started, counter.duration)
+            writer = None
+            self.logger.info(f"转换任务完成: {self.job_id}")
+            self.signals.finished.emit(self.job_id, result)
         except Exception as e:
-            self.logger.error("转换任务失败", exc_info=True)
-            self.error.emit(str(e)) 
\ No newline at end of file
+            self.logger.error(f"转换任务失败: {self.job_id}", exc_info=True)
+            self.signals.error.emit(self.job_id, str(e))
+        finally:
+            # 提前结束时关闭流, 释放网络连接
+            if stream is not None:
+                stream.close()
+            if sink is not None:
+                sink.stop()
+            # 未完成的临时文件直接删除
+            if writer is not None:
+                writer.stop()
+                
+    def _open_sink(self):
+        """创建数据流接收方, 失败时只记录日志, 不影响转换"""
+        if self.sink_factory is None:
+            return None
+        try:
+            return self.sink_factory(self.job_id)
+        except Exception:
+            self.logger.error(f"创建数据流接收方失败: {self.job_id}", exc_info=True)
+            return None
@@ -1,4 +1,4 @@
-from PyQt6.QtWidgets import QStatusBar, QProgressBar
+from PyQt6.QtWidgets import QStatusBar, QProgressBar, QLabel
 from utils.logger import get_child_logger
 
 class MainStatusBar(QStatusBar):
@@ -17,6 +17,10 @@ class MainStatusBar(QStatusBar):
         self.progress_bar.hide()
         self.addWidget(self.progress_bar)
         
+        # 任务计数
+        self.jobs_label = QLabel()
+        self.addPermanentWidget(self.jobs_label)
+        
     def show_message(self, message: str, timeout: int = 0):
         """显示状态消息"""
         self.logger.debug(f"状态栏消息: {message}")
@@ -28,4 +32,11 @@ class MainStatusBar(QStatusBar):
             self.progress_bar.setRange(0, 0)  # 设置为忙碌状态
             self.progress_bar.show()
         else:
-            self.progress_bar.hide() 
\ No newline at end of file
+            self.progress_bar.hide()
+            
+    def show_jobs(self, running: int, queued: int):
+        """显示任务计数"""
+        if running or queued:
+            self.jobs_label.setText(f"进行中: {running}  排队: {queued}")
+        else:
+            self.jobs_label.clear() 
\ No newline at end of file
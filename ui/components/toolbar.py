@@ -27,6 +27,11 @@ class MainToolBar(QToolBar):
         upload_button.clicked.connect(self.parent.upload_voice)
         self.addWidget(upload_button)
         
+        # 取消转换任务按钮
+        cancel_button = QPushButton("取消任务")
+        cancel_button.clicked.connect(self.parent.cancel_conversions)
+        self.addWidget(cancel_button)
+        
         # 选择输出目录按钮
         output_button = QPushButton("输出目录")
         output_button.clicked.connect(self.parent.select_output_directory)
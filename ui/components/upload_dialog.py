@@ -125,29 +125,62 @@ class UploadVoiceDialog(QDialog):
                 self.parent.show_warning("请输入音频对应的文本内容!")
                 return
                 
-            # 读取音频文件
-            with open(file_path, 'rb') as f:
-                audio_data = f.read()
-                
-            # 上传音色
+            # 上传在后台执行
             self.logger.info(f"开始上传音色: {name}")
-            result = self.tts_service.upload_voice(
-                voice_name=name,
-                model=model,
-                audio_data=audio_data,
-                text=text
+            self.upload_button.setEnabled(False)
+            self.upload_button.setText("上传中...")
+            self.parent.core.task_mgr.run(
+                f"upload_voice:{name}",
+                self._read_and_upload,
+                file_path,
+                name,
+                model,
+                text,
+                on_success=lambda result: self._on_uploaded(name),
+                on_error=self._on_upload_error
             )
             
-            self.parent.show_info(f"音色 {name} 上传成功!")
-            
-            # 刷新主窗口的音色列表，传入当前选中的模型
-            if hasattr(self.parent, 'conversion_panel'):
-                # 获取当前选中的模型
-                current_model = self.model_combo.currentData()
-                self.parent.conversion_panel.refresh_voices(current_model)
-            
-            self.accept()
-            
         except Exception as e:
             self.logger.error("上传音色失败", exc_info=True)
-            self.parent.show_error(f"上传失败: {str(e)}") 
\ No newline at end of file
+            self.parent.show_error(f"上传失败: {str(e)}")
+            
+    def _read_and_upload(self, file_path: str, name: str, model: str, text: str):
+        """流式上传音频文件 (后台线程)"""
+        last_percent = [-1]
+        
+        def on_progress(sent: int, total: int):
+            # 只在百分比变化时通知界面
+            percent = sent * 100 // total if total else 100
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self.parent.core.task_mgr.call_in_gui(self._on_upload_progress, percent)
+                
+        return self.tts_service.upload_voice_file(
+            voice_name=name,
+            model=model,
+            file_path=file_path,
+            text=text,
+            progress_callback=on_progress
+        )
+        
+    def _on_upload_progress(self, percent: int):
+        """上传进度回调"""
+        self.upload_button.setText(f"上传中 {percent}%")
+        
+    def _on_uploaded(self, name: str):
+        """上传成功回调"""
+        self.parent.show_info(f"音色 {name} 上传成功!")
+        
+        # 刷新主窗口的音色列表，传入当前选中的模型
+        if hasattr(self.parent, 'conversion_panel'):
+            # 获取当前选中的模型
+            current_model = self.model_combo.currentData()
+            self.parent.conversion_panel.refresh_voices(current_model)
+        
+        self.accept()
+        
+    def _on_upload_error(self, error: str):
+        """上传失败回调"""
+        self.upload_button.setEnabled(True)
+        self.upload_button.setText("上传")
+        self.parent.show_error(f"上传失败: {error}") 
\ No newline at end of file
@@ -56,7 +56,7 @@ class VoiceListDialog(QDialog):
         # 添加底部按钮
         button_layout = QHBoxLayout()
         refresh_button = QPushButton("刷新")
-        refresh_button.clicked.connect(self.refresh_voices)
+        refresh_button.clicked.connect(lambda: self.refresh_voices(force=True))
         close_button = QPushButton("关闭")
         close_button.clicked.connect(self.accept)
         button_layout.addWidget(refresh_button)
@@ -66,15 +66,27 @@ class VoiceListDialog(QDialog):
         
         self.setLayout(layout)
         
-    def refresh_voices(self):
-        """刷新音色列表"""
+    def refresh_voices(self, force: bool = False):
+        """刷新音色列表 (在后台获取)
+        Args:
+            force: 是否忽略缓存快照重新拉取
+        """
+        try:
+            self.parent.core.task_mgr.run(
+                f"voice_list:{force}",
+                self.parent.core.tts_service.get_voices,
+                refresh=force,
+                on_success=self._populate_table
+            )
+        except Exception as e:
+            self.logger.error("刷新音色列表失败", exc_info=True)
+            
+    def _populate_table(self, voices: dict):
+        """填充音色表格"""
         try:
             # 清空表格
             self.voice_table.setRowCount(0)
             
-            # 获取音色列表
-            voices = self.parent.core.tts_service.get_voices()
-            
             # 添加音色项
             for voice in voices.get('result', []):
                 if isinstance(voice, dict):
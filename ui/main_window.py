@@ -3,10 +3,10 @@ from ui.base.main_window import BaseMainWindow
 from ui.components.settings_dialog import SettingsDialog
 from ui.components.voice_list_dialog import VoiceListDialog
 from ui.components.upload_dialog import UploadVoiceDialog
-import re
-import base64
+from ui.managers.job_queue import JobStatus
+import hashlib
 import os
-import time
+import threading
 
 class MainWindow(BaseMainWindow):
     """主窗口"""
@@ -14,6 +14,18 @@ class MainWindow(BaseMainWindow):
         super().__init__()
         self.logger.info("初始化主窗口...")
         self.init_ui()
+        self.watch_voice_cache()
+        # 正在边下载边播放的任务ID, 完成后不再重复播放
+        self._streamed_jobs = set()
+        # 多个工作线程可能同时收到首块数据, 只有一个任务能开始流式播放
+        self._stream_lock = threading.Lock()
+        
+        # 转换任务信号只需连接一次, 通过任务ID区分
+        job_queue = self.core.job_queue
+        job_queue.job_status_changed.connect(self._on_job_status_changed)
+        job_queue.job_first_chunk.connect(self._on_first_chunk)
+        job_queue.job_finished.connect(self._on_conversion_finished)
+        job_queue.job_failed.connect(self._on_conversion_error)
         
     def select_output_directory(self):
         """选择输出目录"""
@@ -27,7 +39,13 @@ class MainWindow(BaseMainWindow):
             self.status_bar.show_message(f"已设置输出目录: {directory}", 3000)
         
     def on_model_changed(self, index):
-        """模型变更回调"""
+        """模型变更回调 (快速连续切换时只处理最后一次)"""
+        # 旧模型的音色不能用于新模型, 先清空等待刷新
+        self.conversion_panel.voice_combo.clear()
+        self.core.task_mgr.debounce('model_changed', 300, self._apply_model_change)
+        
+    def _apply_model_change(self):
+        """应用模型变更"""
         model = self.conversion_panel.model_combo.currentData()
         self.logger.info(f"切换模型: {model}")
         
@@ -38,69 +56,178 @@ class MainWindow(BaseMainWindow):
         self.core.save_config({'last_model': model})
         
     def convert_text(self):
-        """转换文本"""
+        """转换文本 (开启本地预览且有缓存时在本地重新渲染)"""
         try:
-            if not self.core.tts_service:
-                self.show_error("请先设置API密钥!")
+            text, params = self._collect_conversion()
+            if text is None:
                 return
                 
-            text = self.conversion_panel.text_input.toPlainText()
-            if not text:
-                self.show_warning("请输入要转换的文本!")
+            # 文本、音色和模型未变时, 语速/增益在本地调整, 不调用接口
+            if self.conversion_panel.preview_check.isChecked() and self.core.preview.has(text, params):
+                self._render_preview(text, params)
                 return
                 
-            # 获取转换参数
-            params = {
-                'voice_id': self.conversion_panel.voice_combo.currentData(),
-                'model': self.conversion_panel.model_combo.currentData(),
-                'sample_rate': int(self.conversion_panel.sample_rate_combo.currentText()),
-                'speed': self.conversion_panel.speed_input.value(),
-                'gain': self.conversion_panel.gain_input.value(),
-                'response_format': self.conversion_panel.format_combo.currentText()
-            }
-            
-            # 开始转换
-            self.status_bar.show_progress(True)
-            worker = self.core.start_conversion(text, params)
-            worker.finished.connect(self._on_conversion_finished)
-            worker.error.connect(self._on_conversion_error)
-            worker.start()
+            self._submit_conversion(text, params)
             
         except Exception as e:
             self.logger.error("转换失败", exc_info=True)
             self.show_error(f"转换失败: {str(e)}")
-            self.status_bar.show_progress(False)
             
-    def _on_conversion_finished(self, result):
-        """转换完成回调"""
+    def export_text(self):
+        """导出: 始终按当前参数通过接口合成"""
         try:
-            # 获取输出目录
-            output_dir = self.core.get_config('output_dir', 'output')
+            text, params = self._collect_conversion()
+            if text is None:
+                return
+            self._submit_conversion(text, params)
+        except Exception as e:
+            self.logger.error("导出失败", exc_info=True)
+            self.show_error(f"导出失败: {str(e)}")
             
-            # 生成文件名 (使用前20个字符作为文件名)
-            text = self.conversion_panel.text_input.toPlainText()[:20]
-            # 文件名去掉换行符，逗号，引号，感叹号，问号等等特殊字符，仅保留汉字和字母及下划线
-            filename = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9_]', '', text)
-            filename = f"{filename}_{int(time.time())}.{self.conversion_panel.format_combo.currentText()}"
+    def _collect_conversion(self):
+        """读取待转换的文本和参数, 校验失败时返回 (None, None)"""
+        if not self.core.tts_service:
+            self.show_error("请先设置API密钥!")
+            return None, None
             
-            # 保存音频文件
-            filepath = self.core.audio_mgr.save_audio(result, filename, output_dir)
+        text = self.conversion_panel.text_input.toPlainText()
+        if not text:
+            self.show_warning("请输入要转换的文本!")
+            return None, None
+            
+        # 获取转换参数
+        params = {
+            'voice_id': self.conversion_panel.voice_combo.currentData(),
+            'model': self.conversion_panel.model_combo.currentData(),
+            'sample_rate': int(self.conversion_panel.sample_rate_combo.currentText()),
+            'speed': self.conversion_panel.speed_input.value(),
+            'gain': self.conversion_panel.gain_input.value(),
+            'response_format': self.conversion_panel.format_combo.currentText()
+        }
+        return text, params
+        
+    def _submit_conversion(self, text: str, params: dict):
+        """提交转换任务, 可连续提交多个"""
+        sink_factory = self._open_playback_stream if self.core.get_config('progressive_playback', True) else None
+        # 关闭自动保存时写入临时目录, 退出时清理
+        output_dir = None if self.core.get_config('auto_save', True) else self.core.audio_mgr.temp_dir
+        job_id = self.core.start_conversion(text, params, sink_factory=sink_factory,
+                                            output_dir=output_dir)
+        self.status_bar.show_message(f"已提交转换任务 #{job_id}", 3000)
+        
+    def _render_preview(self, text: str, params: dict):
+        """在后台按新的语速/增益渲染并播放"""
+        self.status_bar.show_message("正在本地渲染预览...")
+        # 相同的预览请求会合并, 标识需包含文本和音色
+        source = hashlib.sha256(f"{params['voice_id']}:{text}".encode('utf-8')).hexdigest()[:16]
+        self.core.task_mgr.run(
+            f"preview:{source}:{params['speed']}:{params['gain']}",
+            self.core.preview.render,
+            text,
+            params,
+            on_success=self._play_preview,
+            on_error=lambda error: self.show_error(f"本地预览失败: {error}")
+        )
+        
+    def _play_preview(self, audio):
+        """播放本地渲染的预览"""
+        if audio is None:
+            return
+        self.core.audio_mgr.play(audio, format_hint='wav')
+        self.status_bar.show_message("本地预览 (未请求接口, 点击导出生成最终音频)", 5000)
+        
+    def _store_preview(self, text: str, params: dict, path: str):
+        """解码合成结果并保存, 供本地预览 (后台线程)"""
+        with open(path, 'rb') as f:
+            audio = f.read()
+        decoded = self.core.audio_mgr.decode_pcm(
+            audio, params['response_format'], params.get('sample_rate', 32000)
+        )
+        if decoded is None:
+            self.logger.info(f"无法解码 {params['response_format']}, 不保存预览数据")
+            return
+        pcm, sample_rate, channels = decoded
+        self.core.preview.store(text, params, pcm, sample_rate, channels)
+        
+    def _open_playback_stream(self, job_id: str):
+        """收到首块数据时开始边下载边播放 (在工作线程中调用)
+
+        已有任务在流式播放或有音频在播放/排队时不打断, 返回 None,
+        完成后从文件排队播放。
+        """
+        job = self.core.job_queue.get_job(job_id)
+        with self._stream_lock:
+            if self._streamed_jobs or self.core.audio_mgr.is_playing():
+                self.logger.debug(f"任务 #{job_id} 等待当前播放结束, 完成后排队播放")
+                return None
+            stream = self.core.audio_mgr.open_stream(
+                job.params['response_format'],
+                job.params.get('sample_rate'),
+                jitter_ms=self.core.get_config('jitter_buffer_ms', 300),
+                on_underrun=lambda count: self.core.task_mgr.call_in_gui(self._on_playback_underrun, job_id, count)
+            )
+            if stream is not None:
+                self._streamed_jobs.add(job_id)
+            return stream
+        
+    def _on_playback_underrun(self, job_id: str, count: int):
+        """播放缓冲欠载回调"""
+        self.status_bar.show_message(f"任务 #{job_id} 网络较慢, 播放缓冲中... (欠载 {count} 次)", 3000)
+        
+    def cancel_conversions(self):
+        """取消所有未完成的转换任务"""
+        self.core.job_queue.cancel_all()
+        
+    def _on_job_status_changed(self, job_id: str, status: str):
+        """任务状态变更回调"""
+        counts = self.core.job_queue.counts()
+        running = counts.get(JobStatus.RUNNING, 0)
+        queued = counts.get(JobStatus.QUEUED, 0)
+        self.status_bar.show_jobs(running, queued)
+        self.status_bar.show_progress(running + queued > 0)
+        if status == JobStatus.CANCELLED:
+            self._streamed_jobs.discard(job_id)
+            self.status_bar.show_message(f"任务 #{job_id} 已取消", 3000)
             
-            # 播放音频
-            self.core.audio_mgr.play(filepath)
+    def _on_first_chunk(self, job_id: str, ttfb: float):
+        """收到首个音频数据块回调"""
+        self.status_bar.show_message(f"任务 #{job_id} 正在接收音频... (首字节 {ttfb * 1000:.0f} ms)")
             
-            self.status_bar.show_message(f"转换完成: {filename}", 5000)
-            self.status_bar.show_progress(False)
+    def _on_conversion_finished(self, job_id: str, result):
+        """转换完成回调 (音频已由工作线程写入文件)"""
+        try:
+            job = self.core.job_queue.get_job(job_id)
+            filename = os.path.basename(result.path)
+            if self.core.get_config('auto_save', True):
+                self.status_bar.show_message(f"转换完成: {filename}", 5000)
+            else:
+                self.status_bar.show_message(f"转换完成: 任务 #{job_id}", 5000)
+                
+            # 保存 PCM 数据, 之后调整语速/增益时可在本地预览
+            if self.conversion_panel.preview_check.isChecked():
+                self.core.task_mgr.run(
+                    f"preview_store:{job_id}",
+                    self._store_preview,
+                    job.text,
+                    job.params,
+                    result.path
+                )
+                
+            # 已边下载边播放的任务不再重复播放, 其余从文件排队播放, 多个任务依次衔接
+            if job_id in self._streamed_jobs:
+                self._streamed_jobs.discard(job_id)
+            else:
+                self.core.audio_mgr.queue(result.path, format_hint=result.response_format,
+                                          duration=result.duration)
             
         except Exception as e:
             self.logger.error("处理转换结果失败", exc_info=True)
             self.show_error(f"处理转换结果失败: {str(e)}")
-            self.status_bar.show_progress(False)
             
-    def _on_conversion_error(self, error):
+    def _on_conversion_error(self, job_id: str, error: str):
         """转换错误回调"""
-        self.show_error(f"转换失败: {error}")
-        self.status_bar.show_progress(False)
+        self._streamed_jobs.discard(job_id)
+        self.show_error(f"任务 #{job_id} 转换失败: {error}")
         
     def open_settings(self):
         """打开设置对话框"""
@@ -115,6 +242,8 @@ class MainWindow(BaseMainWindow):
                 'api_key': api_key,
                 'api_url': api_url
             })
+            self.watch_voice_cache()
+            self.conversion_panel.refresh_voices()
             
     def show_custom_voice_list(self):
         """显示自定义音色列表"""
@@ -137,15 +266,12 @@ class MainWindow(BaseMainWindow):
             self.conversion_panel.refresh_voices()
 
     def delete_voice_and_refresh(self, voice_id: str, voice_list_dialog):
-        """删除音色并刷新列表
+        """删除音色并刷新列表 (删除请求在后台执行)
         Args:
             voice_id: 要删除的音色ID
             voice_list_dialog: 音色列表对话框
         """
-        try:
-            # 删除音色
-            self.core.tts_service.delete_voice(voice_id)
-            
+        def on_deleted(result):
             # 获取当前选中的模型
             current_model = self.conversion_panel.model_combo.currentData()
             
@@ -158,6 +284,26 @@ class MainWindow(BaseMainWindow):
             # 显示成功消息
             self.show_info(f"音色删除成功!")
             
+        def on_error(error):
+            self.show_error(f"删除失败: {error}")
+            
+        try:
+            self.status_bar.show_message("正在删除音色...")
+            self.core.task_mgr.run(
+                f"delete_voice:{voice_id}",
+                self.core.tts_service.delete_voice,
+                voice_id,
+                on_success=on_deleted,
+                on_error=on_error
+            )
         except Exception as e:
             self.logger.error("删除音色失败", exc_info=True)
-            self.show_error(f"删除失败: {str(e)}") 
\ No newline at end of file
+            self.show_error(f"删除失败: {str(e)}")
+            
+    def watch_voice_cache(self):
+        """音色列表快照在后台更新后刷新界面"""
+        if not self.core.tts_service:
+            return
+        self.core.tts_service.voice_cache.add_listener(
+            lambda voices: self.core.task_mgr.call_in_gui(self.conversion_panel.refresh_voices)
+        ) 
\ No newline at end of file
@@ -1,9 +1,12 @@
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Optional, Dict
 from utils.logger import get_child_logger
 from utils.config_manager import ConfigManager
 from utils.audio_manager import AudioManager
 from services.tts_service import TTSService
-from ui.components.conversion_worker import ConversionWorker
+from utils.preview_renderer import PreviewRenderer
+from api.base_client import DEFAULT_CHUNK_SIZE
+from ui.managers.job_queue import ConversionJobQueue
+from ui.managers.task_manager import TaskManager
 
 class CoreManager:
     """核心功能管理器"""
@@ -22,9 +25,22 @@ class CoreManager:
         self._initialized = True
         self.logger = get_child_logger('core')
         self.config_mgr = ConfigManager()
-        self.audio_mgr = AudioManager()
+        # 播放后端可配置为 buffer/null, 在无声卡的环境中运行
+        self.audio_mgr = AudioManager(
+            self.get_config('audio_backend', 'pygame'),
+            **self.get_config('audio_backend_options', {})
+        )
+        # 网络请求等耗时操作在后台线程执行, 避免阻塞界面
+        self.task_mgr = TaskManager(self.get_config('background_threads', 4))
         self.tts_service = None
-        self.conversion_thread: Optional[ConversionWorker] = None
+        # 已被替换但仍有任务在使用的服务, 任务结束后关闭
+        self._retired_services = []
+        # 最近合成结果的 PCM 数据, 用于本地预览语速/增益
+        self.preview = PreviewRenderer(self.get_config('preview_cache_entries', 8))
+        # 转换任务队列, 并发数由配置决定
+        self.job_queue = ConversionJobQueue(self.get_config('max_concurrent_jobs', 2),
+                                            self.get_config('job_history', 50))
+        self.job_queue.job_status_changed.connect(self._close_retired_services)
         
         # 初始化TTS服务
         api_key = self.get_config('api_key', '')
@@ -35,24 +51,46 @@ class CoreManager:
     def init_tts_service(self, api_key: str, api_url: Optional[str] = None):
         """初始化TTS服务"""
         self.logger.info("初始化TTS服务...")
-        self.tts_service = TTSService(api_key, api_url)
+        previous = self.tts_service
+        self.tts_service = TTSService.from_config(self.get_config, api_key, api_url)
+        if previous is not None:
+            # 排队和执行中的任务仍在使用旧服务, 全部结束后再关闭
+            self._retired_services.append(previous)
+            self._close_retired_services()
+            
+    def _close_retired_services(self, *args) -> None:
+        """关闭已没有任务使用的旧服务"""
+        for service in list(self._retired_services):
+            if not self.job_queue.uses(service):
+                self._retired_services.remove(service)
+                service.close()
         
-    def start_conversion(self, text: str, params: Dict[str, Any]):
-        """开始转换任务"""
+    def start_conversion(self, text: str, params: Dict[str, Any], priority: int = 0,
+                         sink_factory: Optional[Callable[[str], Any]] = None,
+                         output_dir: Optional[str] = None) -> str:
+        """提交转换任务
+        Args:
+            text: 要转换的文本
+            params: 转换参数
+            priority: 优先级, 数值越大越先执行
+            sink_factory: 收到首块数据时创建数据流接收方 (如边下载边播放)
+            output_dir: 音频文件写入的目录, 默认为配置的输出目录
+        Returns:
+            任务ID, 通过 job_queue 的信号跟踪任务状态
+        """
         if not self.tts_service:
             self.logger.error("TTS服务未初始化")
             raise RuntimeError("TTS服务未初始化")
             
-        if self.conversion_thread and self.conversion_thread.isRunning():
-            self.logger.warning("已有转换任务正在运行")
-            return
-            
-        self.conversion_thread = ConversionWorker(
+        return self.job_queue.enqueue(
             self.tts_service,
             text,
-            params
+            params,
+            priority=priority,
+            chunk_size=self.get_config('stream_chunk_size', DEFAULT_CHUNK_SIZE),
+            sink_factory=sink_factory,
+            output_dir=output_dir or self.get_config('output_dir', 'output')
         )
-        return self.conversion_thread
         
     def save_config(self, config: Dict[str, Any]):
         """保存配置
@@ -0,0 +1,185 @@
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from PyQt6.QtCore import QObject, QThreadPool, pyqtSignal
+from api.base_client import DEFAULT_CHUNK_SIZE
+from ui.components.conversion_worker import ConversionWorker, ConversionSignals
+from utils.logger import get_child_logger
+
+class JobStatus:
+    """转换任务状态"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+
+@dataclass
+class ConversionJob:
+    """转换任务"""
+    id: str
+    text: str
+    params: Dict[str, Any]
+    priority: int = 0
+    status: str = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    error: Optional[str] = None
+    worker: Optional[ConversionWorker] = None
+
+    @property
+    def done(self) -> bool:
+        """任务是否已结束"""
+        return self.status in (JobStatus.FINISHED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class ConversionJobQueue(QObject):
+    """转换任务队列
+
+    任务在有界线程池中并发执行, 优先级高的任务先出队; 排队中的任务
+    直接移出队列, 执行中的任务在收到下一块数据时停止。已结束的任务
+    在结束信号处理完后只保留最近 max_history 个。
+    """
+    job_status_changed = pyqtSignal(str, str)
+    job_first_chunk = pyqtSignal(str, float)
+    job_finished = pyqtSignal(str, object)
+    job_failed = pyqtSignal(str, str)
+
+    def __init__(self, max_concurrency: int = 2, max_history: int = 50,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.logger = get_child_logger('job_queue')
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_concurrency)
+        self.max_history = max(0, max_history)
+        # 按提交顺序保存, 已结束的任务按此顺序淘汰
+        self.jobs: Dict[str, ConversionJob] = {}
+        self._ids = itertools.count(1)
+
+        self._signals = ConversionSignals()
+        self._signals.started.connect(self._on_started)
+        self._signals.first_chunk.connect(self.job_first_chunk)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.error.connect(self._on_error)
+        self._signals.cancelled.connect(self._on_cancelled)
+
+    def set_max_concurrency(self, max_concurrency: int) -> None:
+        """设置最大并发任务数"""
+        self.pool.setMaxThreadCount(max(1, max_concurrency))
+
+    def enqueue(self, tts_service, text: str, params: Dict[str, Any], priority: int = 0,
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                sink_factory: Optional[Callable[[str], Any]] = None,
+                output_dir: str = 'output') -> str:
+        """提交转换任务
+        Args:
+            tts_service: TTS服务
+            text: 要转换的文本
+            params: 转换参数
+            priority: 优先级, 数值越大越先执行
+            chunk_size: 流式响应分块大小
+            sink_factory: 收到首块数据时在工作线程中调用, 参数为任务ID,
+                返回接收后续数据块的流 (feed/finish/stop)
+            output_dir: 音频文件写入的目录, 完成后 job_finished 发出 ConversionResult
+        Returns:
+            任务ID
+        """
+        job_id = str(next(self._ids))
+        job = ConversionJob(job_id, text, params, priority)
+        job.worker = ConversionWorker(job_id, tts_service, text, params, self._signals, chunk_size,
+                                      sink_factory, output_dir)
+        self.jobs[job_id] = job
+
+        self.logger.info(f"提交转换任务 #{job_id}, 优先级: {priority}")
+        self.pool.start(job.worker, priority)
+        self.job_status_changed.emit(job_id, JobStatus.QUEUED)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务, 返回是否已发出取消"""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return False
+
+        job.worker.cancel()
+        if job.status == JobStatus.QUEUED and self.pool.tryTake(job.worker):
+            # 尚未开始执行, 直接移出线程池队列
+            job.worker = None
+            self._set_status(job, JobStatus.CANCELLED)
+            self._prune()
+        return True
+
+    def cancel_all(self) -> None:
+        """取消所有未完成的任务"""
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def get_job(self, job_id: str) -> Optional[ConversionJob]:
+        """获取任务"""
+        return self.jobs.get(job_id)
+
+    def pending_jobs(self) -> List[ConversionJob]:
+        """获取未完成的任务"""
+        return [job for job in self.jobs.values() if not job.done]
+
+    def uses(self, tts_service) -> bool:
+        """是否有未完成的任务在使用该服务"""
+        return any(job.worker is not None and job.worker.tts_service is tts_service
+                   for job in self.pending_jobs())
+
+    def counts(self) -> Dict[str, int]:
+        """按状态统计任务数"""
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def _prune(self) -> None:
+        """移除最早结束的任务, 只保留最近 max_history 个已结束的任务 (含文本和参数)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self.jobs[job_id]
+
+    def shutdown(self, timeout_ms: int = 3000) -> None:
+        """取消所有任务并等待执行中的任务结束"""
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
+
+    def _set_status(self, job: ConversionJob, status: str) -> None:
+        """更新任务状态并通知"""
+        job.status = status
+        self.job_status_changed.emit(job.id, status)
+
+    def _on_started(self, job_id: str):
+        """任务开始执行"""
+        job = self.jobs.get(job_id)
+        if job:
+            self._set_status(job, JobStatus.RUNNING)
+
+    def _on_finished(self, job_id: str, result: object):
+        """任务完成"""
+        job = self.jobs.get(job_id)
+        if job:
+            job.worker = None
+            self._set_status(job, JobStatus.FINISHED)
+        self.job_finished.emit(job_id, result)
+        self._prune()
+
+    def _on_error(self, job_id: str, error: str):
+        """任务失败"""
+        job = self.jobs.get(job_id)
+        if job:
+            job.worker = None
+            job.error = error
+            self._set_status(job, JobStatus.FAILED)
+        self.job_failed.emit(job_id, error)
+        self._prune()
+
+    def _on_cancelled(self, job_id: str):
+        """任务已取消"""
+        job = self.jobs.get(job_id)
+        if job:
+            job.worker = None
+            self._set_status(job, JobStatus.CANCELLED)
+        self._prune()
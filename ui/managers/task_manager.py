@@ -0,0 +1,124 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from utils.logger import get_child_logger
+
+class _TaskSignals(QObject):
+    """后台任务信号 (跨线程投递回GUI线程)"""
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    invoke = pyqtSignal(object, object)
+
+
+class _Task(QRunnable):
+    """在线程池中执行的单个任务"""
+    def __init__(self, key: str, fn: Callable, args: tuple, kwargs: dict,
+                 signals: _TaskSignals):
+        super().__init__()
+        self.logger = get_child_logger('task')
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+            self.signals.finished.emit(self.key, result)
+        except Exception as e:
+            self.logger.error(f"后台任务失败: {self.key}", exc_info=True)
+            self.signals.failed.emit(self.key, str(e))
+
+
+class TaskManager(QObject):
+    """后台任务管理器
+
+    网络请求和文件读写在线程池中执行, 结果通过信号回到GUI线程调用回调。
+    同一 key 的任务在执行期间重复提交时会合并, 只执行一次。
+    """
+    def __init__(self, max_threads: int = 4, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.logger = get_child_logger('task_manager')
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+
+        # key -> [(成功回调, 失败回调), ...]
+        self._pending: Dict[str, List[Tuple[Optional[Callable], Optional[Callable]]]] = {}
+        self._timers: Dict[str, QTimer] = {}
+
+        self._signals = _TaskSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._signals.invoke.connect(self._on_invoke)
+
+    def run(self, key: str, fn: Callable, *args,
+            on_success: Optional[Callable[[Any], None]] = None,
+            on_error: Optional[Callable[[str], None]] = None, **kwargs) -> bool:
+        """在后台执行任务
+        Args:
+            key: 任务标识, 相同标识的进行中任务会被合并
+            fn: 要执行的函数
+            on_success: 成功回调 (GUI线程), 参数为返回值
+            on_error: 失败回调 (GUI线程), 参数为错误信息
+        Returns:
+            是否新提交了任务 (False 表示已合并到进行中的任务)
+        """
+        callbacks = (on_success, on_error)
+        if key in self._pending:
+            self.logger.debug(f"合并重复任务: {key}")
+            self._pending[key].append(callbacks)
+            return False
+
+        self._pending[key] = [callbacks]
+        self.pool.start(_Task(key, fn, args, kwargs, self._signals))
+        return True
+
+    def is_running(self, key: str) -> bool:
+        """检查任务是否正在执行"""
+        return key in self._pending
+
+    def debounce(self, key: str, delay_ms: int, callback: Callable[[], None]) -> None:
+        """延迟执行回调, 在延迟期间重复调用只保留最后一次"""
+        timer = self._timers.get(key)
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            self._timers[key] = timer
+        else:
+            timer.stop()
+            timer.timeout.disconnect()
+        timer.timeout.connect(callback)
+        timer.start(delay_ms)
+
+    def call_in_gui(self, fn: Callable, *args) -> None:
+        """从任意线程安排函数在GUI线程中执行"""
+        self._signals.invoke.emit(fn, args)
+
+    def _on_finished(self, key: str, result: Any):
+        """任务完成, 依次调用所有合并的成功回调"""
+        for on_success, _ in self._pending.pop(key, []):
+            if on_success:
+                self._safe_call(on_success, result)
+
+    def _on_failed(self, key: str, message: str):
+        """任务失败, 依次调用所有合并的失败回调"""
+        for _, on_error in self._pending.pop(key, []):
+            if on_error:
+                self._safe_call(on_error, message)
+
+    def _on_invoke(self, fn: Callable, args: tuple):
+        """执行跨线程投递的调用"""
+        self._safe_call(fn, *args)
+
+    def _safe_call(self, fn: Callable, *args) -> None:
+        """调用回调, 异常只记录日志 (槽函数中未捕获的异常会终止程序)"""
+        try:
+            fn(*args)
+        except Exception:
+            self.logger.error("任务回调执行失败", exc_info=True)
+
+    def shutdown(self, timeout_ms: int = 3000) -> None:
+        """等待进行中的任务结束"""
+        for timer in self._timers.values():
+            timer.stop()
+        self.pool.waitForDone(timeout_ms)
@@ -0,0 +1,230 @@
+import struct
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+# MPEG 音频帧头查表: 比特率 (kbps), 按 (版本, 层) 索引
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# 采样率, 按版本索引 (2.5 视为 2.5)
+_MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+
+
+@dataclass
+class Mp3Frame:
+    """MPEG 音频帧信息"""
+    offset: int
+    length: int
+    sample_rate: int
+    samples: int
+    bitrate: int
+
+
+def parse_mp3_header(data: bytes, offset: int = 0) -> Optional[Mp3Frame]:
+    """解析 offset 处的 MPEG 音频帧头, 不是合法帧头时返回 None"""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    rate_index = (b2 >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    version = {3: 1, 2: 2, 0: 2.5}[version_bits]
+    layer = 4 - layer_bits
+    padding = (b2 >> 1) & 0x01
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2 or version == 1:
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        length = 72 * bitrate // sample_rate + padding
+        samples = 576
+    return Mp3Frame(offset, length, sample_rate, samples, bitrate)
+
+
+def id3v2_size(data: bytes) -> int:
+    """返回开头 ID3v2 标签的长度, 没有标签时返回 0"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_mp3_frames(data: bytes, offset: int = 0) -> Iterator[Mp3Frame]:
+    """遍历完整的 MPEG 音频帧, 跳过 ID3 标签和无法识别的字节"""
+    offset = max(offset, id3v2_size(data))
+    while offset + 4 <= len(data):
+        frame = parse_mp3_header(data, offset)
+        if frame is None:
+            offset += 1
+            continue
+        if offset + frame.length > len(data):
+            return
+        yield frame
+        offset += frame.length
+
+
+def mp3_duration(data: bytes) -> float:
+    """按帧头累计计算 MP3 时长 (秒)"""
+    return sum(frame.samples / frame.sample_rate for frame in iter_mp3_frames(data))
+
+
+class Mp3FrameSplitter:
+    """把任意切分的 MP3 字节流重新切分为完整帧, 便于逐段解码"""
+    def __init__(self):
+        self._buffer = bytearray()
+        self._header_checked = False
+
+    def feed(self, chunk: bytes) -> Tuple[bytes, float]:
+        """输入数据块, 返回已完整的帧数据及其时长 (秒)"""
+        self._buffer.extend(chunk)
+        if not self._header_checked:
+            if len(self._buffer) < 10:
+                return b'', 0.0
+            tag_size = id3v2_size(bytes(self._buffer[:10]))
+            if len(self._buffer) < tag_size:
+                return b'', 0.0
+            del self._buffer[:tag_size]
+            self._header_checked = True
+
+        data = bytes(self._buffer)
+        end = 0
+        duration = 0.0
+        for frame in iter_mp3_frames(data):
+            end = frame.offset + frame.length
+            duration += frame.samples / frame.sample_rate
+        del self._buffer[:end]
+        return data[:end], duration
+
+    def flush(self) -> bytes:
+        """返回剩余的不完整数据"""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+@dataclass
+class WavInfo:
+    """WAV 文件格式信息"""
+    channels: int
+    sample_rate: int
+    sample_width: int
+    data_offset: int
+    data_size: int
+    # 1 为整数 PCM, 3 为浮点
+    audio_format: int = 1
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.channels * self.sample_rate * self.sample_width
+
+
+def parse_wav_header(data: bytes) -> Optional[WavInfo]:
+    """解析 RIFF/WAVE 头, 数据不足或格式不符时返回 None"""
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack('<I', data[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            if body + 16 > len(data):
+                return None
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', data[body:body + 16])
+            fmt = (channels, sample_rate, bits // 8, audio_format)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            return WavInfo(fmt[0], fmt[1], fmt[2], body, chunk_size, fmt[3])
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+class DurationCounter:
+    """边接收数据边累计音频时长, 结果与对完整数据调用 audio_duration 一致"""
+    # WAV 头超过此长度仍无法解析时放弃
+    MAX_HEADER = 4096
+
+    def __init__(self, format_hint: Optional[str] = None):
+        self.format_hint = format_hint
+        self._head = bytearray()
+        self._wav: Optional[WavInfo] = None
+        self._wav_bytes = 0
+        self._mp3: Optional[Mp3FrameSplitter] = None
+        self._mp3_duration = 0.0
+        self._unknown = False
+
+    def feed(self, chunk: bytes) -> None:
+        """输入数据块"""
+        if self._unknown:
+            return
+        if self._wav is not None:
+            self._wav_bytes += len(chunk)
+            return
+        if self._mp3 is not None:
+            self._mp3_duration += self._mp3.feed(chunk)[1]
+            return
+        self._head.extend(chunk)
+        if len(self._head) < 12:
+            return
+        head = bytes(self._head)
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            self._wav = parse_wav_header(head)
+            if self._wav is not None:
+                self._wav_bytes = len(head) - self._wav.data_offset
+                self._head.clear()
+            elif len(head) > self.MAX_HEADER:
+                self._unknown = True
+        elif self.format_hint in (None, '', 'mp3'):
+            self._mp3 = Mp3FrameSplitter()
+            self._mp3_duration = self._mp3.feed(head)[1]
+            self._head.clear()
+        else:
+            self._unknown = True
+
+    @property
+    def duration(self) -> Optional[float]:
+        """当前累计时长 (秒), 无法确定时为 None"""
+        if self._wav is not None:
+            data_size = min(self._wav.data_size, self._wav_bytes)
+            return data_size / self._wav.bytes_per_second if self._wav.bytes_per_second else None
+        if self._mp3 is not None:
+            return self._mp3_duration or None
+        return None
+
+
+def audio_duration(data: bytes, format_hint: Optional[str] = None) -> Optional[float]:
+    """根据文件头估算音频时长 (秒), 无法确定时返回 None"""
+    info = parse_wav_header(data)
+    if info is not None:
+        data_size = min(info.data_size, len(data) - info.data_offset)
+        return data_size / info.bytes_per_second if info.bytes_per_second else None
+    if format_hint in (None, '', 'mp3'):
+        duration = mp3_duration(data)
+        return duration or None
+    return None
@@ -1,37 +1,41 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from utils.logger import get_child_logger
 from audio.player_factory import AudioPlayerFactory
-import pygame
+from audio.base_player import AudioSource
+from utils.audio_formats import parse_wav_header
 
 class AudioManager:
     """音频管理器"""
     _instance = None
     
-    def __new__(cls):
+    def __new__(cls, *args, **kwargs):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
         return cls._instance
         
-    def __init__(self):
+    def __init__(self, backend: str = 'pygame', **options):
+        """
+        Args:
+            backend: 播放器类型, pygame 需要声卡; buffer/null 用于无声卡环境
+            options: 传给播放器的参数
+        """
         if hasattr(self, '_initialized') and self._initialized:
             return
             
         self._initialized = True
         self.logger = get_child_logger('audio')
         
-        # 初始化音频播放器
-        self.logger.info("初始化 Pygame 音频播放器...")
-        pygame.mixer.init()
-        
         # 创建临时目录
         self.temp_dir = 'temp'
         if not os.path.exists(self.temp_dir):
             os.makedirs(self.temp_dir)
         
-        self.player = AudioPlayerFactory.create_player()
+        # 混音器由播放器自行初始化
+        self.logger.info(f"初始化音频播放器: {backend}")
+        self.player = AudioPlayerFactory.create_player(backend, **options)
         self.current_file: Optional[str] = None
         
     def save_audio(self, audio_data: bytes, filename: str, output_dir: str = None) -> str:
@@ -57,16 +61,86 @@ class AudioManager:
             self.logger.error("保存音频失败", exc_info=True)
             raise
             
-    def play(self, filepath: str, callback: Optional[callable] = None) -> None:
-        """播放音频"""
+    def play(self, source: AudioSource, callback: Optional[callable] = None,
+             format_hint: Optional[str] = None) -> None:
+        """播放音频
+        Args:
+            source: 文件路径或内存中的音频数据
+            callback: 播放完成回调
+            format_hint: 音频格式, 从内存播放时使用
+        """
         try:
-            self.current_file = filepath
-            self.player.play(filepath, callback)
-            self.logger.info(f"开始播放音频: {filepath}")
+            self.current_file = source if isinstance(source, str) else None
+            self.player.play(source, callback, format_hint)
+            self.logger.info(f"开始播放音频: {self.current_file or '<内存音频>'}")
         except Exception as e:
             self.logger.error("播放音频失败", exc_info=True)
             raise
             
+    def queue(self, source: AudioSource, callback: Optional[callable] = None,
+              format_hint: Optional[str] = None, duration: Optional[float] = None) -> None:
+        """排队播放音频, 当前音频结束后无缝衔接
+        Args:
+            source: 文件路径或内存中的音频数据
+            callback: 播放完成回调
+            format_hint: 音频格式, 从内存播放时使用
+            duration: 已知的音频时长 (秒), 提供时播放器不再读取文件计算
+        """
+        try:
+            self.player.queue(source, callback, format_hint, duration)
+            self.logger.info(f"音频已加入播放队列: {source if isinstance(source, str) else '<内存音频>'}")
+        except Exception as e:
+            self.logger.error("加入播放队列失败", exc_info=True)
+            raise
+            
+    def open_stream(self, response_format: str, sample_rate: Optional[int] = None,
+                    jitter_ms: int = 300, on_underrun: Optional[callable] = None,
+                    callback: Optional[callable] = None):
+        """开始边下载边播放, 停止当前播放
+        Args:
+            response_format: 音频格式
+            sample_rate: 采样率, pcm 格式需要
+            jitter_ms: 开始播放前的缓冲时长(毫秒)
+            on_underrun: 缓冲欠载回调 (播放线程中调用), 参数为累计次数
+            callback: 播放完成回调 (播放线程中调用)
+        Returns:
+            流对象, 不支持该格式时返回 None
+        """
+        try:
+            stream = self.player.create_stream(response_format, sample_rate, jitter_ms,
+                                               on_underrun, callback)
+            if stream is not None:
+                self.current_file = None
+                self.logger.info(f"开始流式播放音频: {response_format}")
+            return stream
+        except Exception as e:
+            self.logger.error("创建流式播放失败", exc_info=True)
+            raise
+            
+    def decode_pcm(self, audio: bytes, response_format: str,
+                   sample_rate: int = 32000) -> Optional[Tuple[bytes, int, int]]:
+        """把音频转换为 16 位 PCM
+        Args:
+            audio: 音频数据
+            response_format: 音频格式
+            sample_rate: pcm 格式的采样率
+        Returns:
+            (PCM 数据, 采样率, 声道数), 无法解码时返回 None
+        """
+        if response_format == 'pcm':
+            return audio, sample_rate, 1
+        info = parse_wav_header(audio[:4096])
+        if info is not None:
+            if info.audio_format != 1 or info.sample_width != 2:
+                return None
+            return audio[info.data_offset:info.data_offset + info.data_size], info.sample_rate, info.channels
+        # 压缩格式交给播放器解码
+        return self.player.decode(audio, response_format)
+        
+    def is_playing(self) -> bool:
+        """是否正在播放 (包括流式播放和排队的音频)"""
+        return self.player.is_playing()
+        
     def stop(self) -> None:
         """停止播放"""
         self.player.stop()
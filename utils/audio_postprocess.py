@@ -0,0 +1,259 @@
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from utils.audio_formats import WavInfo, parse_wav_header
+from utils.logger import get_child_logger
+
+# 支持后处理的格式: 未压缩的 PCM 数据
+POSTPROCESS_FORMATS = ('wav', 'pcm')
+# pcm 格式为 16 位单声道
+PCM_SAMPLE_WIDTH = 2
+PCM_CHANNELS = 1
+# 变速时每次计算的输出帧数, 限制频谱数组的内存占用
+STRETCH_BLOCK_FRAMES = 2048
+
+
+@dataclass
+class PostProcessOptions:
+    """后处理参数"""
+    # 音量归一化方式: None / 'peak' / 'rms'
+    normalize: Optional[str] = None
+    target_peak_db: float = -1.0
+    target_rms_db: float = -20.0
+    # 去除首尾静音
+    trim_silence: bool = False
+    silence_threshold_db: float = -50.0
+    keep_silence_ms: float = 50.0
+    # 片段衔接处的交叉淡化时长, 0 表示直接拼接
+    crossfade_ms: float = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """是否需要处理"""
+        return bool(self.normalize or self.trim_silence or self.crossfade_ms > 0)
+
+
+class AudioPostProcessor:
+    """PCM/WAV 音频后处理 (音量归一化、去除首尾静音、片段交叉淡化)
+
+    所有操作都是对整个采样数组的 NumPy 向量运算。批量任务可以通过
+    process_many 在进程池中并行处理。
+    """
+    def __init__(self, options: PostProcessOptions):
+        if options.normalize not in (None, 'peak', 'rms'):
+            raise ValueError(f"未知的归一化方式: {options.normalize}")
+        self.logger = get_child_logger('audio_postprocess')
+        self.options = options
+
+    def process(self, audio: bytes, response_format: str, sample_rate: int = 32000) -> bytes:
+        """处理单段音频"""
+        return self.process_segments([audio], response_format, sample_rate)
+
+    def process_segments(self, segments: Sequence[bytes], response_format: str,
+                         sample_rate: int = 32000) -> bytes:
+        """处理并拼接多段音频, 衔接处按配置交叉淡化
+        Args:
+            segments: 各片段的音频数据, 格式和参数须一致
+            response_format: wav 或 pcm
+            sample_rate: pcm 的采样率 (wav 从文件头读取)
+        """
+        if response_format not in POSTPROCESS_FORMATS:
+            raise ValueError(f"不支持后处理的音频格式: {response_format}")
+
+        info = None
+        arrays = []
+        for segment in segments:
+            samples, segment_info = decode_samples(segment, response_format, sample_rate)
+            if info is None:
+                info = segment_info
+            elif (segment_info.channels, segment_info.sample_rate) != (info.channels, info.sample_rate):
+                raise ValueError("音频片段参数不一致, 无法拼接")
+            arrays.append(samples)
+
+        samples = self._crossfade_join(arrays, info.sample_rate)
+        if self.options.trim_silence:
+            samples = self._trim_silence(samples, info.sample_rate)
+        if self.options.normalize:
+            samples = self._normalize(samples)
+        return encode_samples(samples, info, response_format)
+
+    def process_many(self, jobs: Sequence[Tuple[Sequence[bytes], str, int]],
+                     max_workers: Optional[int] = None) -> List[bytes]:
+        """在进程池中批量处理
+        Args:
+            jobs: (片段列表, 格式, 采样率) 列表
+            max_workers: 进程数, 默认为 CPU 核数
+        Returns:
+            与 jobs 顺序一致的处理结果
+        """
+        if len(jobs) <= 1:
+            return [self.process_segments(*job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_process_job, self.options, *job) for job in jobs]
+            return [future.result() for future in futures]
+
+    def _crossfade_join(self, arrays: List[np.ndarray], sample_rate: int) -> np.ndarray:
+        """拼接片段, 衔接处做等功率交叉淡化"""
+        if len(arrays) == 1:
+            return arrays[0]
+        fade = int(sample_rate * self.options.crossfade_ms / 1000)
+        overlaps = [min(fade, len(left), len(right)) for left, right in zip(arrays, arrays[1:])]
+        total = sum(len(array) for array in arrays) - sum(overlaps)
+        output = np.empty((total, arrays[0].shape[1]), dtype=np.float32)
+
+        position = 0
+        for index, array in enumerate(arrays):
+            overlap_in = overlaps[index - 1] if index > 0 else 0
+            if overlap_in:
+                curve = np.linspace(0.0, np.pi / 2, overlap_in, dtype=np.float32)[:, None]
+                region = output[position - overlap_in:position]
+                region *= np.cos(curve)
+                region += array[:overlap_in] * np.sin(curve)
+            rest = array[overlap_in:]
+            output[position:position + len(rest)] = rest
+            position += len(rest)
+        return output
+
+    def _trim_silence(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """去除首尾低于阈值的部分, 两端各保留 keep_silence_ms"""
+        threshold = 10 ** (self.options.silence_threshold_db / 20)
+        loud = np.flatnonzero(np.abs(samples).max(axis=1) > threshold)
+        if not len(loud):
+            return samples[:0]
+        keep = int(sample_rate * self.options.keep_silence_ms / 1000)
+        start = max(0, loud[0] - keep)
+        end = min(len(samples), loud[-1] + 1 + keep)
+        return samples[start:end]
+
+    def _normalize(self, samples: np.ndarray) -> np.ndarray:
+        """按峰值或均方根调整音量, 增益不超过削波前的上限"""
+        if not samples.size:
+            return samples
+        peak = float(np.abs(samples).max())
+        if peak == 0:
+            return samples
+        if self.options.normalize == 'peak':
+            gain = 10 ** (self.options.target_peak_db / 20) / peak
+        else:
+            rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+            gain = 10 ** (self.options.target_rms_db / 20) / rms
+            gain = min(gain, 1.0 / peak)
+        return samples * np.float32(gain)
+
+
+def decode_samples(audio: bytes, response_format: str, sample_rate: int) -> Tuple[np.ndarray, WavInfo]:
+    """解析为 (采样数, 声道数) 的 float32 数组, 取值范围 [-1, 1]"""
+    if response_format == 'wav':
+        info = parse_wav_header(audio[:4096])
+        if info is None:
+            raise ValueError("无法解析 WAV 文件头")
+        end = min(len(audio), info.data_offset + info.data_size) if info.data_size else len(audio)
+        data = audio[info.data_offset:end]
+    else:
+        info = WavInfo(PCM_CHANNELS, sample_rate, PCM_SAMPLE_WIDTH, 0, len(audio))
+        data = audio
+
+    frame_size = info.channels * info.sample_width
+    data = data[:len(data) - len(data) % frame_size]
+    if info.audio_format == 3 and info.sample_width == 4:
+        samples = np.frombuffer(data, dtype='<f4').astype(np.float32)
+    elif info.audio_format == 1 and info.sample_width == 2:
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+    else:
+        raise ValueError(f"不支持的采样格式: {info.audio_format}/{info.sample_width * 8}位")
+    return samples.reshape(-1, info.channels), info
+
+def encode_samples(samples: np.ndarray, info: WavInfo, response_format: str) -> bytes:
+    """按原采样格式编码, wav 重写文件头"""
+    if info.audio_format == 3:
+        data = samples.astype('<f4').tobytes()
+    else:
+        data = np.clip(np.rint(samples * 32768.0), -32768, 32767).astype('<i2').tobytes()
+    if response_format == 'pcm':
+        return data
+
+    block_align = info.channels * info.sample_width
+    header = struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + len(data), b'WAVE',
+        b'fmt ', 16, info.audio_format, info.channels, info.sample_rate,
+        info.sample_rate * block_align, block_align, info.sample_width * 8,
+        b'data', len(data)
+    )
+    return header + data
+
+
+def _process_job(options: PostProcessOptions, segments: Sequence[bytes],
+                 response_format: str, sample_rate: int) -> bytes:
+    """进程池任务入口 (必须是模块级函数才能被序列化)"""
+    return AudioPostProcessor(options).process_segments(segments, response_format, sample_rate)
+
+
+def time_stretch(samples: np.ndarray, rate: float, n_fft: int = 2048, hop: int = 512) -> np.ndarray:
+    """相位声码器变速 (音高不变)
+    Args:
+        samples: (采样数, 声道数) 的 float32 数组
+        rate: 速度倍率, 大于 1 加快 (时长变为 1/rate)
+        n_fft: 帧长, 必须是 hop 的整数倍
+        hop: 帧移
+    """
+    if abs(rate - 1.0) < 1e-3 or len(samples) == 0:
+        return samples
+    window = np.hanning(n_fft).astype(np.float32)
+    channels = [_stretch_channel(samples[:, channel], rate, n_fft, hop, window)
+                for channel in range(samples.shape[1])]
+    return np.stack(channels, axis=1)
+
+
+def _stretch_channel(signal: np.ndarray, rate: float, n_fft: int, hop: int,
+                     window: np.ndarray) -> np.ndarray:
+    """单声道变速: 分帧 FFT、按新时间轴插值幅度、累加相位、重叠相加
+
+    按输出帧分块计算, 块之间只传递相位, 内存占用与音频长度无关。
+    """
+    pad = n_fft // 2
+    padded = np.pad(signal, (pad, pad + n_fft))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop]
+
+    # 输出帧在输入时间轴上的位置
+    steps = np.arange(0, len(frames) - 1, rate)
+    expected = 2 * np.pi * hop * np.arange(n_fft // 2 + 1) / n_fft
+    phase = np.angle(np.fft.rfft(frames[0] * window))
+
+    length = n_fft + hop * (len(steps) - 1)
+    output = np.zeros(length, dtype=np.float32)
+    norm = np.zeros(length, dtype=np.float32)
+    window_squared = window ** 2
+    ratio = n_fft // hop
+    for block_start in range(0, len(steps), STRETCH_BLOCK_FRAMES):
+        block = steps[block_start:block_start + STRETCH_BLOCK_FRAMES]
+        index = block.astype(np.int64)
+        first = index[0]
+        spectrum = np.fft.rfft(frames[first:index[-1] + 2] * window, axis=1).astype(np.complex64)
+        left, right = spectrum[index - first], spectrum[index - first + 1]
+        fraction = (block - index)[:, None]
+        magnitude = (1 - fraction) * np.abs(left) + fraction * np.abs(right)
+
+        # 相邻帧的相位差减去各频点的理论相位推进, 折回 [-pi, pi] 后累加
+        delta = np.angle(right) - np.angle(left) - expected
+        delta -= 2 * np.pi * np.round(delta / (2 * np.pi))
+        increments = expected + delta
+        phases = phase + np.cumsum(np.vstack([np.zeros_like(phase), increments[:-1]]), axis=0)
+        phase = np.mod(phases[-1] + increments[-1], 2 * np.pi)
+
+        block_frames = np.fft.irfft(magnitude * np.exp(1j * phases), n=n_fft, axis=1) * window
+        # 间隔 n_fft/hop 的帧互不重叠, 每组可以整体相加
+        for offset in range(ratio):
+            first_frame = (offset - block_start) % ratio
+            group = block_frames[first_frame::ratio]
+            if not len(group):
+                continue
+            start = (block_start + first_frame) * hop
+            output[start:start + group.size] += group.reshape(-1)
+            norm[start:start + group.size] += np.tile(window_squared, len(group))
+    output /= np.where(norm > 1e-6, norm, 1.0)
+
+    target = int(round(len(signal) / rate))
+    return output[pad:pad + target]
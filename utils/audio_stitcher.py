@@ -0,0 +1,380 @@
+import struct
+import zlib
+from typing import BinaryIO, Iterable, Iterator, List, Sequence, Tuple, Union
+from utils.audio_formats import iter_mp3_frames, id3v2_size, parse_mp3_header, parse_wav_header
+from utils.logger import get_child_logger
+
+Piece = Union[bytes, memoryview]
+
+# 逐字节位反转表, 用于借助 zlib.crc32 计算 Ogg 的非反射 CRC
+_BIT_REVERSE = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
+_OGG_HEADER = struct.Struct('<4sBBqIII')
+_OGG_BOS = 0x02
+_OGG_EOS = 0x04
+_OGG_CONTINUED = 0x01
+# Opus TOC 配置对应的帧长 (48kHz 采样数)
+_OPUS_FRAME_SAMPLES = (
+    [480, 960, 1920, 2880] * 3 +     # SILK: 10/20/40/60 ms
+    [480, 960] * 2 +                 # Hybrid: 10/20 ms
+    [120, 240, 480, 960] * 4         # CELT: 2.5/5/10/20 ms
+)
+
+
+def ogg_crc(data: Piece, crc: int = 0) -> int:
+    """计算 Ogg 页校验和 (多项式 0x04C11DB7, 非反射, 初值 0)
+
+    与 zlib 的 CRC-32 使用同一多项式但位序相反: 输入按字节反转后交给
+    zlib 计算, 结果再整体反转, 全程在 C 中执行。
+    """
+    reflected = int(f'{crc:032b}'[::-1], 2)
+    reflected = zlib.crc32(bytes(data).translate(_BIT_REVERSE), reflected ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return int(f'{reflected:032b}'[::-1], 2)
+
+
+def opus_packet_samples(packet: Piece) -> int:
+    """根据 TOC 字节计算 Opus 包的采样数 (48kHz), 无需解码"""
+    if not packet:
+        return 0
+    toc = packet[0]
+    frame_samples = _OPUS_FRAME_SAMPLES[toc >> 3]
+    code = toc & 0x03
+    if code == 0:
+        frames = 1
+    elif code in (1, 2):
+        frames = 2
+    else:
+        frames = packet[1] & 0x3F if len(packet) > 1 else 0
+    return frame_samples * frames
+
+
+class AudioStitcher:
+    """音频拼接器: 按格式在容器层拼接片段, 不解码也不重新编码
+
+    - mp3: 按帧拼接, 去掉各片段的 ID3 标签和 Xing/Info 帧
+    - wav: 合并各片段的数据块, 重写一个 RIFF 头
+    - pcm: 直接拼接
+    - opus: 合并为一个 Ogg 逻辑流, 重写序列号、页号、粒度位置并重新计算校验和
+
+    先计算输出布局 (大多数片段只是原数据的切片视图), 再写入一次预分配的
+    缓冲区或按顺序写入文件。
+    """
+    SUPPORTED_FORMATS = ('mp3', 'wav', 'pcm', 'opus')
+
+    def __init__(self, response_format: str):
+        if response_format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"不支持拼接的音频格式: {response_format}")
+        self.logger = get_child_logger('audio_stitcher')
+        self.response_format = response_format
+
+    def plan(self, segments: Sequence[bytes]) -> List[Piece]:
+        """计算输出布局, 返回按顺序写出的数据片段"""
+        planner = getattr(self, f'_plan_{self.response_format}')
+        return planner([memoryview(segment) for segment in segments if segment])
+
+    def join(self, segments: Sequence[bytes]) -> bytearray:
+        """拼接为一个预分配的缓冲区"""
+        if len(segments) == 1:
+            return bytearray(segments[0])
+        pieces = self.plan(segments)
+        output = bytearray(sum(len(piece) for piece in pieces))
+        offset = 0
+        for piece in pieces:
+            output[offset:offset + len(piece)] = piece
+            offset += len(piece)
+        self.logger.debug(f"拼接 {len(segments)} 个 {self.response_format} 片段: {offset} 字节")
+        return output
+
+    def write(self, segments: Sequence[bytes], output: BinaryIO) -> int:
+        """按顺序写入文件对象, 返回写入的字节数"""
+        written = 0
+        for piece in self.plan(segments):
+            output.write(piece)
+            written += len(piece)
+        return written
+
+    def _plan_pcm(self, segments: List[memoryview]) -> List[Piece]:
+        """PCM 没有文件头, 直接首尾相接"""
+        return list(segments)
+
+    def _plan_mp3(self, segments: List[memoryview]) -> List[Piece]:
+        """取出各片段的音频帧, 保留首个片段的 ID3v2 标签"""
+        pieces: List[Piece] = []
+        for index, segment in enumerate(segments):
+            data = segment.obj if isinstance(segment.obj, bytes) else bytes(segment)
+            tag_size = id3v2_size(data)
+            if index == 0 and tag_size:
+                pieces.append(segment[:tag_size])
+
+            start = end = None
+            for frame in iter_mp3_frames(data, tag_size):
+                if start is None and self._is_vbr_header(data, frame.offset, frame.length):
+                    # VBR 信息帧记录的是单个片段的帧数, 拼接后不再正确
+                    continue
+                if start is None:
+                    start = frame.offset
+                end = frame.offset + frame.length
+            if start is not None:
+                pieces.append(segment[start:end])
+        return pieces
+
+    @staticmethod
+    def _is_vbr_header(data: bytes, offset: int, length: int) -> bool:
+        """检查帧是否为 Xing/Info/VBRI 信息帧"""
+        frame = data[offset:offset + min(length, 64)]
+        return b'Xing' in frame or b'Info' in frame or frame[36:40] == b'VBRI'
+
+    def _plan_wav(self, segments: List[memoryview]) -> List[Piece]:
+        """合并数据块, 以首个片段的参数重写文件头"""
+        pieces: List[Piece] = []
+        params = None
+        data_size = 0
+        for segment in segments:
+            info = parse_wav_header(bytes(segment[:4096]))
+            if info is None:
+                raise ValueError("无法解析 WAV 文件头")
+            current = (info.audio_format, info.channels, info.sample_rate, info.sample_width)
+            if params is None:
+                params = current
+            elif current != params:
+                raise ValueError(f"WAV 片段参数不一致: {current} != {params}")
+
+            # 流式返回的 wav 数据块长度可能为 0 或占位值, 以实际长度为准
+            size = info.data_size
+            available = len(segment) - info.data_offset
+            if size == 0 or size > available:
+                size = available
+            block_align = info.channels * info.sample_width
+            size -= size % block_align
+            pieces.append(segment[info.data_offset:info.data_offset + size])
+            data_size += size
+
+        if 36 + data_size > 0xFFFFFFFF:
+            raise ValueError("拼接后的 WAV 超过 4GB 限制")
+        audio_format, channels, sample_rate, sample_width = params
+        block_align = channels * sample_width
+        header = struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, audio_format, channels, sample_rate,
+            sample_rate * block_align, block_align, sample_width * 8,
+            b'data', data_size
+        )
+        return [header] + pieces
+
+    def _plan_opus(self, segments: List[memoryview]) -> List[Piece]:
+        """合并为一个 Ogg Opus 逻辑流
+
+        只保留首个片段的 OpusHead/OpusTags 头页, 其余片段的音频页接在后面。
+        页的内容不变, 只重写页头: 统一序列号, 连续编号, 按累计采样数重算
+        粒度位置, 仅首页保留 BOS、末页保留 EOS, 最后重新计算校验和。
+        """
+        pieces: List[Piece] = []
+        serial = None
+        channels = None
+        sequence = 0
+        offset = 0
+        for index, segment in enumerate(segments):
+            last_segment = index == len(segments) - 1
+            pages = self._parse_ogg_pages(segment)
+            head = self._first_packet(pages)
+            if head[:8] != b'OpusHead':
+                raise ValueError("不是 Ogg Opus 数据")
+            if channels is None:
+                channels = head[9]
+                serial = pages[0][2]
+            elif head[9] != channels:
+                raise ValueError(f"Opus 片段声道数不一致: {head[9]} != {channels}")
+
+            state = [0, 0, 0]
+            for page_index, (flags, granule, _, segment_table, body) in enumerate(pages):
+                is_header, completed = self._scan_page(flags, segment_table, body, state)
+                if is_header and index > 0:
+                    continue
+
+                last_page = last_segment and page_index == len(pages) - 1
+                if is_header:
+                    new_granule = 0
+                elif not completed:
+                    new_granule = -1
+                elif last_page and granule >= 0:
+                    # 末页粒度位置可能小于实际采样数 (用于裁掉末尾填充), 原样保留
+                    new_granule = offset + granule
+                else:
+                    new_granule = offset + state[0]
+
+                flags &= _OGG_CONTINUED
+                if sequence == 0:
+                    flags |= _OGG_BOS
+                if last_page:
+                    flags |= _OGG_EOS
+                header = bytearray(_OGG_HEADER.pack(b'OggS', 0, flags, new_granule, serial,
+                                                    sequence, 0))
+                header.append(len(segment_table))
+                header.extend(segment_table)
+                crc = ogg_crc(body, ogg_crc(header))
+                struct.pack_into('<I', header, 22, crc)
+                pieces.append(bytes(header))
+                pieces.append(body)
+                sequence += 1
+            offset += state[0]
+        return pieces
+
+    @staticmethod
+    def _parse_ogg_pages(data: memoryview) -> List[Tuple[int, int, int, bytes, memoryview]]:
+        """拆分 Ogg 页, 返回 (标志, 粒度位置, 序列号, 分段表, 页内容) 列表"""
+        pages = []
+        offset = 0
+        while offset + 27 <= len(data):
+            capture, version, flags, granule, serial, _, _ = _OGG_HEADER.unpack_from(data, offset)
+            if capture != b'OggS' or version != 0:
+                raise ValueError(f"Ogg 页头错误, 偏移 {offset}")
+            count = data[offset + 26]
+            segment_table = bytes(data[offset + 27:offset + 27 + count])
+            body_start = offset + 27 + count
+            body_end = body_start + sum(segment_table)
+            if body_end > len(data):
+                raise ValueError("Ogg 数据不完整")
+            pages.append((flags, granule, serial, segment_table, data[body_start:body_end]))
+            offset = body_end
+        if not pages:
+            raise ValueError("没有 Ogg 页")
+        return pages
+
+    @staticmethod
+    def _first_packet(pages: List[Tuple[int, int, int, bytes, memoryview]]) -> bytes:
+        """取出第一个包 (OpusHead)"""
+        _, _, _, segment_table, body = pages[0]
+        size = 0
+        for lacing in segment_table:
+            size += lacing
+            if lacing < 255:
+                break
+        return bytes(body[:size])
+
+    @staticmethod
+    def _scan_page(flags: int, segment_table: bytes, body: memoryview,
+                   state: List[int]) -> Tuple[bool, bool]:
+        """统计页内完成的包和采样数
+
+        前两个包是 OpusHead 和 OpusTags, 按规范独占页, 之后才是音频包。
+        跨页的包在开始的页上读取 TOC, 在结束的页上计入采样数。
+        Args:
+            state: [累计采样数, 累计包数, 进行中的包的采样数], 原地更新
+        Returns:
+            (是否为头页, 本页是否有包结束)
+        """
+        is_header = state[1] < 2
+        completed = False
+        position = 0
+        at_packet_start = not (flags & _OGG_CONTINUED)
+        for lacing in segment_table:
+            if at_packet_start:
+                state[2] = opus_packet_samples(body[position:position + 2]) if state[1] >= 2 else 0
+            position += lacing
+            at_packet_start = lacing < 255
+            if at_packet_start:
+                state[0] += state[2]
+                state[1] += 1
+                state[2] = 0
+                completed = True
+        return is_header, completed
+
+
+class StreamingStitcher:
+    """边接收边拼接 mp3/pcm 片段, 输出与 AudioStitcher.join 逐字节一致
+
+    mp3 只保留首个片段的 ID3v2 标签, 去掉各片段的 Xing/Info/VBRI 帧和
+    末尾不完整的帧; 每次只缓存不足一帧的数据。wav 和 opus 需要改写文件头,
+    只能在全部片段到达后用 AudioStitcher 拼接。
+    """
+    SUPPORTED_FORMATS = ('mp3', 'pcm')
+
+    def __init__(self, response_format: str):
+        if response_format not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"不支持流式拼接的音频格式: {response_format}")
+        self.response_format = response_format
+        # 已开始输出的非空片段数
+        self._segments = 0
+
+    def segment(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """逐块处理下一个片段, 返回可直接输出的数据"""
+        if self.response_format == 'pcm':
+            # PCM 没有文件头, 直接首尾相接
+            yield from chunks
+            return
+        yield from self._segment_mp3(chunks)
+
+    def _segment_mp3(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """去掉片段的标签和信息帧, 按完整帧输出"""
+        buffer = bytearray()
+        first = None
+        tag_size = None
+        started = False
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if first is None:
+                first = self._segments == 0
+                self._segments += 1
+            buffer.extend(chunk)
+            if tag_size is None:
+                if len(buffer) < 10:
+                    continue
+                tag_size = id3v2_size(bytes(buffer[:10]))
+                if len(buffer) < tag_size:
+                    continue
+            elif len(buffer) < tag_size:
+                continue
+            if tag_size:
+                if first:
+                    yield bytes(buffer[:tag_size])
+                del buffer[:tag_size]
+                tag_size = 0
+            data, started = self._take_frames(buffer, started)
+            if data:
+                yield data
+
+        if first is None:
+            return
+        if tag_size:
+            # 标签不完整, 与 AudioStitcher 一致: 首个片段原样保留, 其余丢弃
+            if first:
+                yield bytes(buffer)
+            return
+        data, _ = self._take_frames(buffer, started)
+        if data:
+            yield data
+
+    @staticmethod
+    def _take_frames(buffer: bytearray, started: bool) -> Tuple[bytes, bool]:
+        """取出缓冲区中的完整帧 (含帧间数据), 原地保留剩余数据
+        Args:
+            started: 是否已输出过音频帧, 之前的信息帧和无法识别的数据丢弃
+        Returns:
+            (可输出的数据, 是否已输出过音频帧)
+        """
+        data = bytes(buffer)
+        offset = 0
+        start = 0 if started else None
+        end = None
+        while offset + 4 <= len(data):
+            frame = parse_mp3_header(data, offset)
+            if frame is None:
+                offset += 1
+                continue
+            if offset + frame.length > len(data):
+                break
+            if start is None:
+                if AudioStitcher._is_vbr_header(data, offset, frame.length):
+                    offset += frame.length
+                    continue
+                start = offset
+            offset += frame.length
+            end = offset
+
+        if end is None:
+            if start is None:
+                del buffer[:offset]
+            return b'', start is not None
+        del buffer[:end]
+        return data[start:end], True
@@ -0,0 +1,65 @@
+import os
+import uuid
+from typing import Optional
+from utils.logger import get_child_logger
+
+# 未完成文件的后缀, 中途失败或取消时删除
+PARTIAL_SUFFIX = '.part'
+
+
+class AtomicAudioWriter:
+    """流式写入音频文件
+
+    数据块直接写入目标目录下的临时文件, 完成后原子重命名为目标文件名,
+    中途失败或取消时删除临时文件。目标目录中不会出现写了一半的音频文件,
+    内存占用与音频长度无关。
+
+    接口与边下载边播放的流一致 (feed/finish/stop)。
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 目标文件路径, 所在目录不存在时自动创建
+        """
+        self.logger = get_child_logger('audio_writer')
+        self.path = path
+        self.size = 0
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        # 临时文件与目标文件在同一目录, 保证 os.replace 是原子操作;
+        # 权限与直接 open() 创建的文件一致 (受 umask 控制)
+        self.temp_path = os.path.join(
+            directory, f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}"
+        )
+        fd = os.open(self.temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        self._file: Optional[object] = os.fdopen(fd, 'wb')
+        # 重命名成功后才为 True, 此前 stop() 总是删除临时文件
+        self._finished = False
+
+    def feed(self, chunk: bytes) -> None:
+        """写入一块数据"""
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def finish(self) -> str:
+        """写入完成, 重命名为目标文件并返回路径"""
+        self._file.close()
+        self._file = None
+        os.replace(self.temp_path, self.path)
+        self._finished = True
+        self.logger.info(f"音频文件已保存: {self.path} ({self.size} 字节)")
+        return self.path
+
+    def stop(self) -> None:
+        """放弃写入, 删除临时文件 (finish() 中途失败时也可调用)"""
+        if self._finished:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            self.logger.warning(f"删除临时文件失败: {self.temp_path}", exc_info=True)
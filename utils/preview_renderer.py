@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from utils.audio_formats import WavInfo
+from utils.audio_postprocess import encode_samples, time_stretch
+from utils.logger import get_child_logger
+
+
+@dataclass
+class _Render:
+    """一次接口合成结果的 PCM 数据及其合成参数"""
+    samples: np.ndarray
+    sample_rate: int
+    speed: float
+    gain: float
+
+
+class PreviewRenderer:
+    """本地预览渲染
+
+    按 (文本, 音色, 模型) 保存最近一次接口合成的 PCM 数据, 调整语速和增益
+    时在本地重新渲染 (相位声码器变速 + 增益), 不再调用接口。
+    """
+    def __init__(self, max_entries: int = 8):
+        self.logger = get_child_logger('preview_renderer')
+        self.max_entries = max(1, max_entries)
+        self._renders: 'OrderedDict[Tuple[str, str, str], _Render]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str, params: Dict[str, Any]) -> Tuple[str, str, str]:
+        """缓存键: 文本、音色和模型决定音频内容"""
+        return text, params.get('voice_id') or '', params.get('model') or ''
+
+    def store(self, text: str, params: Dict[str, Any], pcm: bytes, sample_rate: int,
+              channels: int = 1) -> None:
+        """保存接口合成结果
+        Args:
+            text: 文本
+            params: 合成参数, 记录其中的语速和增益作为基准
+            pcm: 16 位 PCM 数据
+            sample_rate: 采样率
+            channels: 声道数
+        """
+        usable = len(pcm) - len(pcm) % (2 * channels)
+        samples = np.frombuffer(pcm[:usable], dtype='<i2').astype(np.float32) / 32768.0
+        render = _Render(samples.reshape(-1, channels), sample_rate,
+                         float(params.get('speed', 1.0)), float(params.get('gain', 0.0)))
+        key = self._key(text, params)
+        with self._lock:
+            self._renders[key] = render
+            self._renders.move_to_end(key)
+            while len(self._renders) > self.max_entries:
+                self._renders.popitem(last=False)
+        self.logger.debug(f"保存预览数据: {len(render.samples) / sample_rate:.1f}s")
+
+    def has(self, text: str, params: Dict[str, Any]) -> bool:
+        """是否有可用于本地渲染的数据"""
+        with self._lock:
+            return self._key(text, params) in self._renders
+
+    def render(self, text: str, params: Dict[str, Any]) -> Optional[bytes]:
+        """按新的语速和增益在本地渲染, 返回 WAV 数据; 没有缓存时返回 None"""
+        key = self._key(text, params)
+        with self._lock:
+            render = self._renders.get(key)
+            if render is not None:
+                self._renders.move_to_end(key)
+        if render is None:
+            return None
+
+        speed = float(params.get('speed', 1.0)) / render.speed
+        gain_db = float(params.get('gain', 0.0)) - render.gain
+        samples = time_stretch(render.samples, speed)
+        if gain_db:
+            samples = samples * np.float32(10 ** (gain_db / 20))
+        self.logger.debug(f"本地渲染预览: 语速 x{speed:.2f}, 增益 {gain_db:+.1f}dB")
+
+        info = WavInfo(render.samples.shape[1], render.sample_rate, 2, 0, 0)
+        return encode_samples(samples, info, 'wav')
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._renders.clear()
@@ -0,0 +1,159 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+from utils.logger import get_child_logger
+
+
+class _Call:
+    """进行中的一次调用"""
+    def __init__(self):
+        self.future: Future = Future()
+        self.waiters = 0
+
+
+class _StreamFlight:
+    """进行中的一次流式调用: 后台线程拉取数据块, 所有订阅者从头回放"""
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.cond = threading.Condition()
+        self.subscribers = 0
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """相同请求合并 (single-flight)
+
+    同一键的请求同时进行时, 只有第一个调用方真正执行, 其余调用方等待
+    其结果 (do) 或订阅其数据流 (stream), 合并后只产生一次上游调用。
+    调用结束后立即移除, 之后的请求重新执行 (结果复用由缓存负责)。
+    """
+    def __init__(self, name: str = 'single_flight'):
+        self.logger = get_child_logger(name)
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._streams: Dict[Hashable, _StreamFlight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """执行 fn, 同一键已有调用进行中时等待其结果 (异常同样共享)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return call.future.result()
+            finally:
+                with self._lock:
+                    call.waiters -= 1
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.future.set_exception(e)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(self, key: Hashable, fn: Callable[[], Iterator[bytes]]) -> Iterator[bytes]:
+        """订阅数据流, 同一键已有流进行中时从头回放已收到的数据块并继续接收
+
+        上游在后台线程中拉取, 与各订阅者的消费速度无关; 所有订阅者都
+        提前退出时关闭上游。
+        """
+        with self._lock:
+            flight = self._streams.get(key)
+            if flight is not None:
+                with flight.cond:
+                    # 订阅者已全部退出的流即将停止, 不能再加入
+                    if flight.cancelled:
+                        flight = None
+                    else:
+                        flight.subscribers += 1
+                        self.coalesced += 1
+            if flight is None:
+                flight = self._streams[key] = _StreamFlight()
+                flight.subscribers = 1
+                self.calls += 1
+                threading.Thread(target=self._pump, args=(key, flight, fn),
+                                 name='single-flight', daemon=True).start()
+        return self._subscribe(flight)
+
+    def _subscribe(self, flight: _StreamFlight) -> Iterator[bytes]:
+        """按顺序返回数据块, 等待新数据或结束"""
+        index = 0
+        try:
+            while True:
+                with flight.cond:
+                    while index >= len(flight.chunks) and not flight.done:
+                        flight.cond.wait()
+                    chunks = flight.chunks[index:]
+                    finished = flight.done
+                    error = flight.error
+                index += len(chunks)
+                yield from chunks
+                if finished and index >= len(flight.chunks):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            with flight.cond:
+                flight.subscribers -= 1
+                if flight.subscribers == 0 and not flight.done:
+                    flight.cancelled = True
+
+    def _pump(self, key: Hashable, flight: _StreamFlight, fn: Callable[[], Iterator[bytes]]) -> None:
+        """后台拉取上游数据块"""
+        upstream = None
+        try:
+            upstream = fn()
+            for chunk in upstream:
+                with flight.cond:
+                    if flight.cancelled:
+                        self.logger.debug("订阅者已全部退出, 停止拉取")
+                        break
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            if upstream is not None and hasattr(upstream, 'close'):
+                upstream.close()
+            with self._lock:
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def waiters(self) -> Dict[Hashable, int]:
+        """各进行中请求的等待者数 (不含执行者本身)"""
+        with self._lock:
+            counts = {key: call.waiters for key, call in self._calls.items()}
+            for key, flight in self._streams.items():
+                counts[key] = counts.get(key, 0) + max(0, flight.subscribers - 1)
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        """合并统计"""
+        waiters = self.waiters()
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'in_flight': len(waiters),
+            'waiting': sum(waiters.values()),
+            'max_waiters': max(waiters.values(), default=0),
+        }
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from utils.logger import get_child_logger
+
+class SynthesisCache:
+    """基于内容哈希的磁盘音频缓存
+
+    以 (规范化文本, 模型, 音色, 格式, 采样率, 语速, 增益) 的哈希作为键,
+    超出容量上限时按最近最少使用 (LRU) 顺序淘汰。
+    """
+    def __init__(self, cache_dir: str = 'data/cache/audio', max_bytes: int = 256 * 1024 * 1024):
+        self.logger = get_child_logger('synthesis_cache')
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        # 键 -> 文件大小, 按访问时间从旧到新排列
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, model: Optional[str], voice_id: Optional[str],
+                 response_format: str, sample_rate: int, speed: float, gain: float) -> str:
+        """计算缓存键"""
+        normalized = ' '.join(unicodedata.normalize('NFKC', text).split())
+        payload = json.dumps([
+            normalized,
+            model,
+            voice_id,
+            response_format,
+            int(sample_rate),
+            round(float(speed), 4),
+            round(float(gain), 4)
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """缓存文件路径 (按键前两位分目录)"""
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _load_index(self) -> None:
+        """扫描缓存目录, 按访问时间重建 LRU 索引"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self.logger.info(f"音频缓存已加载: {len(self._index)} 项, {self._total_bytes} bytes")
+
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存, 未命中返回 None"""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # 更新修改时间, 使 LRU 顺序在重启后依然有效
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self._total_bytes -= size
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """写入缓存 (先写临时文件再原子替换)"""
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            self.logger.error(f"写入音频缓存失败: {key}", exc_info=True)
+            return
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目直到低于容量上限 (调用方持有锁)"""
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.logger.warning(f"删除缓存文件失败: {key}", exc_info=True)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for key in list(self._index):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
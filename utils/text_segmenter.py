@@ -0,0 +1,87 @@
+import re
+from typing import List
+
+# 句末标点 (中英文), 允许后跟引号或右括号
+_SENTENCE_BOUNDARY = re.compile(
+    r'(?<=[。！？!?；;…\n])(?![”’"」』）)。！？!?；;…])'
+    r'|(?<=[。！？!?；;…][”’"」』）)])'
+    r'|(?<=[.])(?=\s)'
+)
+
+# 句内停顿标点, 用于拆分超长句子
+_CLAUSE_BOUNDARY = re.compile(r'(?<=[，,、：:])')
+
+
+def split_sentences(text: str) -> List[str]:
+    """按中英文句末标点切分句子"""
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+def _cut_position(clause: str, max_chars: int) -> int:
+    """超长片段的切分位置: max_chars 以内最后一个空白处, 没有空白 (如中文) 时硬切"""
+    for index in range(min(max_chars, len(clause) - 1), 0, -1):
+        if clause[index].isspace():
+            return index
+    return max_chars
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    """拆分超过长度限制的句子: 先按逗号等停顿处拆, 仍超长则在空白处拆, 最后硬切"""
+    pieces = []
+    for clause in _CLAUSE_BOUNDARY.split(sentence):
+        while len(clause) > max_chars:
+            # 空白留在下一段开头, 合并时原样拼回
+            cut = _cut_position(clause, max_chars)
+            pieces.append(clause[:cut])
+            clause = clause[cut:]
+        if clause:
+            pieces.append(clause)
+    return [segment.strip() for segment in _pack(pieces, max_chars, spaced=False) if segment.strip()]
+
+
+def _pack(pieces: List[str], max_chars: int, spaced: bool = True) -> List[str]:
+    """在不超过长度限制的前提下合并相邻片段
+    Args:
+        pieces: 待合并的片段
+        max_chars: 每段最大字符数
+        spaced: 是否在相邻英文片段之间补空格 (中文直接拼接)
+    """
+    segments = []
+    current = ''
+    for piece in pieces:
+        separator = ''
+        if spaced and current and current[-1].isascii() and piece[0].isascii():
+            separator = ' '
+        candidate = f"{current}{separator}{piece}"
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            if current:
+                segments.append(current)
+            current = piece
+    if current:
+        segments.append(current)
+    return segments
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """将长文本切分为不超过 max_chars 的片段, 尽量在句子边界处切分
+    Args:
+        text: 原始文本
+        max_chars: 每段最大字符数
+    """
+    if max_chars <= 0:
+        raise ValueError(f"分段长度必须大于0: {max_chars}")
+
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    pieces = []
+    for sentence in split_sentences(text):
+        if len(sentence) > max_chars:
+            pieces.extend(_split_long_sentence(sentence, max_chars))
+        else:
+            pieces.append(sentence)
+
+    return _pack(pieces, max_chars)
@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+from utils.logger import get_child_logger
+
+class VoiceCatalogCache:
+    """音色列表缓存
+
+    启动时从磁盘快照加载, 读取时立即返回当前快照; 快照超过 TTL 后在
+    后台线程重新拉取 (stale-while-revalidate)。上传和删除音色时直接修改
+    快照, 不必重新请求整个列表。
+    """
+    def __init__(self, fetcher: Callable[[], Dict[str, Any]],
+                 cache_file: str = 'data/cache/voices.json', ttl: float = 300.0):
+        self.logger = get_child_logger('voice_cache')
+        self.fetcher = fetcher
+        self.cache_file = cache_file
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # 上传/删除修改快照时递增, 用于丢弃修改前开始的拉取结果
+        self._generation = 0
+        self._voices: Optional[List[Dict[str, Any]]] = None
+        self._by_model: Dict[str, List[Dict[str, Any]]] = {}
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+        self._load()
+
+    def add_listener(self, callback: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """注册快照更新回调 (可能在后台线程中调用)"""
+        self._listeners.append(callback)
+
+    def get(self, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取音色列表; 无快照时同步拉取, 快照过期时后台刷新"""
+        with self._lock:
+            voices = self._voices
+            stale = time.time() - self._fetched_at > self.ttl
+
+        if voices is None:
+            self.refresh()
+        elif stale:
+            self.refresh(background=True)
+
+        with self._lock:
+            if model:
+                return list(self._by_model.get(model, []))
+            return list(self._voices or [])
+
+    def refresh(self, background: bool = False) -> None:
+        """重新拉取音色列表
+        Args:
+            background: 是否在后台线程中执行 (已有刷新进行中时直接返回)
+        """
+        with self._lock:
+            if self._refreshing and background:
+                return
+            self._refreshing = True
+
+        if background:
+            threading.Thread(target=self._refresh_safely, name='voice-cache-refresh',
+                             daemon=True).start()
+        else:
+            try:
+                self._fetch()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+    def _refresh_safely(self) -> None:
+        """后台刷新, 失败时保留旧快照"""
+        try:
+            self._fetch()
+        except Exception:
+            self.logger.warning("后台刷新音色列表失败, 继续使用旧快照", exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _fetch(self) -> None:
+        """调用接口拉取音色列表并更新快照"""
+        with self._lock:
+            generation = self._generation
+        response = self.fetcher()
+        if not isinstance(response, dict):
+            raise ValueError(f"获取音色列表返回格式错误: {response}")
+        voices = [v for v in response.get('result', []) if isinstance(v, dict)]
+        if not self._replace(voices, time.time(), generation):
+            # 拉取期间快照被上传/删除修改过, 拉到的列表可能不含这些修改
+            self.logger.debug("拉取期间音色列表已修改, 丢弃本次结果")
+
+    def add_voice(self, voice: Dict[str, Any]) -> None:
+        """上传成功后将音色加入快照"""
+        with self._lock:
+            voices = [v for v in (self._voices or []) if v.get('uri') != voice.get('uri')]
+            voices.append(voice)
+            self._generation += 1
+            self._set(voices, self._fetched_at)
+        self._publish()
+
+    def remove_voice(self, uri: str) -> None:
+        """删除成功后将音色移出快照"""
+        with self._lock:
+            voices = [v for v in (self._voices or []) if v.get('uri') != uri]
+            self._generation += 1
+            self._set(voices, self._fetched_at)
+        self._publish()
+
+    def invalidate(self) -> None:
+        """使快照过期, 下次读取时后台刷新"""
+        with self._lock:
+            self._fetched_at = 0.0
+
+    @staticmethod
+    def _index_by_model(voices: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """按模型分组, 避免每次读取时重新过滤"""
+        by_model: Dict[str, List[Dict[str, Any]]] = {}
+        for voice in voices:
+            by_model.setdefault(voice.get('model', ''), []).append(voice)
+        return by_model
+
+    def _set(self, voices: List[Dict[str, Any]], fetched_at: float) -> None:
+        """替换快照并重建模型索引 (调用方持有锁)"""
+        self._voices = voices
+        self._by_model = self._index_by_model(voices)
+        self._fetched_at = fetched_at
+
+    def _replace(self, voices: List[Dict[str, Any]], fetched_at: float, generation: int) -> bool:
+        """用拉取结果替换快照, 拉取开始后快照被修改过时放弃, 返回是否已替换"""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._set(voices, fetched_at)
+        self._publish()
+        return True
+
+    def _publish(self) -> None:
+        """持久化当前快照并通知监听者 (按顺序写入, 后写入的总是较新的快照)"""
+        with self._save_lock:
+            with self._lock:
+                voices, fetched_at = self._voices or [], self._fetched_at
+            self._save(voices, fetched_at)
+        for callback in self._listeners:
+            try:
+                callback(list(voices))
+            except Exception:
+                self.logger.error("音色列表更新回调失败", exc_info=True)
+
+    def _load(self) -> None:
+        """从磁盘加载快照"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                voices = snapshot.get('result', [])
+                self._voices = voices
+                self._by_model = self._index_by_model(voices)
+                self._fetched_at = float(snapshot.get('fetched_at', 0.0))
+                self.logger.info(f"音色列表快照已加载: {len(voices)} 项")
+        except Exception:
+            self.logger.error("加载音色列表快照失败", exc_info=True)
+
+    def _save(self, voices: List[Dict[str, Any]], fetched_at: float) -> None:
+        """原子写入快照文件"""
+        try:
+            directory = os.path.dirname(self.cache_file) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': fetched_at, 'result': voices}, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_file)
+        except Exception:
+            self.logger.error("保存音色列表快照失败", exc_info=True)